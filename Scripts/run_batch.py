@@ -19,7 +19,8 @@ def _wait_done(job_id: str, timeout_s: int = 30) -> Dict[str, Any]:
     t0 = time.time()
     last = None
     while True:
-        r = requests.get(url, timeout=5)
+        wait = max(1, min(30, int(timeout_s - (time.time() - t0))))
+        r = requests.get(url, params={"wait": wait}, timeout=wait + 5)  # server long-polls until done/error
         if r.status_code == 200:
             j = r.json()
             if j.get("state") in ("done", "blocked", "error"):
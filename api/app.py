@@ -1,20 +1,49 @@
 # api/app.py — with health endpoints, RFC7807 404s, correct audit_ref, and SQLite store import
 from __future__ import annotations
-import csv, io, json, logging
-from datetime import datetime, UTC
+import asyncio, csv, io, json, logging, os, socket, threading, time
+from contextlib import ExitStack, asynccontextmanager
+from datetime import datetime, timedelta, UTC
 from typing import Any, Dict, Optional
 from uuid import uuid4
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Response, Query, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, BackgroundTasks, Header, HTTPException, Response, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from config import AUDIT_REF as AUDIT_REF_FS  # absolute FS path
-from core.store.jobs import upsert_job, update_job, get_job
+from config import JOB_BATCH_MAX, JOB_DEDUP, JOB_DEDUP_TTL_S, JOB_EVENTS_POLL_S, JOB_EXECUTOR, JOB_LEASE_S
+from api.worker import LeaseHeartbeat
+from api.v0 import router as v0_router
+from core.provenance import audit_sink
+from core.provenance.audit_sink import sha256_json
+from core.provenance.audit_span import job_span
+from core.store import db as store_db, retention
+from core.store.notify import hub as job_hub, TooManySubscribers
+from core.store.jobs import TERMINAL_STATES, IdempotencyConflict, create_job_dedup, create_jobs_dedup, update_job, get_job, get_job_raw, claim_job, flush_jobs, list_jobs
+from core.models.clients import aclose_clients
+from core.models.health import registry as provider_health
+from core.models.ratelimit import limiter_stats
+from core.metrics.timings import StageTimer, latency as latency_stats
 
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="Alz Platform API", version="0.4.2 (tests fixed)")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    retention.start()       # no-op unless ALZ_JOB_RETENTION is set
+    if JOB_EXECUTOR == "inline":
+        threading.Thread(target=_recover_inline, args=(datetime.now(UTC).isoformat(),),
+                         daemon=True, name="inline-recovery").start()
+    yield
+    retention.stop()
+    await aclose_clients()  # release pooled LLM connections
+    flush_jobs()            # commit write-behind job updates
+    store_db.close()        # drain queued job-store writes
+    audit_sink.close()      # write out queued audit lines
+
+
+app = FastAPI(title="Alz Platform API", version="0.4.2 (tests fixed)", lifespan=lifespan)
+app.include_router(v0_router, prefix="/v0")  # /v0/audit/*
 
 # Job record stores relative audit_ref (tests expect this)
 AUDIT_REF_JOB = "logs/audit.ndjson"
@@ -48,6 +77,9 @@ def ready() -> Dict[str, Any]:
             "store": "ok",      # SQLite job store reachable
             "pipeline": "ok",   # boards → consensus → synthesis wired
         },
+        "providers": provider_health.snapshot(),
+        "limits": limiter_stats(),  # per provider/model: in flight, waiting, queue-wait times
+        "audit": audit_sink.stats(),  # per-file writer counters, incl. dropped events
     }
 
 
@@ -62,39 +94,29 @@ class JobCreate(BaseModel):
 
 # ---------------- Boards runner (official or fallback) ----------------
 try:
-    from api.board_runners import run_boards as _official_run_boards  # type: ignore
+    from api.board_runners import build_casebundle, run_boards as _official_run_boards  # type: ignore
 
-    def run_boards(payload: Dict[str, Any]) -> Dict[str, Any]:
-        return _official_run_boards(payload)
+    def run_boards(payload: Dict[str, Any], timings: Optional[Dict[str, int]] = None, case: Any = None) -> Dict[str, Any]:
+        return _official_run_boards(payload, timings=timings, case=case)
 except Exception:
-    def run_boards(payload: Dict[str, Any]) -> Dict[str, Any]:
-        boards: Dict[str, Any] = {}
-        try:
-            from med_stack.board.roles import neurology_ai  # type: ignore
-            boards["neurology"] = neurology_ai(payload)
-        except Exception:
-            pass
-        try:
-            from med_stack.board.roles import imaging_ai  # type: ignore
-            boards["imaging"] = imaging_ai(payload)
-        except Exception:
-            pass
-        try:
-            from med_stack.board.roles import genomics_ai  # type: ignore
-            boards["genomics"] = genomics_ai(payload)
-        except Exception:
-            pass
-        try:
-            from med_stack.board.roles import pharmaco_ai  # type: ignore
-            boards["pharmaco"] = pharmaco_ai(payload)
-        except Exception:
-            pass
-        try:
-            from med_stack.board.roles import env_ai  # type: ignore
-            boards["env"] = env_ai(payload)
-        except Exception:
-            pass
-        return boards
+    build_casebundle = None  # type: ignore[assignment]
+
+    def run_boards(payload: Dict[str, Any], timings: Optional[Dict[str, int]] = None, case: Any = None) -> Dict[str, Any]:
+        import importlib
+        from api.board_executor import run_concurrently
+
+        calls = []
+        for key, role in (("neurology", "neurology_ai"), ("imaging", "imaging_ai"), ("genomics", "genomics_ai"),
+                          ("pharmaco", "pharmaco_ai"), ("env", "env_ai")):
+            try:
+                mod = importlib.import_module(f"med_stack.board.roles.{role}")
+            except Exception:
+                continue
+            calls.append((key, lambda mod=mod: mod.analyze(payload)))
+        outcomes = run_concurrently(calls)
+        if timings is not None:
+            timings.update({o.name: o.duration_ms for o in outcomes})
+        return {o.name: o.value for o in outcomes if o.ok}
 
 
 # ---------------- Consensus & synthesis ----------------
@@ -124,36 +146,32 @@ def _synthesize(consensus: Any, boards: Dict[str, Any], payload: Dict[str, Any])
     raise TypeError("synthesize_protocol_card signature not matched by compatibility shims.")
 
 
-# ---------------- Audit ----------------
-def _write_audit_line(action: str, subject: Optional[str]) -> None:
-    try:
-        from pathlib import Path as _P
-        _P(AUDIT_REF_FS).parent.mkdir(parents=True, exist_ok=True)
-        with open(AUDIT_REF_FS, "a", encoding="utf-8") as f:
-            f.write(json.dumps({
-                "ts": datetime.now(UTC).isoformat(),
-                "action": action,
-                "subject": subject or "unknown",
-                "who": "project_stack",
-            }) + "\n")
-    except Exception:
-        log.exception("audit write failed")
-
-
 # ---------------- Background job processor ----------------
 def _process_job(job_id: str, payload: Dict[str, Any]) -> None:
-    try:
-        _write_audit_line("ingest_start", payload.get("case_id"))
-        _write_audit_line("ingest_done", payload.get("case_id") or "unknown")
-        _write_audit_line("normalize", payload.get("case_id") or "unknown")
+    # ingest/normalize are audited by project_stack.pipelines.steps; the span
+    # collects those and every other audit() of this job into one record.
+    with job_span(job_id, subject=payload.get("case_id") or job_id) as span:
+        state = _run_pipeline(job_id, payload)
+        if span is not None:
+            span.annotate(state=state)
 
-        # Allow clinical_notes to act like notes
-        if payload.get("clinical_notes") and not payload.get("notes"):
-            payload = {**payload, "notes": payload["clinical_notes"]}
 
-        boards = run_boards(payload)
-        consensus = _compute_consensus(boards)
-        protocol_card = _synthesize(consensus, boards, payload)
+def _run_pipeline(job_id: str, payload: Dict[str, Any]) -> str:
+    t = StageTimer()
+    try:
+        with t.span("ingest"):
+            # Allow clinical_notes to act like notes
+            if payload.get("clinical_notes") and not payload.get("notes"):
+                payload = {**payload, "notes": payload["clinical_notes"]}
+            # ingest + normalize run here, once; the boards share the frozen bundle
+            case = build_casebundle(payload) if build_casebundle is not None else None
+
+        with t.span("boards"):
+            boards = run_boards(payload, timings=t.boards, case=case)
+        with t.span("consensus"):
+            consensus = _compute_consensus(boards)
+        with t.span("synthesis"):
+            protocol_card = _synthesize(consensus, boards, payload)
 
         # ✅ Ensure case_id is meaningful AND provenance is explicit
         cid_input = (payload.get("case_id") or "").strip()
@@ -166,40 +184,306 @@ def _process_job(job_id: str, payload: Dict[str, Any]) -> None:
         protocol_card["case_id_source"] = "user" if cid_input else "job_id_fallback"
         protocol_card["job_id"] = job_id
 
-        update_job(
-            job_id,
-            state="done",
-            protocol_card=protocol_card,
-            boards=boards,
-            validators=[],
-        )
+        # the store write is timed into the rolling stats only; it can't time itself into the row
+        with t.span("store"):
+            update_job(
+                job_id,
+                state="done",
+                protocol_card=protocol_card,
+                boards=boards,
+                validators=[],
+                timings=t.to_dict(),
+            )
+        return "done"
     except Exception as e:
         log.exception("job processing failed: %s", e)
-        update_job(job_id, state="error", error=str(e))
+        update_job(job_id, state="error", error=str(e), timings=t.to_dict())
+        return "error"
+    finally:
+        t.observe()
+
+
+def _inline_worker_id() -> str:
+    return f"api-inline:{socket.gethostname()}:{os.getpid()}"
+
 
+def _run_claimed(job: Dict[str, Any], worker_id: str) -> None:
+    # Keep the lease alive like api.worker does, so a long run is never re-claimed mid-flight
+    with LeaseHeartbeat(job["id"], worker_id, JOB_LEASE_S):
+        _process_job(job["id"], job["input"])
+
+
+def _run_inline(job_id: str) -> None:
+    """In-process execution: claim the job like a worker would, then process it."""
+    wid = _inline_worker_id()
+    job = claim_job(wid, job_id=job_id)
+    if job:  # already claimed elsewhere (e.g. a worker pool is also running)
+        _run_claimed(job, wid)
+
+
+def _recover_inline(created_before: str) -> int:
+    """
+    Inline mode has no worker loop: on startup, run the jobs a previous
+    process left queued or whose lease expired (it died mid-run). Jobs
+    created after startup are left to their own background tasks.
+    """
+    wid, n = _inline_worker_id(), 0
+    while (job := claim_job(wid, created_before=created_before)) is not None:
+        _run_claimed(job, wid)
+        n += 1
+    if n:
+        log.info("inline executor recovered %d job(s)", n)
+    return n
 
 
 # ---------------- API routes ----------------
 @app.post("/v0/jobs")
-def create_job(body: JobCreate, background: BackgroundTasks) -> Dict[str, Any]:
-    job_id = str(uuid4())
-    upsert_job({
-        "id": job_id,
-        "state": "queued",
-        "created_at": datetime.now(UTC).isoformat(),
-        "audit_ref": AUDIT_REF_JOB,  # relative path for tests
-        "input": body.model_dump(mode="python"),
-    })
-    background.add_task(_process_job, job_id, body.model_dump(mode="python"))
+def create_job(
+    body: JobCreate,
+    background: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+) -> Dict[str, Any]:
+    payload = body.model_dump(mode="python")
+    try:
+        job_id, created = create_job_dedup({
+            "id": str(uuid4()),
+            "state": "queued",
+            "created_at": datetime.now(UTC).isoformat(),
+            "audit_ref": AUDIT_REF_JOB,  # relative path for tests
+            "input": payload,
+            "input_hash": input_hash(body),
+            "idempotency_key": idempotency_key,
+        }, ttl_s=JOB_DEDUP_TTL_S if JOB_DEDUP else None)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not created:
+        return {"job_id": job_id, "deduplicated": True}
+    # Durable queue: the row above is the job. In "queue" mode, api.worker picks it up.
+    if JOB_EXECUTOR == "inline":
+        background.add_task(_run_inline, job_id)
     return {"job_id": job_id}
 
 
+async def _run_inline_batch(job_ids: list[str]) -> None:
+    # One threadpool task per job, so a batch runs in parallel (bounded by the pool) rather than in series
+    await asyncio.gather(*(run_in_threadpool(_run_inline, job_id) for job_id in job_ids))
+
+
+def _parse_batch(body: bytes, content_type: str) -> list[Any]:
+    """A JSON array, or NDJSON (one JobCreate per line). Unparseable NDJSON lines become per-item errors."""
+    text = body.decode("utf-8")
+    if "ndjson" not in content_type and text.lstrip().startswith("["):
+        array = json.loads(text)
+        if not isinstance(array, list):
+            raise ValueError("expected a JSON array")
+        return array
+    items: list[Any] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            items.append(e)
+    return items
+
+
+@app.post("/v0/jobs:batch")
+async def create_jobs_batch(
+    request: Request,
+    background: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+) -> Dict[str, Any]:
+    """
+    Submit many jobs at once: a JSON array or NDJSON of JobCreate bodies.
+    Valid items are inserted in one transaction with the same dedup as
+    POST /v0/jobs; an Idempotency-Key applies per item as "<key>:<index>",
+    so retrying a batch returns the same job ids. job_ids is aligned with the
+    input (null where the item was rejected), errors lists the rejects and
+    deduplicated the indexes that matched an existing job.
+    """
+    try:
+        items = _parse_batch(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"invalid batch body: {e}")
+    if len(items) > JOB_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"batch exceeds {JOB_BATCH_MAX} items")
+
+    t0 = datetime.now(UTC)
+    job_ids: list[Optional[str]] = [None] * len(items)
+    errors: list[Dict[str, Any]] = []
+    indexes: list[int] = []
+    recs: list[Dict[str, Any]] = []
+    for i, item in enumerate(items):
+        try:
+            if isinstance(item, Exception):
+                raise item
+            body = JobCreate.model_validate(item)
+        except ValidationError as e:
+            errors.append({"index": i, "errors": json.loads(e.json(include_url=False))})
+            continue
+        except ValueError as e:
+            errors.append({"index": i, "errors": [{"msg": f"invalid JSON: {e}"}]})
+            continue
+        indexes.append(i)
+        recs.append({
+            "id": str(uuid4()),
+            "state": "queued",
+            # distinct, increasing timestamps keep the batch's order in the claim queue
+            "created_at": (t0 + timedelta(microseconds=i)).isoformat(),
+            "audit_ref": AUDIT_REF_JOB,
+            "input": body.model_dump(mode="python"),
+            "input_hash": input_hash(body),
+            "idempotency_key": f"{idempotency_key}:{i}" if idempotency_key else None,
+        })
+
+    results = await run_in_threadpool(create_jobs_dedup, recs, JOB_DEDUP_TTL_S if JOB_DEDUP else None)
+    created: list[str] = []
+    deduplicated: list[int] = []
+    for i, res in zip(indexes, results):
+        if isinstance(res, IdempotencyConflict):
+            errors.append({"index": i, "errors": [{"msg": str(res)}]})
+            continue
+        job_id, is_new = res
+        job_ids[i] = job_id
+        if is_new:
+            created.append(job_id)
+        else:
+            deduplicated.append(i)
+    errors.sort(key=lambda e: e["index"])
+    if created and JOB_EXECUTOR == "inline":
+        background.add_task(_run_inline_batch, created)
+    return {"job_ids": job_ids, "errors": errors, "deduplicated": deduplicated}
+
+
+def input_hash(body: JobCreate) -> str:
+    """Canonical hash of a submission: unset/None fields don't count, key order doesn't matter."""
+    return sha256_json(body.model_dump(mode="json", exclude_none=True))
+
+
+@app.get("/v0/stats/timings")
+def timing_stats() -> Dict[str, Any]:
+    """Rolling p50/p95/p99 (ms) per job stage and per board ("board.<name>") in this process."""
+    return {"window": latency_stats.window, "stages": latency_stats.snapshot()}
+
+
+@app.get("/v0/jobs")
+def list_jobs_route(
+    state: Optional[str] = Query(None, description="Exact job state, e.g. done"),
+    created_after: Optional[str] = Query(None, description="ISO timestamp, inclusive"),
+    created_before: Optional[str] = Query(None, description="ISO timestamp, exclusive"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,state,error"),
+) -> Dict[str, Any]:
+    try:
+        items, next_cursor = list_jobs(
+            state=state,
+            created_after=created_after,
+            created_before=created_before,
+            limit=limit,
+            cursor=cursor,
+            fields=_parse_fields(fields),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+
+async def _job_changes(job_id: str, wait_s: float, sub):
+    """
+    Yield the job's {state, error} whenever it changes, until it reaches a
+    terminal state or wait_s elapses; yields None on idle wake-ups. `sub` is a
+    job_hub subscription opened by the caller before the first read, so no
+    update is missed. In-process updates wake us through it; updates from
+    worker processes are picked up by re-reading every JOB_EVENTS_POLL_S.
+    Store reads run on the threadpool: they can wait on SQLite locks, the
+    write-behind queue or the archive.
+    """
+    deadline = time.monotonic() + wait_s
+    last: Any = None
+    while True:
+        snap = await run_in_threadpool(get_job, job_id, fields=["state", "error"])
+        if snap != last:
+            yield snap
+            last = snap
+        else:
+            yield None
+        if snap is None or snap["state"] in TERMINAL_STATES:
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        await sub.wait(min(JOB_EVENTS_POLL_S, remaining))
+
+
 @app.get("/v0/jobs/{job_id}")
-def read_job(job_id: str) -> Dict[str, Any]:
-    rec = get_job(job_id)
-    if not rec:
+async def read_job(
+    job_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. state,error"),
+    wait: float = Query(0, ge=0, le=120, description="Long-poll: seconds to wait for a terminal state"),
+) -> Response:
+    # Stored JSON is passed through as bytes: no parse/serialize round trip,
+    # and a ?fields=state poll never reads the large result columns.
+    try:
+        projection = _parse_fields(fields)
+        raw = await run_in_threadpool(get_job_raw, job_id, fields=projection)
+        if raw is not None and wait:
+            snap = await run_in_threadpool(get_job, job_id, fields=["state"])
+            if snap is None:  # removed (e.g. by retention) since the first read
+                raw = None
+            elif snap["state"] not in TERMINAL_STATES:
+                with job_hub.subscribe(job_id) as sub:
+                    async for _ in _job_changes(job_id, wait, sub):
+                        pass
+                raw = await run_in_threadpool(get_job_raw, job_id, fields=projection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TooManySubscribers as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if raw is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(content=raw, media_type="application/json")
+
+
+@app.get("/v0/jobs/{job_id}/events")
+async def job_events(
+    job_id: str,
+    request: Request,
+    wait: float = Query(600, gt=0, le=3600, description="Close the stream after this many seconds"),
+) -> StreamingResponse:
+    """Server-sent events: one `state` event per change, ending after done/error."""
+    if await run_in_threadpool(get_job, job_id, fields=["state"]) is None:
         raise HTTPException(status_code=404, detail="Not Found")
-    return rec
+    # Subscribe before the response starts so a full hub is a 503, not an empty 200 stream
+    subscription = ExitStack()
+    try:
+        sub = subscription.enter_context(job_hub.subscribe(job_id))
+    except TooManySubscribers as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def stream():
+        idle_since = time.monotonic()
+        try:
+            async for snap in _job_changes(job_id, wait, sub):
+                if await request.is_disconnected():
+                    return
+                if snap is not None:
+                    yield f"event: state\ndata: {json.dumps({'id': job_id, **snap})}\n\n"
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since >= 15:
+                    yield ": keepalive\n\n"  # keeps proxies from closing an idle stream
+                    idle_since = time.monotonic()
+        finally:
+            subscription.close()
+
+    # background: also release the subscription if the body is never iterated
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"},
+                             background=BackgroundTask(subscription.close))
 
 
 @app.get("/v0/exports/protocol_card")
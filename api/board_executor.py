@@ -0,0 +1,83 @@
+# api/board_executor.py — run independent board runners concurrently
+from __future__ import annotations
+
+import contextvars, logging, threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from config import BOARD_CONCURRENCY, BOARD_TIMEOUT_S
+
+log = logging.getLogger(__name__)
+
+# One process-wide pool: its size is the global limit on boards in flight,
+# no matter how many jobs are running at the same time.
+_POOL = ThreadPoolExecutor(max_workers=max(1, BOARD_CONCURRENCY), thread_name_prefix="board")
+
+
+@dataclass
+class BoardOutcome:
+    name: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    duration_ms: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Start:
+    """When a board began running on the pool (set by _timed, before fn runs)."""
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.t0 = 0.0
+
+
+def _timed(name: str, fn: Callable[[], Any], start: Optional[_Start] = None) -> BoardOutcome:
+    t0 = perf_counter()
+    if start is not None:
+        start.t0 = t0
+        start.event.set()
+    try:
+        value = fn()
+        return BoardOutcome(name, value=value, duration_ms=int((perf_counter() - t0) * 1000))
+    except Exception as e:
+        log.warning("board %s failed: %s", name, e)
+        return BoardOutcome(name, error=e, duration_ms=int((perf_counter() - t0) * 1000))
+
+
+def run_concurrently(
+    calls: Sequence[Tuple[str, Callable[[], Any]]],
+    timeout_s: Optional[float] = BOARD_TIMEOUT_S,
+) -> List[BoardOutcome]:
+    """
+    Run (name, fn) pairs on the shared board pool.
+    Outcomes come back in the order of `calls`; a failing or timed-out board
+    yields an outcome with `error` set and never affects its siblings.
+    A board's timeout counts from when it starts running, not from when it
+    was queued behind other jobs' boards. A timed-out board's thread is not
+    interrupted: it finishes in the background and its result is dropped.
+    """
+    futures = []
+    for name, fn in calls:
+        start = _Start()
+        # copy_context(): boards see the caller's contextvars (e.g. the job's audit span)
+        futures.append((name, start, _POOL.submit(contextvars.copy_context().run, _timed, name, fn, start)))
+    outcomes: List[BoardOutcome] = []
+    for name, start, fut in futures:
+        # queue wait on a busy pool does not count against the board
+        while not start.event.wait(0.1) and not fut.done():
+            pass
+        remaining = None if timeout_s is None else max(0.0, timeout_s - (perf_counter() - start.t0))
+        try:
+            outcomes.append(fut.result(timeout=remaining))
+        except CancelledError as e:  # pool shut down before the board started
+            outcomes.append(BoardOutcome(name, error=e))
+        except FutureTimeout:
+            log.warning("board %s timed out after %.1fs", name, timeout_s)
+            outcomes.append(BoardOutcome(name, error=TimeoutError(f"board {name} timed out"),
+                                         duration_ms=int((perf_counter() - start.t0) * 1000)))
+    return outcomes
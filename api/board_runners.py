@@ -1,14 +1,38 @@
 from __future__ import annotations
-from typing import Any, Dict
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
+from api.board_executor import run_concurrently
+from config import BOARD_BATCH
+from core.decomposer import select_boards
+from core.schemas.case_bundle import CaseBundle, FrozenCaseBundle
 from project_stack.pipelines import steps
 from med_stack.board.roles import neurology_ai, imaging_ai, genomics_ai, pharmaco_ai, env_ai
+from med_stack.board.batch import BATCHABLE, analyze_batch
 
-def _to_casebundle(payload: Dict[str, Any]):
-    """Build a CaseBundle once from raw input via the project pipeline."""
+BoardRunner = Callable[[CaseBundle], Dict[str, Any]]
+PayloadRunner = Callable[[Dict[str, Any]], Dict[str, Any]]  # see payload_runner
+
+def build_casebundle(payload: Dict[str, Any]) -> FrozenCaseBundle:
+    """Build the job's CaseBundle once from raw input; boards share it read-only."""
     cb = steps.ingest(payload)
     cb = steps.normalize(cb)
-    return cb
+    return FrozenCaseBundle.freeze(cb)
+
+def _to_casebundle(case: Any) -> CaseBundle:
+    """Accept a pre-built CaseBundle or, for old callers, a raw payload dict."""
+    if isinstance(case, CaseBundle):
+        return case
+    return build_casebundle(case)
+
+def payload_runner(fn: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Mark an old-style runner that takes the raw payload instead of a CaseBundle.
+    run_boards/run_selected pass such runners the payload; everything else
+    receives the shared bundle.
+    """
+    fn.takes_payload = True  # type: ignore[attr-defined]
+    return fn
 
 def _adapt(name: str, out: Any) -> Dict[str, Any]:
     """
@@ -43,39 +67,108 @@ def _adapt(name: str, out: Any) -> Dict[str, Any]:
         "metrics": {"ri_component": 0.0},  # RI contribution baseline for non-clinical boards
     }
 
-# --- Individual runners (payload -> CaseBundle -> board.analyze -> adapted dict) ---
+# --- Individual runners (CaseBundle -> board.analyze -> adapted dict; payloads still accepted) ---
 
-def run_neurology(payload: Dict[str, Any]) -> Dict[str, Any]:
-    cb = _to_casebundle(payload)
+def run_neurology(case: CaseBundle | Dict[str, Any]) -> Dict[str, Any]:
+    cb = _to_casebundle(case)
     out = neurology_ai.analyze(cb)  # returns canonical dict already
     return _adapt("clinical", out)  # expose under 'clinical' key for synthesis
 
-def run_imaging(payload: Dict[str, Any]) -> Dict[str, Any]:
-    cb = _to_casebundle(payload)
+def run_imaging(case: CaseBundle | Dict[str, Any]) -> Dict[str, Any]:
+    cb = _to_casebundle(case)
     out = imaging_ai.analyze(cb)
     return _adapt("imaging", out)
 
-def run_genomics(payload: Dict[str, Any]) -> Dict[str, Any]:
-    cb = _to_casebundle(payload)
+def run_genomics(case: CaseBundle | Dict[str, Any]) -> Dict[str, Any]:
+    cb = _to_casebundle(case)
     out = genomics_ai.analyze(cb)
     return _adapt("genomics", out)
 
-def run_pharmaco(payload: Dict[str, Any]) -> Dict[str, Any]:
-    cb = _to_casebundle(payload)
+def run_pharmaco(case: CaseBundle | Dict[str, Any]) -> Dict[str, Any]:
+    cb = _to_casebundle(case)
     out = pharmaco_ai.analyze(cb)
     return _adapt("pharmaco", out)
 
-def run_env(payload: Dict[str, Any]) -> Dict[str, Any]:
-    cb = _to_casebundle(payload)
+def run_env(case: CaseBundle | Dict[str, Any]) -> Dict[str, Any]:
+    cb = _to_casebundle(case)
     out = env_ai.analyze(cb)
     return _adapt("environment", out)
 
 # --- Registry consumed by api/hooks.run_boards (no stubs, all real boards wired) ---
+# Entries receive the job's shared, deep-frozen FrozenCaseBundle. A runner that
+# needs the raw payload dict (or mutates its input) must be wrapped in @payload_runner.
 
-BOARD_RUNNERS = {
+BOARD_RUNNERS: Dict[str, BoardRunner] = {
     "neurology": run_neurology,   # maps to clinical board in synthesis
     "imaging": run_imaging,
     "genomics": run_genomics,
     "pharmaco": run_pharmaco,
     "env": run_env,
 }
+
+# Canonical board names for the LLM boards (see _adapt)
+_ADAPTED_NAME = {"imaging": "imaging", "genomics": "genomics", "pharmaco": "pharmaco", "env": "environment"}
+_BUILTIN = dict(BOARD_RUNNERS)
+
+def _run_batch(targets: List[str], cb: CaseBundle) -> Dict[str, Any]:
+    """All batched LLM boards in one model call -> {target: adapted board dict}."""
+    return {t: _adapt(_ADAPTED_NAME[t], out) for t, out in analyze_batch(cb, targets, fallback=False).items()}
+
+def run_selected(
+    targets: List[str],
+    payload: Dict[str, Any],
+    batch: bool = BOARD_BATCH,
+    timings: Optional[Dict[str, int]] = None,
+    case: Optional[CaseBundle] = None,
+) -> Dict[str, Any]:
+    """
+    Build the CaseBundle once and run the given boards concurrently against it.
+    With batch=True (ALZ_BOARD_BATCH), two or more built-in LLM boards share a
+    single batched model call; boards the batched reply did not answer usably
+    are then run on their own, concurrently. Returns {target: board dict} in
+    target order; failed boards are omitted. If a `timings` dict is passed,
+    each board's duration in ms is recorded in it (failed boards included; the
+    shared batched call is recorded as "batch"). Pass `case` when the bundle
+    was already built from this payload.
+    """
+    runners = [(b, BOARD_RUNNERS[b]) for b in targets if b in BOARD_RUNNERS]
+    if not runners:
+        return {}
+    batched = [b for b, fn in runners if b in BATCHABLE and fn is _BUILTIN.get(b)] if batch else []
+    if len(batched) < 2:
+        batched = []
+    runners = [(b, fn) for b, fn in runners if b not in batched]
+
+    legacy = {b for b, fn in runners if getattr(fn, "takes_payload", False)}
+    calls: List[Tuple[str, Callable[[], Any]]] = [
+        (b, partial(cast(PayloadRunner, fn), payload)) for b, fn in runners if b in legacy]
+    if batched or len(legacy) < len(runners):  # only build the bundle if some board reads it
+        cb: CaseBundle = case if case is not None else build_casebundle(payload)
+        calls += [(b, partial(fn, cb)) for b, fn in runners if b not in legacy]
+        if batched:
+            calls.append(("__batch__", partial(_run_batch, batched, cb)))
+
+    done: Dict[str, Any] = {}
+
+    def _collect(calls) -> None:
+        for o in run_concurrently(calls):
+            if timings is not None:
+                timings["batch" if o.name == "__batch__" else o.name] = o.duration_ms
+            if not o.ok:
+                continue
+            if o.name == "__batch__":
+                done.update(o.value)
+            else:
+                done[o.name] = o.value
+
+    _collect(calls)
+    retry = [(b, partial(BOARD_RUNNERS[b], cb)) for b in batched if b not in done] if batched else []
+    if retry:  # second round from this thread: never nest pool work inside a pool task
+        _collect(retry)
+    return {b: done[b] for b in targets if b in done}
+
+def run_boards(payload: Dict[str, Any], timings: Optional[Dict[str, int]] = None,
+               case: Optional[CaseBundle] = None) -> Dict[str, Any]:
+    """Run the planner-selected boards for the job runner in api/app.py."""
+    targets, _evidence = select_boards(payload)
+    return run_selected(targets, payload, timings=timings, case=case)
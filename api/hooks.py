@@ -24,10 +24,13 @@ except Exception:  # pragma: no cover
 # BOARD_RUNNERS should be provided elsewhere in the codebase.
 # We import lazily and degrade gracefully if absent.
 try:
-    from api.board_runners import BOARD_RUNNERS  # type: ignore
+    from api.board_runners import BOARD_RUNNERS, run_selected  # type: ignore
 except Exception:  # pragma: no cover
     BOARD_RUNNERS = {}
 
+    def run_selected(targets, payload):  # type: ignore
+        return {}
+
 def run_boards(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Select boards, run them, compute consensus, and return a protocol card."""
     # 1) Select targets via planner (no extra fallback here)
@@ -39,16 +42,9 @@ def run_boards(payload: Dict[str, Any]) -> Dict[str, Any]:
     except Exception:
         targets = []
 
-    # 2) Execute selected boards
-    results = []
-    for b in targets:
-        fn = BOARD_RUNNERS.get(b)
-        if not fn:
-            continue
-        try:
-            results.append(fn(payload))
-        except Exception:
-            continue
+    # 2) Execute selected boards concurrently over one shared CaseBundle
+    #    (order preserved, failures dropped)
+    results = list(run_selected(targets, payload).values())
 
     # 3) Normalize results (dict or pydantic) and build boards_map
     norm_results = []
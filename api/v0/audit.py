@@ -1,25 +1,120 @@
-from fastapi import APIRouter, Query
-from typing import Optional, List, Dict
-from core.provenance.audit_sink import tail as file_tail
-import datetime
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Iterator, List, Optional, Tuple
+import base64, json
+from core.provenance.audit_index import _loads, event_ts, has_value, parse_ts
+from core.provenance.audit_sink import flush as flush_audit, store as audit_store
+from core.provenance.audit_sink import lookup as file_lookup, tail as file_tail
 
 router = APIRouter()
 
 @router.get("/audit/tail")
-def audit_tail(limit: int = Query(100, ge=1, le=1000), since: Optional[str] = None) -> List[Dict]:
-    events = file_tail(limit=5000)  # read a generous slice
+def audit_tail(
+    limit: int = Query(100, ge=1, le=1000),
+    since: Optional[str] = None,
+    subject: Optional[str] = None,
+) -> List[Dict]:
+    # Reads backwards from EOF; `since` (ISO time) and request-id/subject lookups
+    # go through the sparse sidecar index instead of scanning the file.
+    if subject:
+        return file_lookup("subject", subject, limit=limit)
     if since:
         try:
-            ts = datetime.datetime.fromisoformat(since.replace("Z", "+00:00")).isoformat().replace("+00:00", "Z")
-            events = [e for e in events if e.get("ts") and e["ts"] >= ts]
-        except Exception:
+            ts = parse_ts(since)
+        except ValueError:
             # if not a timestamp, treat "since" as a request_id
-            events = [e for e in events if e.get("request_id") == since]
-    return events[-limit:]
-# --- quick test endpoint to generate one audit event ---
-from core.bus.events import emit_event
-
-@router.post("/audit/test")
-def audit_test():
-    emit_event(who="diagnostic", action="ping", subject="audit")
-    return {"ok": True}
+            return file_lookup("request_id", since, limit=limit)
+        return file_tail(limit=limit, since=ts)
+    return file_tail(limit=limit)
+
+# --- streaming query ---
+_QUERY_FIELDS = ("who", "action", "subject", "request_id")
+_BATCH = 500  # lines read per threadpool hop; the disconnect check runs between batches
+
+def _encode_cursor(pos: Tuple[str, int]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(pos)).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        sid, off = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(sid), int(off)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+def _matching(filters: Dict[str, str], since: Optional[float], until: Optional[float],
+              cursor: Optional[Tuple[str, int]]) -> Iterator[Tuple[Tuple[str, int], Optional[bytes]]]:
+    """(position, line-or-None) for every scanned line; line is set only when it matches."""
+    # Cheap substring prefilter before parsing. Only for ASCII values: non-ASCII text may be
+    # stored raw (write_line) or \u-escaped (older writers), and the parsed check decides anyway.
+    needles = [json.dumps(v).encode() for v in filters.values() if v.isascii()]
+    for pos, line in audit_store().scan(cursor, since=since, until=until):
+        if not all(n in line for n in needles):
+            yield pos, None
+            continue
+        ev = _loads(line)
+        ok = ev is not None and all(has_value(ev, k, v) for k, v in filters.items())
+        if ok and ev is not None and (since is not None or until is not None):
+            ts = event_ts(ev)
+            ok = ts is None or ((since is None or ts >= since) and (until is None or ts < until))
+        yield pos, (line if ok else None)
+
+@router.get("/audit/query")
+async def audit_query(
+    request: Request,
+    who: Optional[str] = None,
+    action: Optional[str] = None,
+    subject: Optional[str] = None,
+    request_id: Optional[str] = None,
+    since: Optional[str] = Query(None, description="ISO time, inclusive"),
+    until: Optional[str] = Query(None, description="ISO time, exclusive"),
+    limit: int = Query(10000, ge=1, le=1_000_000),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous response"),
+) -> StreamingResponse:
+    """
+    Matching events as NDJSON, oldest first, streamed straight from the audit
+    segments. The last line is always {"next_cursor": ...}; pass it back to
+    continue after the last event scanned (also picks up events written later).
+    """
+    params = {"who": who, "action": action, "subject": subject, "request_id": request_id}
+    filters = {k: v for k, v in params.items() if v is not None}
+    try:
+        t0 = parse_ts(since) if since else None
+        t1 = parse_ts(until) if until else None
+        pos = _decode_cursor(cursor) if cursor else None
+        await run_in_threadpool(flush_audit)
+        it = _matching(filters, t0, t1, pos)
+        first = await run_in_threadpool(next, it, None)  # surfaces an unknown cursor as a 400
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def _next_batch() -> List[Tuple[Tuple[str, int], Optional[bytes]]]:
+        out = []
+        for item in it:
+            out.append(item)
+            if len(out) >= _BATCH:
+                break
+        return out
+
+    async def stream():
+        nonlocal pos
+        sent = 0
+        batch = [first] if first else []
+        while batch:
+            chunk = []
+            for p, line in batch:
+                pos = p
+                if line is not None:
+                    chunk.append(line)
+                    sent += 1
+                    if sent >= limit:
+                        break
+            if chunk:
+                yield b"".join(chunk)
+            if sent >= limit or await request.is_disconnected():
+                break
+            batch = await run_in_threadpool(_next_batch)
+        it.close()
+        yield json.dumps({"next_cursor": _encode_cursor(pos) if pos else cursor}).encode() + b"\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
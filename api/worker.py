@@ -0,0 +1,100 @@
+# api/worker.py — worker pool that drains the durable job queue
+"""
+Run jobs out of the `jobs` table instead of the API process.
+
+    ALZ_JOB_EXECUTOR=queue uvicorn api.app:app
+    python -m api.worker --workers 4
+
+Each worker process claims one queued job at a time under a lease and keeps
+the lease alive while the pipeline runs. If a worker dies, its lease expires
+and another worker re-claims the job (up to ALZ_JOB_MAX_ATTEMPTS).
+"""
+from __future__ import annotations
+
+import argparse, logging, multiprocessing as mp, os, signal, socket, threading
+from typing import Any, Optional
+
+from config import JOB_LEASE_S, JOB_POLL_S, JOB_WORKERS
+
+log = logging.getLogger(__name__)
+
+
+class LeaseHeartbeat(threading.Thread):
+    """Renews a job lease every lease_s/3 until stopped (also used by the API's inline executor)."""
+
+    def __init__(self, job_id: str, worker_id: str, lease_s: float) -> None:
+        super().__init__(daemon=True, name=f"lease-{job_id[:8]}")
+        self.job_id, self.worker_id, self.lease_s = job_id, worker_id, lease_s
+        self._stop_evt = threading.Event()
+
+    def run(self) -> None:
+        from core.store.jobs import renew_lease
+        while not self._stop_evt.wait(self.lease_s / 3):
+            if not renew_lease(self.job_id, self.worker_id, self.lease_s):
+                log.warning("lease lost for job %s", self.job_id)
+                return
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop_evt.set()
+
+
+def work_loop(worker_id: str, stop: Any, poll_s: float = JOB_POLL_S, lease_s: float = JOB_LEASE_S,
+              max_jobs: Optional[int] = None) -> int:
+    """Claim and process jobs until `stop` is set (or max_jobs processed). Returns jobs processed."""
+    # Imported here so the parent process never opens the DB before forking.
+    from api.app import _process_job
+    from core.store.jobs import claim_job
+
+    done = 0
+    while not stop.is_set() and (max_jobs is None or done < max_jobs):
+        job = claim_job(worker_id, lease_s=lease_s)
+        if not job:
+            stop.wait(poll_s)
+            continue
+        with LeaseHeartbeat(job["id"], worker_id, lease_s):
+            _process_job(job["id"], job["input"])
+        done += 1
+    return done
+
+
+def _worker_main(index: int, stop: Any, poll_s: float, lease_s: float) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # parent coordinates shutdown
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    log.info("worker %s started", worker_id)
+    work_loop(worker_id, stop, poll_s=poll_s, lease_s=lease_s)
+    log.info("worker %s stopped", worker_id)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Alz Platform job worker pool")
+    ap.add_argument("--workers", type=int, default=JOB_WORKERS, help="number of worker processes")
+    ap.add_argument("--poll", type=float, default=JOB_POLL_S, help="idle poll interval (s)")
+    ap.add_argument("--lease", type=float, default=JOB_LEASE_S, help="job lease duration (s)")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    stop = mp.Event()
+    procs = [
+        mp.Process(target=_worker_main, args=(i, stop, args.poll, args.lease), name=f"alz-worker-{i}")
+        for i in range(max(1, args.workers))
+    ]
+    for p in procs:
+        p.start()
+
+    def _shutdown(signum, _frame):
+        log.info("signal %s: finishing in-flight jobs", signum)
+        stop.set()
+
+    signal.signal(signal.SIGINT, _shutdown)
+    signal.signal(signal.SIGTERM, _shutdown)
+    for p in procs:
+        p.join()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
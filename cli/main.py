@@ -12,4 +12,25 @@ def run_case(case_json):
     vals = load_all_validators()
     results = asyncio.run(run_all(vals, cb))
     print("Validation results:", [r.__dict__ for r in results])
+@cli.command("compact-jobs")
+@click.option("--batch-size", default=500, show_default=True, help="rows per transaction")
+@click.option("--no-vacuum", is_flag=True, help="skip the final VACUUM")
+def compact_jobs_cmd(batch_size, no_vacuum):
+    """Re-encode legacy JSON text columns in the jobs DB with ALZ_JOB_CODEC."""
+    from core.store.compact import compact_jobs
+    stats = compact_jobs(batch_size=batch_size, vacuum=not no_vacuum)
+    print("Compaction:", stats)
+@cli.command("archive-jobs")
+@click.option("--policy", default=None, help='e.g. "done=30,error=7" (defaults to ALZ_JOB_RETENTION)')
+@click.option("--batch-size", default=200, show_default=True, help="rows per transaction")
+@click.option("--vacuum-pages", default=0, help="incremental_vacuum pages afterwards (0 = all)")
+@click.option("--enable-incremental-vacuum", is_flag=True, help="one-time full VACUUM to switch an existing DB over")
+def archive_jobs_cmd(policy, batch_size, vacuum_pages, enable_incremental_vacuum):
+    """Archive old terminal jobs to var/archive and leave tombstones in the jobs DB."""
+    from core.store import retention
+    if enable_incremental_vacuum and retention.enable_incremental_vacuum():
+        print("Converted jobs DB to auto_vacuum=INCREMENTAL")
+    stats = retention.archive_jobs(None if policy is None else retention.parse_policy(policy), batch_size=batch_size)
+    stats["free_pages"] = retention.vacuum_step(vacuum_pages)
+    print("Archive:", stats)
 if __name__ == "__main__": cli()
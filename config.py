@@ -18,4 +18,67 @@ for p in (VAR_DIR, DATA_DIR, INPUT_DIR, OUTPUT_DIR, LOG_DIR):
 API_HOST = os.getenv("ALZ_API_HOST", "127.0.0.1")
 API_PORT = int(os.getenv("ALZ_API_PORT", "8000"))
 
-AUDIT_REF = str(LOG_DIR / "audit.ndjson")
+# One audit trail: the active file every writer appends to; closed segments live next to it
+AUDIT_FILE = Path(os.getenv("ALZ_AUDIT_FILE", BASE_DIR / "logs" / "audit.ndjson"))
+AUDIT_REF = str(AUDIT_FILE)
+# Pre-segment audit log (the old AUDIT_REF); imported once as the oldest segment, 000000
+AUDIT_LEGACY_FILE = Path(os.getenv("ALZ_AUDIT_LEGACY_FILE", LOG_DIR / "audit.ndjson"))
+
+# Job execution: "inline" runs jobs in the API process (dev/tests);
+# "queue" only enqueues and leaves execution to `python -m api.worker`.
+JOB_EXECUTOR = os.getenv("ALZ_JOB_EXECUTOR", "inline").lower()
+JOB_WORKERS = int(os.getenv("ALZ_JOB_WORKERS", "2"))
+JOB_LEASE_S = float(os.getenv("ALZ_JOB_LEASE_S", "300"))
+JOB_POLL_S = float(os.getenv("ALZ_JOB_POLL_S", "0.5"))
+JOB_MAX_ATTEMPTS = int(os.getenv("ALZ_JOB_MAX_ATTEMPTS", "3"))
+
+# Boards: global cap on board runners executing at once (across all jobs in a process)
+BOARD_CONCURRENCY = int(os.getenv("ALZ_BOARD_CONCURRENCY", "8"))
+BOARD_TIMEOUT_S = float(os.getenv("ALZ_BOARD_TIMEOUT_S", "120"))
+# Opt-in: ask all selected LLM boards of a job in one batched model call
+BOARD_BATCH = os.getenv("ALZ_BOARD_BATCH", "0").lower() in ("1", "true", "yes")
+
+# SQLite job store tuning (WAL mode; one writer thread per process)
+SQLITE_SYNCHRONOUS = os.getenv("ALZ_SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("ALZ_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_WRITE_QUEUE = int(os.getenv("ALZ_SQLITE_WRITE_QUEUE", "10000"))
+# Opt-in write-behind for update_job: coalesce per job id, commit in batches
+JOB_WRITE_BEHIND = os.getenv("ALZ_JOB_WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+JOB_FLUSH_MS = float(os.getenv("ALZ_JOB_FLUSH_MS", "5"))
+JOB_FLUSH_MAX = int(os.getenv("ALZ_JOB_FLUSH_MAX", "256"))
+# Encoding for JSON columns in the jobs table: zlib | zstd | json (plain text, legacy)
+JOB_CODEC = os.getenv("ALZ_JOB_CODEC", "zlib").lower()
+# Opt-in dedup: identical payloads within the TTL return the existing job (Idempotency-Key is always honored)
+JOB_DEDUP = os.getenv("ALZ_JOB_DEDUP", "0").lower() in ("1", "true", "yes")
+JOB_DEDUP_TTL_S = float(os.getenv("ALZ_JOB_DEDUP_TTL_S", "86400"))
+# Retention: "<state>=<days>,..." for terminal states, e.g. "done=30,error=7"; empty keeps every job in the hot table
+JOB_RETENTION = os.getenv("ALZ_JOB_RETENTION", "")
+JOB_ARCHIVE_DIR = Path(os.getenv("ALZ_JOB_ARCHIVE_DIR", VAR_DIR / "archive" / "jobs"))
+JOB_RETENTION_INTERVAL_S = float(os.getenv("ALZ_JOB_RETENTION_INTERVAL_S", "3600"))
+JOB_VACUUM_PAGES = int(os.getenv("ALZ_JOB_VACUUM_PAGES", "2000"))
+# Job change notifications (SSE / long-poll): subscriber cap, and DB re-check interval for updates made by other processes
+JOB_EVENTS_MAX_SUBSCRIBERS = int(os.getenv("ALZ_JOB_EVENTS_MAX_SUBSCRIBERS", "1000"))
+JOB_EVENTS_POLL_S = float(os.getenv("ALZ_JOB_EVENTS_POLL_S", "1.0"))
+# Max items accepted by one POST /v0/jobs:batch
+JOB_BATCH_MAX = int(os.getenv("ALZ_JOB_BATCH_MAX", "5000"))
+# Rolling window (samples per stage) behind the p50/p95/p99 timing stats
+TIMING_WINDOW = int(os.getenv("ALZ_TIMING_WINDOW", "1024"))
+# Audit log writer: events are queued and appended by a background thread in batches
+AUDIT_QUEUE_MAX = int(os.getenv("ALZ_AUDIT_QUEUE_MAX", "10000"))   # events beyond this are dropped (and counted)
+AUDIT_BATCH_MAX = int(os.getenv("ALZ_AUDIT_BATCH_MAX", "512"))
+AUDIT_FSYNC = os.getenv("ALZ_AUDIT_FSYNC", "interval").lower()      # none | interval | every-batch
+AUDIT_FSYNC_INTERVAL_S = float(os.getenv("ALZ_AUDIT_FSYNC_INTERVAL_S", "1.0"))
+# Sparse audit index (<audit file>.idx): one time entry per bucket, one key entry per request_id/subject per bucket
+AUDIT_INDEX_BUCKET_S = int(os.getenv("ALZ_AUDIT_INDEX_BUCKET_S", "60"))
+# Audit rotation: close the active file past this size or age (0 disables either); closed
+# segments are stored as independently decompressible gzip blocks of ~AUDIT_BLOCK_BYTES
+AUDIT_ROTATE_BYTES = int(os.getenv("ALZ_AUDIT_ROTATE_BYTES", str(64 * 1024 * 1024)))
+AUDIT_ROTATE_S = float(os.getenv("ALZ_AUDIT_ROTATE_S", "86400"))
+AUDIT_BLOCK_BYTES = int(os.getenv("ALZ_AUDIT_BLOCK_BYTES", str(256 * 1024)))
+# Job-scoped audit spans: audit() calls made while a job runs are buffered and written as one
+# "job.span" record at the end. Verbosity: full (every event) | summary (AUDIT_SUMMARIZE events
+# become counts) | minimal (counts only). AUDIT_SUMMARIZE lists "<who>.<action>" keys.
+AUDIT_SPANS = os.getenv("ALZ_AUDIT_SPANS", "1").lower() in ("1", "true", "yes")
+AUDIT_VERBOSITY = os.getenv("ALZ_AUDIT_VERBOSITY", "summary").lower()
+AUDIT_SUMMARIZE = os.getenv("ALZ_AUDIT_SUMMARIZE", "validator.start,validator.done")
+AUDIT_SPAN_MAX_EVENTS = int(os.getenv("ALZ_AUDIT_SPAN_MAX_EVENTS", "500"))
@@ -1,3 +1,5 @@
+from typing import Any, Dict
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -7,5 +9,33 @@ class Settings(BaseSettings):
     anthropic_api_key: str | None = Field(default=None, alias="ANTHROPIC_API_KEY")
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
     alz_db_path: str = Field(default="data/app.db", alias="ALZ_DB_PATH")
+    # Provider circuit breaker: consecutive transient failures before a provider is
+    # skipped, and how long it stays skipped before a single half-open probe.
+    provider_failure_threshold: int = Field(default=3, alias="ALZ_PROVIDER_FAILURE_THRESHOLD")
+    provider_cooldown_s: float = Field(default=30.0, alias="ALZ_PROVIDER_COOLDOWN_S")
+    # Shared keep-alive HTTP pools used by every LLM provider client.
+    llm_pool_max_connections: int = Field(default=20, alias="ALZ_LLM_POOL_MAX_CONNECTIONS")
+    llm_pool_max_keepalive: int = Field(default=10, alias="ALZ_LLM_POOL_MAX_KEEPALIVE")
+    llm_keepalive_expiry_s: float = Field(default=60.0, alias="ALZ_LLM_KEEPALIVE_EXPIRY_S")
+    llm_timeout_s: float = Field(default=60.0, alias="ALZ_LLM_TIMEOUT_S")
+    llm_connect_timeout_s: float = Field(default=5.0, alias="ALZ_LLM_CONNECT_TIMEOUT_S")
+    # Optional response cache for ModelRunner.chat_json (memory LRU + SQLite under var/).
+    model_cache_enabled: bool = Field(default=False, alias="ALZ_MODEL_CACHE")
+    model_cache_ttl_s: float = Field(default=7 * 24 * 3600.0, alias="ALZ_MODEL_CACHE_TTL_S")
+    model_cache_memory_entries: int = Field(default=1024, alias="ALZ_MODEL_CACHE_MEMORY_ENTRIES")
+    model_cache_disk_entries: int = Field(default=100_000, alias="ALZ_MODEL_CACHE_DISK_ENTRIES")
+    model_cache_path: str | None = Field(default=None, alias="ALZ_MODEL_CACHE_PATH")
+    # Identical concurrent chat_json calls share one upstream call; followers give up
+    # waiting after this many seconds and make their own call.
+    model_coalesce_enabled: bool = Field(default=True, alias="ALZ_MODEL_COALESCE")
+    model_coalesce_wait_s: float = Field(default=120.0, alias="ALZ_MODEL_COALESCE_WAIT_S")
+    # Upstream admission control per provider/model: max concurrent calls plus token
+    # buckets for requests/sec and tokens/min (0 = unlimited). ALZ_LLM_LIMITS overrides
+    # per "provider:model" (or "provider"), e.g.
+    #   {"openai:gpt-4o-mini": {"max_concurrency": 4, "requests_per_s": 5, "tokens_per_min": 200000}}
+    llm_max_concurrency: int = Field(default=8, alias="ALZ_LLM_MAX_CONCURRENCY")
+    llm_requests_per_s: float = Field(default=0.0, alias="ALZ_LLM_REQUESTS_PER_S")
+    llm_tokens_per_min: int = Field(default=0, alias="ALZ_LLM_TOKENS_PER_MIN")
+    llm_limits: Dict[str, Dict[str, Any]] = Field(default_factory=dict, alias="ALZ_LLM_LIMITS")
 
 settings = Settings()
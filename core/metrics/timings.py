@@ -0,0 +1,89 @@
+# core/metrics/timings.py — per-stage job timings and rolling latency percentiles
+from __future__ import annotations
+
+import math, threading
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from config import TIMING_WINDOW
+
+
+class StageTimer:
+    """
+    Collects durations (ms) for one job: top-level stages plus one entry per
+    board. to_dict() is what gets stored in the job's `timings` column.
+
+        t = StageTimer()
+        with t.span("consensus"):
+            ...
+        t.to_dict()  # {"stages": {"consensus": 12}, "boards": {}, "total_ms": 12}
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, int] = {}
+        self.boards: Dict[str, int] = {}
+        self._t0 = perf_counter()
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage] = int((perf_counter() - t0) * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"stages": dict(self.stages), "boards": dict(self.boards),
+                "total_ms": int((perf_counter() - self._t0) * 1000)}
+
+    def observe(self, stats: Optional["LatencyStats"] = None) -> None:
+        """Feed this job's numbers into the rolling percentiles."""
+        stats = stats or latency
+        for stage, ms in self.stages.items():
+            stats.observe(stage, ms)
+        for board, ms in self.boards.items():
+            stats.observe(f"board.{board}", ms)
+        stats.observe("job", self.to_dict()["total_ms"])
+
+
+def _percentile(ordered: list, q: float) -> int:
+    # nearest-rank on an already sorted window
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class LatencyStats:
+    """Last `window` samples per stage; percentiles are computed when asked for."""
+
+    def __init__(self, window: int = TIMING_WINDOW) -> None:
+        self.window = max(1, window)
+        self._samples: Dict[str, Deque[int]] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, ms: int) -> None:
+        with self._lock:
+            buf = self._samples.get(stage)
+            if buf is None:
+                buf = self._samples[stage] = deque(maxlen=self.window)
+            buf.append(ms)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            windows = {k: sorted(v) for k, v in self._samples.items()}
+            counts = dict(self._counts)
+        return {
+            stage: {"count": counts[stage], "window": len(w), "p50": _percentile(w, 0.50),
+                    "p95": _percentile(w, 0.95), "p99": _percentile(w, 0.99), "max": w[-1]}
+            for stage, w in sorted(windows.items())
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+latency = LatencyStats()
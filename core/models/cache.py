@@ -0,0 +1,147 @@
+# core/models/cache.py — content-addressed cache of model responses
+from __future__ import annotations
+
+import hashlib, json, sqlite3, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from core.config.settings import settings
+
+
+def make_key(provider: str, model: str | None, temperature: float | None, system: str, prompt: str) -> str:
+    data = json.dumps([provider, model, temperature, system, prompt], separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two tiers: an in-memory LRU in front of an on-disk SQLite table.
+    Entries expire after ttl_s; each tier is capped by entry count
+    (least recently used goes first). Values are raw provider text.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl_s: float = 7 * 24 * 3600.0,
+        max_memory: int = 1024,
+        max_disk: int = 100_000,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._counters: Dict[str, int] = {"hits_memory": 0, "hits_disk": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+              key TEXT PRIMARY KEY,
+              value TEXT NOT NULL,
+              created_at REAL NOT NULL,
+              accessed_at REAL NOT NULL
+            )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed ON responses(accessed_at)")
+            self._db.commit()
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[str]:
+        """Cached value or None. count_miss=False leaves the miss to the caller (see record_miss)."""
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                created, value = hit
+                if now - created < self.ttl_s:
+                    self._mem.move_to_end(key)
+                    self._counters["hits_memory"] += 1
+                    return value
+                del self._mem[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created_at FROM responses WHERE key=?", (key,)).fetchone()
+                if row is not None:
+                    value, created = row
+                    if now - created < self.ttl_s:
+                        self._db.execute("UPDATE responses SET accessed_at=? WHERE key=?", (now, key))
+                        self._db.commit()
+                        self._remember(key, created, value)
+                        self._counters["hits_disk"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key=?", (key,))
+                    self._db.commit()
+            if count_miss:
+                self._counters["misses"] += 1
+            return None
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self._counters["misses"] += 1
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._counters["writes"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                if self._counters["writes"] % 64 == 0:  # amortize the COUNT(*) scan
+                    self._evict_disk(now)
+                self._db.commit()
+
+    def _remember(self, key: str, created: float, value: str) -> None:
+        self._mem[key] = (created, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_memory:
+            self._mem.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _evict_disk(self, now: float) -> None:
+        assert self._db is not None
+        cur = self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_s,))
+        self._counters["evictions"] += max(cur.rowcount, 0)
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_disk:
+            cur = self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_disk,),
+            )
+            self._counters["evictions"] += max(cur.rowcount, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "memory_entries": len(self._mem)}
+
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """The process-wide cache, or None unless ALZ_MODEL_CACHE is enabled."""
+    global _CACHE
+    if not settings.model_cache_enabled:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            from config import VAR_DIR
+            _CACHE = ResponseCache(
+                path=Path(settings.model_cache_path or VAR_DIR / "model_cache.db"),
+                ttl_s=settings.model_cache_ttl_s,
+                max_memory=settings.model_cache_memory_entries,
+                max_disk=settings.model_cache_disk_entries,
+            )
+        return _CACHE
@@ -0,0 +1,158 @@
+# core/models/clients.py — process-wide, long-lived LLM HTTP clients
+from __future__ import annotations
+
+import asyncio, threading, weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+from core.config.settings import settings
+
+try:
+    import openai
+except Exception:
+    openai = None
+try:
+    import anthropic
+except Exception:
+    anthropic = None
+
+
+class ProviderClients:
+    """
+    Holds one keep-alive connection pool per provider so boards reuse TLS
+    connections instead of building a new client on every call.
+    Clients are created lazily and rebuilt on demand after close().
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry_s: float = 60.0,
+        timeout_s: float = 60.0,
+        connect_timeout_s: float = 5.0,
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry_s,
+        )
+        self.timeout = httpx.Timeout(timeout_s, connect=connect_timeout_s)
+        self._lock = threading.RLock()
+        self._http: Dict[str, httpx.Client] = {}
+        self._sdk: Dict[str, Any] = {}
+        # Async clients are bound to the event loop that created them.
+        self._ahttp: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+    def http(self, name: str = "default") -> httpx.Client:
+        """A pooled httpx.Client; one pool per name (provider)."""
+        with self._lock:
+            c = self._http.get(name)
+            if c is None or c.is_closed:
+                c = self._http[name] = httpx.Client(limits=self.limits, timeout=self.timeout)
+            return c
+
+    def openai(self, api_key: str) -> Optional[Any]:
+        if openai is None:
+            return None
+        return self._sdk_client("openai", lambda: openai.OpenAI(
+            api_key=api_key, timeout=self.timeout, http_client=self.http("openai")))
+
+    def anthropic(self, api_key: str) -> Optional[Any]:
+        if anthropic is None:
+            return None
+        return self._sdk_client("anthropic", lambda: anthropic.Anthropic(
+            api_key=api_key, timeout=self.timeout, http_client=self.http("anthropic")))
+
+    def _sdk_client(self, name: str, factory: Any) -> Any:
+        with self._lock:  # re-entrant: factory() calls self.http()
+            c = self._sdk.get(name)
+            pool = self._http.get(name)
+            if c is None or pool is None or pool.is_closed:
+                c = self._sdk[name] = factory()
+            return c
+
+    # ---------------- async (per event loop) ----------------
+    def _loop_clients(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            return self._ahttp.setdefault(loop, {})
+
+    def ahttp(self, name: str = "default") -> httpx.AsyncClient:
+        clients = self._loop_clients()
+        with self._lock:
+            c = clients.get(f"http:{name}")
+            if c is None or c.is_closed:
+                c = clients[f"http:{name}"] = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            return c
+
+    def aopenai(self, api_key: str) -> Optional[Any]:
+        if openai is None:
+            return None
+        return self._asdk_client("openai", lambda: openai.AsyncOpenAI(
+            api_key=api_key, timeout=self.timeout, http_client=self.ahttp("openai")))
+
+    def aanthropic(self, api_key: str) -> Optional[Any]:
+        if anthropic is None:
+            return None
+        return self._asdk_client("anthropic", lambda: anthropic.AsyncAnthropic(
+            api_key=api_key, timeout=self.timeout, http_client=self.ahttp("anthropic")))
+
+    def _asdk_client(self, name: str, factory: Any) -> Any:
+        clients = self._loop_clients()
+        with self._lock:
+            c = clients.get(f"sdk:{name}")
+            pool = clients.get(f"http:{name}")
+            if c is None or pool is None or pool.is_closed:
+                c = clients[f"sdk:{name}"] = factory()
+            return c
+
+    async def aclose(self) -> None:
+        """Close the async pools owned by the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._ahttp.pop(loop, {})
+        for key, c in clients.items():
+            if key.startswith("http:"):
+                await c.aclose()
+
+    def close(self) -> None:
+        """Close every sync pool (app shutdown). Later calls transparently reopen."""
+        with self._lock:
+            pools, self._http, self._sdk = list(self._http.values()), {}, {}
+        for c in pools:
+            c.close()
+
+
+_CLIENTS: Optional[ProviderClients] = None
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_clients() -> ProviderClients:
+    global _CLIENTS
+    with _CLIENTS_LOCK:
+        if _CLIENTS is None:
+            _CLIENTS = ProviderClients(
+                max_connections=settings.llm_pool_max_connections,
+                max_keepalive=settings.llm_pool_max_keepalive,
+                keepalive_expiry_s=settings.llm_keepalive_expiry_s,
+                timeout_s=settings.llm_timeout_s,
+                connect_timeout_s=settings.llm_connect_timeout_s,
+            )
+        return _CLIENTS
+
+
+def close_clients() -> None:
+    with _CLIENTS_LOCK:
+        c = _CLIENTS
+    if c is not None:
+        c.close()
+
+
+async def aclose_clients() -> None:
+    with _CLIENTS_LOCK:
+        c = _CLIENTS
+    if c is not None:
+        await c.aclose()
+        c.close()
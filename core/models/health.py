@@ -0,0 +1,114 @@
+# core/models/health.py — per-provider health registry (fail fast, circuit breaker)
+from __future__ import annotations
+
+import threading, time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from core.config.settings import settings
+
+# Provider states:
+#   closed    - healthy, calls go through
+#   open      - too many transient failures; skipped until the cooldown elapses
+#   half_open - cooldown elapsed; exactly one probe call is let through
+#   disabled  - permanently unusable (missing key/SDK, bad credentials); always skipped
+CLOSED, OPEN, HALF_OPEN, DISABLED = "closed", "open", "half_open", "disabled"
+
+
+class ProviderMisconfigured(RuntimeError):
+    """Raised by a provider that cannot work on this host (no key, SDK not installed)."""
+
+
+_PERMANENT_STATUS = {401, 403, 404}
+
+
+def is_permanent(err: BaseException) -> bool:
+    """Misconfiguration and auth errors will not fix themselves by retrying."""
+    if isinstance(err, (ProviderMisconfigured, ImportError)):
+        return True
+    status = getattr(err, "status_code", None)
+    if status is None:
+        status = getattr(getattr(err, "response", None), "status_code", None)
+    return status in _PERMANENT_STATUS
+
+
+def is_transient(err: BaseException) -> bool:
+    return not is_permanent(err)
+
+
+@dataclass
+class _Health:
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    probing: bool = False
+    last_error: Optional[str] = None
+
+
+class ProviderHealthRegistry:
+    def __init__(self, failure_threshold: int = 3, cooldown_s: float = 30.0) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_s = cooldown_s
+        self._lock = threading.Lock()
+        self._health: Dict[str, _Health] = {}
+
+    def _get(self, name: str) -> _Health:
+        return self._health.setdefault(name, _Health())
+
+    def allow(self, name: str) -> bool:
+        """True if a call to this provider should be attempted now."""
+        with self._lock:
+            h = self._get(name)
+            if h.state == CLOSED:
+                return True
+            if h.state == DISABLED:
+                return False
+            if h.state == OPEN and time.monotonic() - h.opened_at >= self.cooldown_s:
+                h.state = HALF_OPEN
+            if h.state == HALF_OPEN and not h.probing:
+                h.probing = True
+                return True
+            return False
+
+    def record_success(self, name: str) -> None:
+        with self._lock:
+            h = self._get(name)
+            if h.state != DISABLED:
+                self._health[name] = _Health()
+
+    def record_failure(self, name: str, err: BaseException) -> None:
+        with self._lock:
+            h = self._get(name)
+            h.last_error = f"{type(err).__name__}: {err}"
+            h.probing = False
+            if is_permanent(err):
+                h.state = DISABLED
+                return
+            h.failures += 1
+            if h.state == HALF_OPEN or h.failures >= self.failure_threshold:
+                h.state = OPEN
+                h.opened_at = time.monotonic()
+
+    def state(self, name: str) -> str:
+        with self._lock:
+            return self._get(name).state
+
+    def reset(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._health.clear()
+            else:
+                self._health.pop(name, None)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                n: {"state": h.state, "failures": h.failures, "last_error": h.last_error}
+                for n, h in self._health.items()
+            }
+
+
+registry = ProviderHealthRegistry(
+    failure_threshold=settings.provider_failure_threshold,
+    cooldown_s=settings.provider_cooldown_s,
+)
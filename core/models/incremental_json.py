@@ -0,0 +1,93 @@
+# core/models/incremental_json.py — parse a JSON reply while it streams in
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+
+class IncrementalJSONParser:
+    """
+    Feed model output chunk by chunk. Text before the first '{' or '[' (prose,
+    code fences) is skipped; feed() returns True as soon as that top-level
+    value closes and parses, so the caller can stop the stream. A balanced
+    span that does not parse ("see [1, 2 above]") is treated as prose and
+    scanning goes on. Anything after the value is kept in `tail` and
+    otherwise ignored.
+
+        p = IncrementalJSONParser()
+        for tok in stream:
+            if p.feed(tok):
+                break
+        p.result  # parsed dict/list, or None if the value never completed
+    """
+
+    def __init__(self) -> None:
+        self._buf: list[str] = []
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.tail = ""
+        self.skipped = ""
+
+    def feed(self, chunk: str) -> bool:
+        if self.done:
+            self.tail += chunk
+            return True
+        while chunk:
+            chunk = self._scan(chunk)
+        return self.done
+
+    def _scan(self, chunk: str) -> str:
+        """Consume chunk; returns text still to scan after a candidate that was not JSON."""
+        for i, ch in enumerate(chunk):
+            if self._depth == 0:
+                if ch in "{[":
+                    self._depth = 1
+                    self._buf.append(ch)
+                else:
+                    self.skipped += ch
+                continue
+            self._buf.append(ch)
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = "".join(self._buf)
+                    if self._finish(candidate):
+                        self.tail = chunk[i + 1:]
+                        return ""
+                    # Balanced but not JSON (prose like "see [ref 1]"): the opener was
+                    # text after all; rescan from the character after it.
+                    self.skipped += candidate[0]
+                    self._buf = []
+                    self._in_str = self._esc = False
+                    return candidate[1:] + chunk[i + 1:]
+        return ""
+
+    def _finish(self, text: str) -> bool:
+        try:
+            self.result = json.loads(text)
+        except ValueError as e:
+            self.error = str(e)
+            return False
+        self.done = True
+        self.error = None
+        return True
+
+    @property
+    def text(self) -> str:
+        """Everything consumed so far (preamble + JSON), for coerce_json fallbacks."""
+        return self.skipped + "".join(self._buf)
@@ -1,55 +1,176 @@
 from __future__ import annotations
-import json, re
-from tenacity import retry, stop_after_attempt, wait_exponential
+import asyncio, hashlib, json, re, threading
+from typing import Any
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_exponential
 from core.config.settings import settings
-try:
-    import openai
-except Exception:
-    openai = None
-try:
-    import anthropic
-except Exception:
-    anthropic = None
+from core.models.cache import ResponseCache, get_cache, make_key
+from core.models.clients import get_clients
+from core.models.ratelimit import estimate_tokens, get_limiter
+from core.models.singleflight import SingleFlight
+from core.models.health import ProviderHealthRegistry, ProviderMisconfigured, is_transient, registry as _registry
 def _strip_code_fences(text: str) -> str:
     if text is None: return ""
     return re.sub(r"```[a-zA-Z]*\n?|```", "", text).strip()
-def coerce_json(text: str) -> dict | list:
-    t = _strip_code_fences(text)
+def _parse_json(text: str) -> tuple[bool, Any]:
+    """(parsed?, value) for a model reply, code fences stripped."""
     try:
-        return json.loads(t)
+        return True, json.loads(_strip_code_fences(text))
     except Exception:
-        return {"findings": [], "notes": t[:500]}
+        return False, None
+def coerce_json(text: str) -> dict | list:
+    ok, value = _parse_json(text)
+    return value if ok else {"findings": [], "notes": _strip_code_fences(text)[:500]}
+# Retry transient upstream errors only; misconfiguration/auth errors surface at once.
+# ModelRunner drives the attempts so each one is admitted by the limiter on its own
+# (paced and counted) and no concurrency slot is held through the backoff sleep.
+_RETRY_WAIT = wait_exponential(min=1, max=8)
+def _retrying(p: "BaseProvider", cls=Retrying):
+    return cls(stop=stop_after_attempt(p.max_attempts), wait=_RETRY_WAIT,
+               retry=retry_if_exception(is_transient), reraise=True)
 class BaseProvider:
+    name = "base"
+    model: str | None = None
+    temperature: float | None = None
+    cacheable = True  # responses may be served from the ModelRunner cache
+    remote = True     # upstream calls go through the per provider/model limiter
+    max_attempts = 1  # ModelRunner retries transient errors up to this many attempts
     def chat(self, system: str, prompt: str) -> str: raise NotImplementedError
+    async def achat(self, system: str, prompt: str) -> str:
+        # Providers without a native async client run their sync call off the event loop.
+        return await asyncio.to_thread(self.chat, system, prompt)
 class OpenAIProvider(BaseProvider):
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
+    name = "openai"
+    model = "gpt-4o-mini"
+    temperature = 0.2
+    max_attempts = 3
     def chat(self, system: str, prompt: str) -> str:
-        if not settings.openai_api_key or openai is None: raise RuntimeError("OpenAI not configured")
-        client = openai.OpenAI(api_key=settings.openai_api_key)
+        client = get_clients().openai(settings.openai_api_key) if settings.openai_api_key else None
+        if client is None: raise ProviderMisconfigured("OpenAI not configured")
         resp = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=self.model,
+            messages=[{"role":"system","content":system},{"role":"user","content":prompt}],
+            temperature=self.temperature,
+        )
+        return resp.choices[0].message.content or ""
+    async def achat(self, system: str, prompt: str) -> str:
+        client = get_clients().aopenai(settings.openai_api_key) if settings.openai_api_key else None
+        if client is None: raise ProviderMisconfigured("OpenAI not configured")
+        resp = await client.chat.completions.create(
+            model=self.model,
             messages=[{"role":"system","content":system},{"role":"user","content":prompt}],
-            temperature=0.2,
+            temperature=self.temperature,
         )
         return resp.choices[0].message.content or ""
 class AnthropicProvider(BaseProvider):
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
+    name = "anthropic"
+    model = "claude-3-haiku-20240307"
+    max_attempts = 3
     def chat(self, system: str, prompt: str) -> str:
-        if not settings.anthropic_api_key or anthropic is None: raise RuntimeError("Anthropic not configured")
-        client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-        msg = client.messages.create(model="claude-3-haiku-20240307", system=system, max_tokens=512, messages=[{"role":"user","content":prompt}])
+        client = get_clients().anthropic(settings.anthropic_api_key) if settings.anthropic_api_key else None
+        if client is None: raise ProviderMisconfigured("Anthropic not configured")
+        msg = client.messages.create(model=self.model, system=system, max_tokens=512, messages=[{"role":"user","content":prompt}])
+        return "".join(getattr(b, "text", "") for b in msg.content)
+    async def achat(self, system: str, prompt: str) -> str:
+        client = get_clients().aanthropic(settings.anthropic_api_key) if settings.anthropic_api_key else None
+        if client is None: raise ProviderMisconfigured("Anthropic not configured")
+        msg = await client.messages.create(model=self.model, system=system, max_tokens=512, messages=[{"role":"user","content":prompt}])
         return "".join(getattr(b, "text", "") for b in msg.content)
 class LocalFallbackProvider(BaseProvider):
+    name = "local"
+    cacheable = False
+    remote = False
     def chat(self, system: str, prompt: str) -> str:
         return json.dumps({"findings": [], "notes": "local-fallback: " + prompt[:200]})
+    async def achat(self, system: str, prompt: str) -> str:
+        return self.chat(system, prompt)
 class ModelRunner:
-    def __init__(self): self.providers = [OpenAIProvider(), AnthropicProvider(), LocalFallbackProvider()]
-    def chat_json(self, system: str, prompt: str) -> dict | list:
-        last_err = None
+    def __init__(self, providers: list[BaseProvider] | None = None, registry: ProviderHealthRegistry | None = None,
+                 cache: ResponseCache | None = None):
+        self.providers = providers if providers is not None else [OpenAIProvider(), AnthropicProvider(), LocalFallbackProvider()]
+        self.registry = registry or _registry
+        self.cache = cache if cache is not None else get_cache()
+        self.flights = SingleFlight()
+    def chat_json(self, system: str, prompt: str, *, use_cache: bool = True) -> dict | list:
+        if not settings.model_coalesce_enabled:
+            return self._chat_json(system, prompt, use_cache)
+        # Concurrent callers with the same prompt share one provider call (see coalesce_stats()).
+        key = hashlib.sha256(json.dumps([system, prompt, use_cache], ensure_ascii=False).encode("utf-8")).hexdigest()
+        return self.flights.do(key, lambda: self._chat_json(system, prompt, use_cache),
+                               timeout=settings.model_coalesce_wait_s)
+    def coalesce_stats(self) -> dict:
+        return self.flights.stats()
+    def _cached(self, p: BaseProvider, system: str, prompt: str, use_cache: bool) -> tuple[str | None, str | None]:
+        """(cache key, cached text) for provider p; key is None when caching does not apply."""
+        if not (use_cache and self.cache is not None and p.cacheable):
+            return None, None
+        key = make_key(p.name, p.model, p.temperature, system, prompt)
+        return key, self.cache.get(key, count_miss=False)  # one miss per request: see _finish
+    def _finish(self, out: str, key: str | None, missed: bool) -> dict | list:
+        """Count the request's cache miss once; cache `out` only if it parses as JSON."""
+        cache = self.cache  # key/missed are only set when a cache is configured
+        if missed and cache is not None:
+            cache.record_miss()
+        ok, value = _parse_json(out)
+        if ok and key is not None and cache is not None:
+            cache.put(key, out)
+        return value if ok else coerce_json(out)
+    @staticmethod
+    def _call(p: BaseProvider, system: str, prompt: str) -> str:
+        """p.chat with retries; every attempt takes its own limiter slot and tokens."""
+        for attempt in _retrying(p):
+            with attempt:
+                if not p.remote:
+                    return p.chat(system, prompt)
+                with get_limiter(p.name, p.model).hold(estimate_tokens(system, prompt)):
+                    return p.chat(system, prompt)
+        raise AssertionError("unreachable: the last failed attempt is re-raised")
+    @staticmethod
+    async def _acall(p: BaseProvider, system: str, prompt: str) -> str:
+        async for attempt in _retrying(p, AsyncRetrying):
+            with attempt:
+                if not p.remote:
+                    return await p.achat(system, prompt)
+                async with get_limiter(p.name, p.model).ahold(estimate_tokens(system, prompt)):
+                    return await p.achat(system, prompt)
+        raise AssertionError("unreachable: the last failed attempt is re-raised")
+    def _chat_json(self, system: str, prompt: str, use_cache: bool) -> dict | list:
+        last_err, missed = None, False
+        for p in self.providers:
+            key, hit = self._cached(p, system, prompt, use_cache)
+            if hit is not None: return coerce_json(hit)
+            missed = missed or key is not None
+            if not self.registry.allow(p.name): continue  # disabled or circuit open: skip instantly
+            try:
+                out = self._call(p, system, prompt)
+            except Exception as e:
+                self.registry.record_failure(p.name, e)
+                last_err = e; continue
+            self.registry.record_success(p.name)
+            return self._finish(out, key, missed)
+        if missed and self.cache is not None: self.cache.record_miss()
+        return {"findings": [], "notes": f"provider error: {last_err}"}
+    async def achat_json(self, system: str, prompt: str, *, use_cache: bool = True) -> dict | list:
+        """Async chat_json: awaits providers natively instead of holding a thread."""
+        last_err, missed = None, False
         for p in self.providers:
+            key, hit = self._cached(p, system, prompt, use_cache)
+            if hit is not None: return coerce_json(hit)
+            missed = missed or key is not None
+            if not self.registry.allow(p.name): continue
             try:
-                out = p.chat(system, prompt)
-                return coerce_json(out)
+                out = await self._acall(p, system, prompt)
             except Exception as e:
+                self.registry.record_failure(p.name, e)
                 last_err = e; continue
+            self.registry.record_success(p.name)
+            return self._finish(out, key, missed)
+        if missed and self.cache is not None: self.cache.record_miss()
         return {"findings": [], "notes": f"provider error: {last_err}"}
+_RUNNER: ModelRunner | None = None
+_RUNNER_LOCK = threading.Lock()
+def get_runner() -> ModelRunner:
+    """Process-wide ModelRunner shared by all boards (providers and pools are reused)."""
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None: _RUNNER = ModelRunner()
+        return _RUNNER
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import json
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional
 
 import httpx
 
+from core.models.clients import get_clients
+from core.models.incremental_json import IncrementalJSONParser
+from core.models.provider import coerce_json
+from core.models.ratelimit import estimate_tokens, get_limiter
+
 
 class MetaLlamaProvider:
     """
@@ -29,6 +35,7 @@ class MetaLlamaProvider:
         base_url: Optional[str] = None,
         api_key: Optional[str] = None,
         timeout_s: float = 60.0,
+        client: Optional[httpx.Client] = None,
     ) -> None:
         self.model = model
         self.base_url = base_url or os.getenv("OPENAI_COMPAT_BASE_URL", "").rstrip("/")
@@ -38,18 +45,18 @@ class MetaLlamaProvider:
                 "OPENAI_COMPAT_BASE_URL not configured; "
                 "set env or pass base_url to MetaLlamaProvider()."
             )
-        self._client = httpx.Client(timeout=timeout_s)
+        self.timeout_s = timeout_s
+        # Shared keep-alive pool (core.models.clients) unless a client is injected
+        self._client = client or get_clients().http("meta_llama")
 
-    def generate(
+    def _request(
         self,
-        *,
         messages: List[Dict[str, str]],
-        temperature: float = 0.2,
-        max_tokens: int = 512,
-        top_p: float = 0.95,
-        extra: Optional[Dict[str, Any]] = None,
-    ) -> str:
-        """Return assistant text from a chat completion."""
+        temperature: float,
+        max_tokens: int,
+        top_p: float,
+        extra: Optional[Dict[str, Any]],
+    ) -> tuple[str, Dict[str, str], Dict[str, Any]]:
         headers = {"Content-Type": "application/json"}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
@@ -63,12 +70,10 @@ class MetaLlamaProvider:
         }
         if extra:
             payload.update(extra)
+        return f"{self.base_url}/v1/chat/completions", headers, payload
 
-        url = f"{self.base_url}/v1/chat/completions"
-        resp = self._client.post(url, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-
+    @staticmethod
+    def _content(data: Any) -> str:
         # OpenAI-format compatibility
         try:
             return data["choices"][0]["message"]["content"]
@@ -79,3 +84,127 @@ class MetaLlamaProvider:
                 msg = choice.get("message") or {}
                 return msg.get("content") or choice.get("text", "")
             return ""
+
+    def _est_tokens(self, messages: List[Dict[str, str]], max_tokens: int) -> int:
+        return estimate_tokens(*(m.get("content") for m in messages), completion=max_tokens)
+
+    def generate(
+        self,
+        *,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        top_p: float = 0.95,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Return assistant text from a chat completion."""
+        url, headers, payload = self._request(messages, temperature, max_tokens, top_p, extra)
+        with get_limiter("meta_llama", self.model).hold(self._est_tokens(messages, max_tokens)):
+            resp = self._client.post(url, headers=headers, json=payload, timeout=self.timeout_s)
+        resp.raise_for_status()
+        return self._content(resp.json())
+
+    async def agenerate(
+        self,
+        *,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        top_p: float = 0.95,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Async generate() on the shared per-loop httpx.AsyncClient pool."""
+        url, headers, payload = self._request(messages, temperature, max_tokens, top_p, extra)
+        client = get_clients().ahttp("meta_llama")
+        async with get_limiter("meta_llama", self.model).ahold(self._est_tokens(messages, max_tokens)):
+            resp = await client.post(url, headers=headers, json=payload, timeout=self.timeout_s)
+        resp.raise_for_status()
+        return self._content(resp.json())
+
+    # ---------------- Streaming (SSE) ----------------
+    @staticmethod
+    def _sse_delta(line: str) -> Optional[str]:
+        """Text carried by one SSE line; None for keep-alives, [DONE] and non-data lines."""
+        if not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if not data or data == "[DONE]":
+            return None
+        try:
+            choice = json.loads(data)["choices"][0]
+        except Exception:
+            return None
+        return (choice.get("delta") or {}).get("content") or choice.get("text") or None
+
+    def stream(
+        self,
+        *,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        top_p: float = 0.95,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> Generator[str, None, None]:
+        """
+        Yield assistant text chunks as they arrive (`stream: true`).
+        Closing the generator early closes the HTTP response, which cancels
+        generation upstream.
+        """
+        url, headers, payload = self._request(messages, temperature, max_tokens, top_p, extra)
+        payload["stream"] = True
+        with get_limiter("meta_llama", self.model).hold(self._est_tokens(messages, max_tokens)):
+            with self._client.stream("POST", url, headers=headers, json=payload, timeout=self.timeout_s) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    delta = self._sse_delta(line)
+                    if delta:
+                        yield delta
+
+    async def astream(
+        self,
+        *,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        top_p: float = 0.95,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Async stream()."""
+        url, headers, payload = self._request(messages, temperature, max_tokens, top_p, extra)
+        payload["stream"] = True
+        client = get_clients().ahttp("meta_llama")
+        async with get_limiter("meta_llama", self.model).ahold(self._est_tokens(messages, max_tokens)):
+            async with client.stream("POST", url, headers=headers, json=payload, timeout=self.timeout_s) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    delta = self._sse_delta(line)
+                    if delta:
+                        yield delta
+
+    def generate_json(self, *, messages: List[Dict[str, str]], **kw: Any) -> dict | list:
+        """
+        Stream a completion into IncrementalJSONParser and stop as soon as the
+        top-level JSON value closes; trailing chatter is never generated.
+        Falls back to coerce_json on the full text if no valid value appears.
+        """
+        parser = IncrementalJSONParser()
+        chunks = self.stream(messages=messages, **kw)
+        try:
+            for chunk in chunks:
+                if parser.feed(chunk):
+                    break
+        finally:
+            chunks.close()
+        return parser.result if parser.result is not None else coerce_json(parser.text)
+
+    async def agenerate_json(self, *, messages: List[Dict[str, str]], **kw: Any) -> dict | list:
+        """Async generate_json()."""
+        parser = IncrementalJSONParser()
+        chunks = self.astream(messages=messages, **kw)
+        try:
+            async for chunk in chunks:
+                if parser.feed(chunk):
+                    break
+        finally:
+            await chunks.aclose()
+        return parser.result if parser.result is not None else coerce_json(parser.text)
@@ -0,0 +1,153 @@
+# core/models/ratelimit.py — per provider/model concurrency caps and token buckets
+from __future__ import annotations
+
+import asyncio, threading, time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from core.config.settings import settings
+
+
+class TokenBucket:
+    """Classic token bucket. reserve() takes tokens now and returns how long to wait for them."""
+
+    def __init__(self, rate_per_s: float, capacity: float) -> None:
+        self.rate = rate_per_s
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n: float = 1.0) -> float:
+        if self.rate <= 0:
+            return 0.0
+        n = min(n, self.capacity)  # an oversized request waits for a full bucket, not forever
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._t) * self.rate)
+            self._t = now
+            self._tokens -= n
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class ProviderLimiter:
+    """
+    Admission control for one provider/model: at most max_concurrency calls in
+    flight, paced by a requests/sec bucket and a tokens/min bucket. Usable from
+    threads (hold) and coroutines on any event loop (ahold); all of them share
+    one concurrency cap, the buckets and the counters.
+    """
+
+    def __init__(self, key: str, max_concurrency: int = 8, requests_per_s: float = 0.0, tokens_per_min: int = 0) -> None:
+        self.key = key
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests = TokenBucket(requests_per_s, requests_per_s)
+        self.tokens = TokenBucket(tokens_per_min / 60.0, tokens_per_min)
+        # One admission counter for threads and every event loop alike; ahold polls it.
+        self._sem = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._m = {"calls": 0, "waiting": 0, "in_flight": 0, "wait_total_s": 0.0, "wait_max_s": 0.0}
+
+    def _pace(self, est_tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(est_tokens))
+
+    def _enter(self, waited: float) -> None:
+        with self._lock:
+            self._m["waiting"] -= 1
+            self._m["in_flight"] += 1
+            self._m["calls"] += 1
+            self._m["wait_total_s"] += waited
+            self._m["wait_max_s"] = max(self._m["wait_max_s"], waited)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self._m["in_flight"] -= 1
+
+    def _queued(self) -> None:
+        with self._lock:
+            self._m["waiting"] += 1
+
+    def _unqueued(self) -> None:
+        with self._lock:
+            self._m["waiting"] -= 1
+
+    @contextmanager
+    def hold(self, est_tokens: int = 0) -> Iterator[None]:
+        t0 = time.monotonic()
+        self._queued()
+        self._sem.acquire()
+        try:
+            delay = self._pace(est_tokens)
+            if delay:
+                time.sleep(delay)
+            self._enter(time.monotonic() - t0)
+            try:
+                yield
+            finally:
+                self._exit()
+        finally:
+            self._sem.release()
+
+    @asynccontextmanager
+    async def ahold(self, est_tokens: int = 0) -> AsyncIterator[None]:
+        t0 = time.monotonic()
+        self._queued()
+        try:
+            poll = 0.005
+            while not self._sem.acquire(blocking=False):  # never block the event loop
+                await asyncio.sleep(poll)
+                poll = min(poll * 2, 0.05)
+        except BaseException:  # cancelled while queued
+            self._unqueued()
+            raise
+        try:
+            try:
+                delay = self._pace(est_tokens)
+                if delay:
+                    await asyncio.sleep(delay)
+            except BaseException:
+                self._unqueued()
+                raise
+            self._enter(time.monotonic() - t0)
+            try:
+                yield
+            finally:
+                self._exit()
+        finally:
+            self._sem.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            m = dict(self._m)
+        m["wait_avg_s"] = m["wait_total_s"] / m["calls"] if m["calls"] else 0.0
+        return m
+
+
+def estimate_tokens(*texts: Optional[str], completion: int = 512) -> int:
+    """Rough prompt+completion size (~4 chars per token) for the tokens/min bucket."""
+    return sum(len(t or "") for t in texts) // 4 + completion
+
+
+_LIMITERS: Dict[str, ProviderLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(provider: str, model: Optional[str] = None) -> ProviderLimiter:
+    key = f"{provider}:{model}" if model else provider
+    with _LIMITERS_LOCK:
+        lim = _LIMITERS.get(key)
+        if lim is None:
+            cfg: Dict[str, Any] = {
+                "max_concurrency": settings.llm_max_concurrency,
+                "requests_per_s": settings.llm_requests_per_s,
+                "tokens_per_min": settings.llm_tokens_per_min,
+            }
+            cfg.update(settings.llm_limits.get(provider, {}))
+            cfg.update(settings.llm_limits.get(key, {}))
+            lim = _LIMITERS[key] = ProviderLimiter(key, **cfg)
+        return lim
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _LIMITERS_LOCK:
+        return {k: v.stats() for k, v in _LIMITERS.items()}
@@ -0,0 +1,63 @@
+# core/models/singleflight.py — coalesce identical in-flight calls
+from __future__ import annotations
+
+import copy, threading
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    The first caller for a key (the leader) runs fn; callers that arrive with
+    the same key while it is in flight wait for it and get a deep copy of the
+    leader's result (or its exception). A follower that waits longer than
+    `timeout` stops waiting and runs fn itself.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call[Any]] = {}
+        self._counters = {"leaders": 0, "coalesced": 0, "wait_timeouts": 0}
+
+    def do(self, key: str, fn: Callable[[], T], timeout: Optional[float] = None) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters["leaders"] += 1
+        assert call is not None
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if not call.done.wait(timeout):
+            with self._lock:
+                self._counters["wait_timeouts"] += 1
+            return fn()
+        with self._lock:
+            self._counters["coalesced"] += 1
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)  # type: ignore[return-value]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
@@ -1,13 +1,21 @@
 import structlog
-from pathlib import Path
 import json
 from core.bus.events import emit_event
+from core.provenance.audit_sink import AUDIT_FILE, append_line
+from core.provenance.audit_span import current_span
 
 logger = structlog.get_logger()
 
 
 def audit(who: str, action: str, subject: str | None = None, **details) -> None:
-    """Emit an audit event and log it through structlog."""
+    """
+    Emit an audit event and log it through structlog. Inside a job span (see
+    audit_span.job_span) the event is only buffered on the span instead.
+    """
+    span = current_span()
+    if span is not None:
+        span.add(who, action, subject, details)
+        return
     emit_event(who=who, action=action, subject=subject, **details)
     logger.info("audit", who=who, action=action, subject=subject, **details)
 
@@ -16,17 +24,15 @@ def audit(who: str, action: str, subject: str | None = None, **details) -> None:
 # Append-only audit for validation reports
 # -------------------------------------------------------------------
 
-_AUDIT_FILE = Path("logs/audit.ndjson")
+_AUDIT_FILE = AUDIT_FILE
 
 
 def audit_append_ndjson(obj) -> None:
     """
     Append a single JSON object (or Pydantic model) as one line into logs/audit.ndjson.
-    Creates directories/files if they do not exist.
+    Creates directories/files if they do not exist; the write itself is asynchronous.
     Works with Pydantic v1, v2, dicts, or plain dataclasses.
     """
-    _AUDIT_FILE.parent.mkdir(parents=True, exist_ok=True)
-
     # Normalize object into JSON string
     line: str
     try:
@@ -48,6 +54,5 @@ def audit_append_ndjson(obj) -> None:
             except Exception as e:
                 line = json.dumps({"error": f"Failed to serialize: {e}", "repr": repr(obj)})
 
-    # Append as one line
-    with _AUDIT_FILE.open("a", encoding="utf-8") as f:
-        f.write(line + "\n")
+    # Append as one line (queued; written by the audit_sink writer thread)
+    append_line(_AUDIT_FILE, line)
@@ -0,0 +1,249 @@
+# core/provenance/audit_index.py — reverse tail and a sparse sidecar index for NDJSON audit files
+"""
+The audit file is only ever appended to, so:
+
+- tail reads fixed-size blocks backwards from EOF and stops after `limit`
+  lines, or at the first event older than `since`;
+- SparseIndex keeps a sidecar `<file>.idx` (NDJSON) with the byte offset of
+  the first event of every time bucket (AUDIT_INDEX_BUCKET_S), and, per
+  bucket, the offset of the first event carrying each request_id/subject
+  value. A lookup seeks to those offsets and reads at most to the end of the
+  bucket. The sidecar is brought up to date on read by scanning only the
+  bytes appended since the last refresh.
+
+Event times are expected to be roughly increasing (append order); an event
+stamped earlier than its bucket still gets key entries but no new bucket.
+"""
+from __future__ import annotations
+
+import bisect, json, os, threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import AUDIT_INDEX_BUCKET_S
+
+BLOCK = 64 * 1024
+INDEX_KEYS = ("request_id", "subject")
+# Job span records (core.provenance.audit_span) list the request ids/subjects of
+# the events folded into them; those are indexed and matched like the field itself.
+INDEX_LISTS = {"request_id": "request_ids", "subject": "subjects"}
+_MAX_KEY_LEN = 200
+
+
+def key_values(ev: Dict[str, Any], name: str) -> List[Any]:
+    """Every value of index field `name` on an event: the field plus its list form."""
+    vals = [] if ev.get(name) is None else [ev[name]]
+    more = ev.get(INDEX_LISTS.get(name, ""))
+    if isinstance(more, list):
+        vals += [v for v in more if v is not None]
+    return vals
+
+
+def has_value(ev: Dict[str, Any], name: str, value: Any) -> bool:
+    if ev.get(name) == value:
+        return True
+    more = ev.get(INDEX_LISTS.get(name, ""))
+    return isinstance(more, list) and value in more
+
+
+def event_ts(ev: Dict[str, Any]) -> Optional[float]:
+    """Epoch seconds of an event ('ts', else 'when'); None if missing or unparseable."""
+    raw = ev.get("ts") or ev.get("when")
+    if not isinstance(raw, str):
+        return None
+    try:
+        return parse_ts(raw)
+    except ValueError:
+        return None
+
+
+def parse_ts(value: str) -> float:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()  # naive = UTC
+
+
+def _loads(line: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        ev = json.loads(line)
+    except ValueError:
+        return None  # torn or foreign line; skip it
+    return ev if isinstance(ev, dict) else None
+
+
+def read_forward(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+    """(offset, line) for every complete line in [start, end)."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if end is not None and offset >= end:
+                return
+            if not line.endswith(b"\n"):
+                return  # a write in progress
+            if line.strip():
+                yield offset, line
+            offset += len(line)
+
+
+def read_reverse(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+    """(offset, line) for complete lines in [start, end), newest first, reading BLOCK bytes at a time."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END) if end is None else end
+        buf = b""
+        trimmed = False  # until the trailing partial line (a write in progress) is cut off
+        while pos > start:
+            size = min(BLOCK, pos - start)
+            pos -= size
+            f.seek(pos)
+            buf = f.read(size) + buf
+            if not trimmed:
+                cut = buf.rfind(b"\n")
+                if cut < 0:
+                    continue
+                buf, trimmed = buf[:cut + 1], True
+            lines = buf.split(b"\n")[:-1]
+            # lines[0] may start before this block; keep it for the next round
+            off = pos + len(lines[0]) + 1
+            complete = []
+            for ln in lines[1:]:
+                complete.append((off, ln))
+                off += len(ln) + 1
+            for o, ln in reversed(complete):
+                if ln.strip():
+                    yield o, ln + b"\n"
+            buf = lines[0] + b"\n"
+        if trimmed and buf.strip():
+            yield start, buf
+
+
+def tail_events(path: Path, limit: int, since: Optional[float] = None, start: int = 0) -> List[Dict[str, Any]]:
+    """Last `limit` events (oldest first), stopping early at the first event older than `since`."""
+    if not path.exists():
+        return []
+    out: List[Dict[str, Any]] = []
+    for _, line in read_reverse(path, start):
+        ev = _loads(line)
+        if ev is None:
+            continue
+        if since is not None:
+            ts = event_ts(ev)
+            if ts is not None and ts < since:
+                break
+        out.append(ev)
+        if len(out) >= limit:
+            break
+    out.reverse()
+    return out
+
+
+class SparseIndex:
+    def __init__(self, path: Path, bucket_s: int = AUDIT_INDEX_BUCKET_S) -> None:
+        self.path = Path(path)
+        self.idx_path = self.path.with_name(self.path.name + ".idx")
+        self.bucket_s = max(1, bucket_s)
+        self._lock = threading.Lock()
+        self._reset()
+        self._load()
+
+    def _reset(self) -> None:
+        self.end = 0
+        self.ino: Optional[int] = None  # identifies the indexed file across rotations
+        self.bucket_keys: List[int] = []   # bucket start (epoch s), increasing
+        self.bucket_offs: List[int] = []   # byte offset of the bucket's first event
+        self.keys: Dict[str, List[int]] = {}
+        self._seen: set[str] = set()       # keys already recorded in the current bucket
+
+    def _apply(self, e: Dict[str, Any]) -> None:
+        if "b" in e:
+            self.bucket_keys.append(e["b"]); self.bucket_offs.append(e["o"])
+            self._seen = set()
+        elif "k" in e:
+            self.keys.setdefault(e["k"], []).append(e["o"])
+            self._seen.add(e["k"])
+        elif "end" in e:
+            self.end, self.ino = e["end"], e.get("ino")
+
+    def _load(self) -> None:
+        if not self.idx_path.exists():
+            return
+        pending: List[Dict[str, Any]] = []
+        for _, line in read_forward(self.idx_path):
+            e = _loads(line)
+            if e is None:
+                continue
+            pending.append(e)
+            if "end" in e:  # only batches that were completely written count
+                for p in pending:
+                    self._apply(p)
+                pending = []
+
+    def refresh(self) -> None:
+        """Index whatever was appended since the last call."""
+        with self._lock:
+            try:
+                st = self.path.stat()
+                size, ino = st.st_size, st.st_ino
+            except FileNotFoundError:
+                size, ino = 0, None
+            if size < self.end or (self.end and ino != self.ino):  # rotated/replaced/truncated: start over
+                self._reset()
+                self.idx_path.unlink(missing_ok=True)
+            if size == self.end:
+                return
+            entries: List[Dict[str, Any]] = []
+            end = self.end
+            for off, line in read_forward(self.path, self.end):
+                end = off + len(line)
+                ev = _loads(line)
+                if ev is None:
+                    continue
+                ts = event_ts(ev)
+                if ts is not None:
+                    b = int(ts // self.bucket_s * self.bucket_s)
+                    if not self.bucket_keys or b > self.bucket_keys[-1]:
+                        entries.append({"b": b, "o": off}); self._apply(entries[-1])
+                for name in INDEX_KEYS:
+                    for v in key_values(ev, name):
+                        k = f"{name}:{v}"[:_MAX_KEY_LEN]
+                        if k not in self._seen:
+                            entries.append({"k": k, "o": off}); self._apply(entries[-1])
+            if end == self.end:
+                return
+            entries.append({"end": end, "ino": ino}); self._apply(entries[-1])
+            with open(self.idx_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries))
+
+    def offset_for_time(self, ts: float) -> int:
+        """Offset of the bucket containing ts: every event at or after ts lies at or after it."""
+        i = bisect.bisect_right(self.bucket_keys, ts) - 1
+        return self.bucket_offs[i] if i >= 0 else 0
+
+    def _bucket_end(self, offset: int) -> int:
+        i = bisect.bisect_right(self.bucket_offs, offset)
+        return self.bucket_offs[i] if i < len(self.bucket_offs) else self.end
+
+    def lookup(self, name: str, value: Any, reverse: bool = False) -> Iterator[Dict[str, Any]]:
+        """Events whose `name` field equals value, in file order (newest first with reverse=True)."""
+        self.refresh()
+        k = f"{name}:{value}"[:_MAX_KEY_LEN]
+        offsets = list(self.keys.get(k, ()))
+        read = read_reverse if reverse else read_forward
+        for off in reversed(offsets) if reverse else offsets:
+            for _, line in read(self.path, off, self._bucket_end(off)):
+                ev = _loads(line)
+                if ev is not None and has_value(ev, name, value):
+                    yield ev
+
+
+_INDEXES: Dict[Path, SparseIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_index(path: Path) -> SparseIndex:
+    key = Path(path).resolve()
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is None:
+            idx = _INDEXES[key] = SparseIndex(key)
+        return idx
@@ -0,0 +1,403 @@
+# core/provenance/audit_segments.py — rotated, compressed, random-access audit segments
+"""
+The audit trail is the active NDJSON file (AUDIT_FILE) plus closed segments
+in `<stem>-segments/` next to it:
+
+    000001.ndjson.gz    concatenated gzip members, each a block of whole lines
+    000001.idx.json     {"request_id:<v>": [block, ...], "subject:<v>": [...]}
+    manifest.json       per segment: time range, event count, sha256 and the
+                        block table [offset, length, first_ts, last_ts, events]
+
+Rotation renames the active file to a staging `<seq>.ndjson` and seals it
+into a segment. Readers treat a staging file that has not been sealed yet
+(e.g. after a crash) as a plain segment, and the next rotation seals it.
+Segments are never modified once written. The manifest only ever gains
+entries and is replaced atomically.
+
+Writers hold `locked()` around each batch so a rotation in one process never
+races an append from another (fcntl, where available); after taking the lock
+a writer reopens the active file if it was rotated underneath it.
+"""
+from __future__ import annotations
+
+import gzip, hashlib, json, os, shutil, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import AUDIT_BLOCK_BYTES, AUDIT_ROTATE_BYTES, AUDIT_ROTATE_S
+from core.provenance.audit_index import (INDEX_KEYS, _loads, event_ts, get_index, has_value, key_values,
+                                         read_forward, read_reverse)
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation is only coordinated within one process
+    fcntl = None
+
+
+_SCAN_RETRIES = 3  # re-reads in a row after the active/staging file was rotated away mid-scan
+
+
+class SegmentStore:
+    def __init__(self, active: Path, max_bytes: int = AUDIT_ROTATE_BYTES, max_age_s: float = AUDIT_ROTATE_S,
+                 block_bytes: int = AUDIT_BLOCK_BYTES) -> None:
+        self.active = Path(active)
+        self.dir = self.active.with_name(self.active.stem + "-segments")
+        self.manifest_path = self.dir / "manifest.json"
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.block_bytes = max(1, block_bytes)
+        self._lock = threading.RLock()
+        self._lock_path = self.active.with_name(self.active.name + ".lock")
+        self._manifest: Tuple[float, List[Dict[str, Any]]] = (-1.0, [])
+        self._key_index: Dict[str, Dict[str, List[int]]] = {}
+
+    # ---------------- Writing side ----------------
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._lock_path, "a") as lf:
+                fcntl.flock(lf, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def first_ts(self) -> Optional[float]:
+        """Time of the first event in the active file (its age for time-based rotation)."""
+        try:
+            for _, line in read_forward(self.active):
+                ev = _loads(line)
+                if ev is not None:
+                    return event_ts(ev)
+        except FileNotFoundError:
+            pass
+        return None
+
+    def due(self, size: int, first_ts: Optional[float]) -> bool:
+        if size <= 0:
+            return False
+        if self.max_bytes > 0 and size >= self.max_bytes:
+            return True
+        return bool(self.max_age_s > 0 and first_ts is not None and time.time() - first_ts >= self.max_age_s)
+
+    def rotate(self) -> Optional[Dict[str, Any]]:
+        """Close the active file into a new segment. Call with locked() held."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.recover()
+        if not self.active.exists() or self.active.stat().st_size == 0:
+            return None
+        staging = self.dir / f"{self._next_seq():06d}.ndjson"
+        os.replace(self.active, staging)
+        self.active.with_name(self.active.name + ".idx").unlink(missing_ok=True)  # sparse index of the old file
+        return self._seal(staging)
+
+    def recover(self) -> None:
+        """Seal staging files left behind by an interrupted rotation."""
+        for staging in sorted(self.dir.glob("[0-9]*.ndjson")):
+            self._seal(staging)
+
+    def seal_existing(self) -> Optional[Dict[str, Any]]:
+        """
+        Seal an active file that predates segments (no manifest yet) into the
+        first segment right away, instead of waiting for the size/age limits,
+        so all of its history lands in the segment layout.
+        """
+        with self.locked():
+            if self.segments():
+                return None
+            return self.rotate()
+
+    def import_legacy(self, path: Path) -> Optional[Dict[str, Any]]:
+        """
+        Seal a copy of an audit file written before segments existed as segment
+        000000, so it reads as the oldest part of the trail. Runs once: a no-op
+        when segment 000000 exists or the file is missing. The file itself is
+        left in place.
+        """
+        path = Path(path)
+        if not path.exists() or path.resolve() == self.active.resolve():
+            return None
+        with self.locked():
+            if any(_seq(seg["name"]) == 0 for seg in self.segments()):
+                return None
+            self.dir.mkdir(parents=True, exist_ok=True)
+            staging = self.dir / "000000.ndjson"
+            tmp = staging.with_suffix(".ndjson.tmp")
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, staging)  # recover() only ever sees a complete copy
+            return self._seal(staging)
+
+    def _next_seq(self) -> int:
+        return max((_seq(p.name) for p in self.dir.glob("[0-9]*.ndjson*")), default=0) + 1
+
+    def _seal(self, staging: Path) -> Dict[str, Any]:
+        """
+        Compress a staging file into a segment. The segment's decompressed bytes
+        are exactly the staging file's, cut into blocks at line boundaries, so a
+        (sequence number, byte offset) cursor taken on the active file stays valid.
+        """
+        name = staging.name + ".gz"
+        target = self.dir / name
+        blocks: List[List[Any]] = []
+        keys: Dict[str, List[int]] = {}
+        digest = hashlib.sha256()
+        first = last = None
+        events = raw_bytes = 0
+        tmp = target.with_suffix(".gz.tmp")
+        with open(staging, "rb") as src, open(tmp, "wb") as out:
+            buf: List[bytes] = []
+            meta: Dict[str, Any] = {"t0": None, "t1": None, "n": 0, "raw_off": 0}
+
+            def _flush_block() -> None:
+                member = gzip.compress(b"".join(buf), compresslevel=6, mtime=0)
+                blocks.append([out.tell(), len(member), meta["t0"], meta["t1"], meta["n"], meta["raw_off"]])
+                out.write(member)
+                digest.update(member)
+                buf.clear()
+                meta.update(t0=None, t1=None, n=0, raw_off=raw_bytes)
+
+            size = 0
+            for line in src:
+                ev = _loads(line) if line.strip() else None
+                ts = event_ts(ev) if ev is not None else None
+                if ts is not None:
+                    meta["t0"] = ts if meta["t0"] is None else min(meta["t0"], ts)
+                    meta["t1"] = ts if meta["t1"] is None else max(meta["t1"], ts)
+                    first = ts if first is None else min(first, ts)
+                    last = ts if last is None else max(last, ts)
+                if ev is not None:
+                    events += 1
+                    meta["n"] += 1
+                    for k in INDEX_KEYS:
+                        for v in key_values(ev, k):
+                            bl = keys.setdefault(f"{k}:{v}", [])
+                            if not bl or bl[-1] != len(blocks):
+                                bl.append(len(blocks))
+                buf.append(line)
+                raw_bytes += len(line)
+                size += len(line)
+                if size >= self.block_bytes:
+                    _flush_block()
+                    size = 0
+            if buf:
+                _flush_block()
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, target)
+        (self.dir / f"{staging.name.split('.')[0]}.idx.json").write_text(json.dumps(keys), encoding="utf-8")
+        entry = {"name": name, "first_ts": first, "last_ts": last, "events": events,
+                 "raw_bytes": raw_bytes, "bytes": target.stat().st_size, "sha256": digest.hexdigest(),
+                 "blocks": blocks}
+        self._write_manifest(self.segments() + [entry])
+        staging.unlink()
+        return entry
+
+    def _write_manifest(self, segments: List[Dict[str, Any]]) -> None:
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        segments = sorted(segments, key=lambda seg: _seq(seg["name"]))  # an imported 000000 goes first
+        tmp.write_text(json.dumps({"segments": segments}, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    # ---------------- Reading side ----------------
+    def segments(self) -> List[Dict[str, Any]]:
+        try:
+            mtime = self.manifest_path.stat().st_mtime
+        except FileNotFoundError:
+            return []
+        if mtime != self._manifest[0]:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            self._manifest = (mtime, data["segments"])
+        return list(self._manifest[1])
+
+    def _pending(self) -> List[Path]:
+        return sorted(self.dir.glob("[0-9]*.ndjson")) if self.dir.exists() else []
+
+    def _block_lines(self, seg: Dict[str, Any], i: int) -> List[Tuple[int, bytes]]:
+        """(raw offset, line) for every line of block i, including blank/torn ones."""
+        off, length = seg["blocks"][i][:2]
+        raw_off = seg["blocks"][i][5]
+        with open(self.dir / seg["name"], "rb") as f:
+            f.seek(off)
+            data = gzip.decompress(f.read(length))
+        out: List[Tuple[int, bytes]] = []
+        for piece in data.split(b"\n")[:-1] if data.endswith(b"\n") else data.split(b"\n"):
+            out.append((raw_off, piece + b"\n"))
+            raw_off += len(piece) + 1
+        return out
+
+    def read_block(self, seg: Dict[str, Any], i: int) -> List[bytes]:
+        return [ln for _, ln in self._block_lines(seg, i) if ln.strip()]
+
+    def verify(self, seg: Dict[str, Any]) -> bool:
+        h = hashlib.sha256()
+        with open(self.dir / seg["name"], "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest() == seg["sha256"]
+
+    def _keys(self, seg: Dict[str, Any]) -> Dict[str, List[int]]:
+        name = seg["name"]
+        if name not in self._key_index:
+            path = self.dir / f"{name.split('.')[0]}.idx.json"
+            self._key_index[name] = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        return self._key_index[name]
+
+    def _sources(self) -> List[Tuple[str, str, Any]]:
+        """
+        (source id, kind, segment entry or path), oldest first. The id is the
+        sequence number; the active file already carries the number it will get
+        when it is rotated, so positions in it stay valid afterwards.
+        """
+        out: List[Tuple[str, str, Any]] = [(f"seq:{_seq(seg['name'])}", "seg", seg) for seg in self.segments()]
+        out += [(f"seq:{_seq(p.name)}", "file", p) for p in self._pending()]
+        last = max((int(sid[4:]) for sid, _, _ in out), default=0)
+        out.append((f"seq:{last + 1}", "file", self.active))
+        return out
+
+    def scan(self, cursor: Optional[Tuple[str, int]] = None, since: Optional[float] = None,
+             until: Optional[float] = None) -> Iterator[Tuple[Tuple[str, int], bytes]]:
+        """
+        ((source, offset after the line), line) for every line, oldest first, across
+        segments, staging files and the active file, resuming after `cursor` (a
+        position yielded earlier). Blocks entirely outside [since, until) are
+        skipped without decompressing. Raises ValueError for an unknown cursor and
+        FileNotFoundError when a sealed segment is missing.
+        """
+        retries = 0
+        while True:
+            try:
+                for pos, line in self._scan_once(cursor, since, until):
+                    cursor, retries = pos, 0
+                    yield pos, line
+                return
+            except FileNotFoundError as e:
+                # Only the active file or a staging file can legitimately vanish mid-read
+                # (rotated away; it is a segment now, so resume from cursor). A missing
+                # .gz segment is lost data and retrying would never end.
+                if not str(e.filename or "").endswith(".ndjson") or retries >= _SCAN_RETRIES:
+                    raise
+                retries += 1
+
+    def _scan_once(self, cursor, since, until) -> Iterator[Tuple[Tuple[str, int], bytes]]:
+        sources = self._sources()
+        first, start_off = 0, 0
+        if cursor is not None:
+            ids = [sid for sid, _, _ in sources]
+            if cursor[0] not in ids:
+                raise ValueError("invalid cursor")
+            first, start_off = ids.index(cursor[0]), cursor[1]
+        for n, (sid, kind, obj) in enumerate(sources[first:]):
+            off0 = start_off if n == 0 else 0
+            if kind == "seg":
+                seg = obj
+                if (since is not None and seg["last_ts"] is not None and seg["last_ts"] < since) or \
+                   (until is not None and seg["first_ts"] is not None and seg["first_ts"] >= until):
+                    continue
+                blocks = seg["blocks"]
+                for i, b in enumerate(blocks):
+                    t0, t1 = b[2], b[3]
+                    raw_end = blocks[i + 1][5] if i + 1 < len(blocks) else seg["raw_bytes"]
+                    if raw_end <= off0 or (since is not None and t1 is not None and t1 < since) or \
+                       (until is not None and t0 is not None and t0 >= until):
+                        continue
+                    for raw, line in self._block_lines(seg, i):
+                        if raw >= off0 and line.strip():
+                            yield (sid, raw + len(line)), line
+            else:
+                path = obj
+                if path == self.active and not path.exists():
+                    return  # nothing written since the last rotation
+                if not off0 and since is not None and path == self.active:
+                    idx = get_index(self.active)
+                    idx.refresh()
+                    off0 = idx.offset_for_time(since)
+                for off, line in read_forward(path, off0):
+                    yield (sid, off + len(line)), line
+
+    def iter_lines(self, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[bytes]:
+        """Every line, oldest first, across segments, staging files and the active file."""
+        return (line for _, line in self.scan(since=since, until=until))
+
+    def _iter_reverse(self, since: Optional[float]) -> Iterator[bytes]:
+        if self.active.exists():
+            start = 0
+            if since is not None:
+                idx = get_index(self.active)
+                idx.refresh()
+                start = idx.offset_for_time(since)
+            yield from (ln for _, ln in read_reverse(self.active, start))
+            if start > 0:
+                return  # the active file already reaches back past `since`
+        for staging in reversed(self._pending()):
+            yield from (ln for _, ln in read_reverse(staging))
+        for seg in reversed(self.segments()):
+            if since is not None and seg["last_ts"] is not None and seg["last_ts"] < since:
+                return
+            for i in reversed(range(len(seg["blocks"]))):
+                t1 = seg["blocks"][i][3]
+                if since is not None and t1 is not None and t1 < since:
+                    return
+                yield from reversed(self.read_block(seg, i))
+
+    def tail(self, limit: int, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Last `limit` events (oldest first), stopping at the first event older than `since`."""
+        out: List[Dict[str, Any]] = []
+        for line in self._iter_reverse(since):
+            ev = _loads(line)
+            if ev is None:
+                continue
+            if since is not None:
+                ts = event_ts(ev)
+                if ts is not None and ts < since:
+                    break
+            out.append(ev)
+            if len(out) >= limit:
+                break
+        out.reverse()
+        return out
+
+    def lookup(self, field: str, value: Any, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Events whose request_id/subject equals value, oldest first (the last
+        `limit` of them). Sources are read newest first, through the key indexes,
+        and reading stops once `limit` events are found.
+        """
+        out: List[Dict[str, Any]] = []
+        for ev in self._lookup_reverse(field, value):
+            out.append(ev)
+            if limit is not None and len(out) >= limit:
+                break
+        out.reverse()
+        return out
+
+    def _lookup_reverse(self, field: str, value: Any) -> Iterator[Dict[str, Any]]:
+        if self.active.exists():
+            yield from get_index(self.active).lookup(field, value, reverse=True)
+        for staging in reversed(self._pending()):
+            yield from (ev for ev in (_loads(ln) for _, ln in read_reverse(staging)) if ev and has_value(ev, field, value))
+        key = f"{field}:{value}"
+        for seg in reversed(self.segments()):
+            for i in reversed(self._keys(seg).get(key, ())):
+                yield from (ev for ev in map(_loads, reversed(self.read_block(seg, i)))
+                            if ev and has_value(ev, field, value))
+
+def _seq(name: str) -> int:
+    return int(name.split(".")[0])
+
+
+_STORES: Dict[Path, SegmentStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(active: Path) -> SegmentStore:
+    key = Path(active).resolve()
+    with _STORES_LOCK:
+        st = _STORES.get(key)
+        if st is None:
+            st = _STORES[key] = SegmentStore(key)
+        return st
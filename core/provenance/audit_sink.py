@@ -1,11 +1,15 @@
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
-import threading, json, hashlib
+import atexit, logging, os, queue, threading, time, json, hashlib
 
-AUDIT_DIR = Path("logs")
+from config import AUDIT_BATCH_MAX, AUDIT_FILE, AUDIT_FSYNC, AUDIT_FSYNC_INTERVAL_S, AUDIT_LEGACY_FILE, AUDIT_QUEUE_MAX
+from core.provenance.audit_segments import SegmentStore, get_store
+
+log = logging.getLogger(__name__)
+
+AUDIT_DIR = AUDIT_FILE.parent  # AUDIT_FILE is the active segment; see audit_segments
 AUDIT_DIR.mkdir(parents=True, exist_ok=True)
-AUDIT_FILE = AUDIT_DIR / "audit.ndjson"
 _LOCK = threading.Lock()
 
 def now_iso() -> str:
@@ -16,17 +20,216 @@ def sha256_json(obj: Any) -> str:
     data = json.dumps(obj, separators=(",", ":"), sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
     return "sha256:" + hashlib.sha256(data).hexdigest()
 
+
+# ---------------- Buffered writer ----------------
+class AuditWriter:
+    """
+    Appends lines to one file from a background thread. submit() only enqueues
+    (never blocks); when the bounded queue is full the line is dropped and
+    counted. The thread keeps the file open and writes whatever is queued as
+    one batch. fsync policy: "none" (OS decides), "interval" (at most every
+    fsync_interval_s, and once the queue goes idle), "every-batch". With a
+    SegmentStore the file is rotated by size/age between batches.
+    """
+
+    def __init__(self, path: Path, max_queue: int = AUDIT_QUEUE_MAX, batch_max: int = AUDIT_BATCH_MAX,
+                 fsync: str = AUDIT_FSYNC, fsync_interval_s: float = AUDIT_FSYNC_INTERVAL_S,
+                 segments: Optional[SegmentStore] = None) -> None:
+        self.path = Path(path)
+        self.segments = segments  # rotation (size/age) into compressed segments; see audit_segments
+        self.batch_max = max(1, batch_max)
+        self.fsync = fsync if fsync in ("none", "interval", "every-batch") else "interval"
+        self.fsync_interval_s = fsync_interval_s
+        self._q: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max(1, max_queue))
+        self._cv = threading.Condition()
+        self._submitted = 0
+        self._written = 0
+        self._m = {"written": 0, "dropped": 0, "batches": 0, "fsyncs": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"audit-writer:{self.path.name}")
+        self._thread.start()
+
+    def submit(self, line: str) -> bool:
+        with self._cv:
+            try:
+                self._q.put_nowait(line)
+            except queue.Full:
+                self._m["dropped"] += 1
+                return False
+            self._submitted += 1
+            return True
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until everything submitted before this call is written. False on timeout."""
+        with self._cv:
+            target = self._submitted
+            return self._cv.wait_for(lambda: self._written >= target or not self._thread.is_alive(), timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        self.flush(timeout)
+        try:
+            self._q.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cv:
+            return {**self._m, "queued": self._q.qsize()}
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._first_ts: Optional[float] = None
+        return self.path.open("a", encoding="utf-8")
+
+    def _append(self, f, data: str):
+        """Write one batch; with a segment store, also reopen after/perform rotation. Returns the open file."""
+        if self.segments is None:
+            f.write(data)
+            f.flush()
+            return f
+        with self.segments.locked():
+            try:
+                rotated = os.stat(self.path).st_ino != os.fstat(f.fileno()).st_ino
+            except FileNotFoundError:
+                rotated = True
+            if rotated:  # another process rotated the active file
+                f.close()
+                f = self._open()
+            f.write(data)
+            f.flush()
+            if self._first_ts is None:
+                self._first_ts = self.segments.first_ts()
+            if self.segments.due(os.fstat(f.fileno()).st_size, self._first_ts):
+                self._sync(f)
+                f.close()
+                self.segments.rotate()
+                f = self._open()
+        return f
+
+    def _run(self) -> None:
+        f = self._open()
+        dirty, last_sync = False, time.monotonic()
+        try:
+            while True:
+                try:
+                    first = self._q.get(timeout=self.fsync_interval_s if dirty else None)
+                except queue.Empty:
+                    self._sync(f); dirty, last_sync = False, time.monotonic()  # idle: settle the tail
+                    continue
+                batch = [first]
+                while len(batch) < self.batch_max:
+                    try:
+                        batch.append(self._q.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in batch
+                lines = [ln for ln in batch if ln is not None]
+                try:
+                    if lines:
+                        f = self._append(f, "".join(lines))
+                        if self.fsync == "every-batch" or (
+                                self.fsync == "interval" and time.monotonic() - last_sync >= self.fsync_interval_s):
+                            self._sync(f); dirty, last_sync = False, time.monotonic()
+                        else:
+                            dirty = self.fsync == "interval"
+                except Exception:
+                    log.exception("audit write to %s failed", self.path)
+                    with self._cv:
+                        self._m["errors"] += 1
+                with self._cv:
+                    self._written += len(lines)
+                    self._m["written"] += len(lines)
+                    self._m["batches"] += 1
+                    self._cv.notify_all()
+                if stop:
+                    return
+        finally:
+            if dirty:
+                self._sync(f)
+            f.close()
+            with self._cv:
+                self._cv.notify_all()
+
+    def _sync(self, f) -> None:
+        try:
+            os.fsync(f.fileno())
+            self._m["fsyncs"] += 1
+        except OSError:
+            log.exception("audit fsync of %s failed", self.path)
+
+
+_LEGACY_DONE = False
+
+def store() -> SegmentStore:
+    """
+    The segments behind AUDIT_FILE. On first use, an AUDIT_FILE written before
+    segments existed is sealed as the first segment and AUDIT_LEGACY_FILE is
+    imported as segment 000000.
+    """
+    global _LEGACY_DONE
+    st = get_store(AUDIT_FILE)
+    if not _LEGACY_DONE:
+        _LEGACY_DONE = True
+        try:
+            st.seal_existing()
+            st.import_legacy(AUDIT_LEGACY_FILE)
+        except OSError:
+            log.exception("importing pre-segment audit logs into %s failed", st.dir)
+    return st
+
+
+_WRITERS: Dict[Path, AuditWriter] = {}
+_WRITERS_PID: Optional[int] = None
+
+def get_writer(path: Path | str = AUDIT_FILE) -> AuditWriter:
+    """One writer per file (keyed by absolute path) per process."""
+    global _WRITERS_PID
+    key = Path(path).resolve()
+    with _LOCK:
+        if _WRITERS_PID != os.getpid():  # writer threads don't survive fork()
+            _WRITERS.clear()
+            _WRITERS_PID = os.getpid()
+        w = _WRITERS.get(key)
+        if w is None:
+            segments = store() if key == AUDIT_FILE.resolve() else None
+            w = _WRITERS[key] = AuditWriter(key, segments=segments)
+        return w
+
+def append_line(path: Path | str, line: str) -> bool:
+    """Queue one already-serialized NDJSON line for `path`."""
+    return get_writer(path).submit(line if line.endswith("\n") else line + "\n")
+
 def write_line(event: Dict[str, Any]) -> None:
     if "ts" not in event:
         event["ts"] = now_iso()
-    line = json.dumps(event, separators=(",", ":"), ensure_ascii=False) + "\n"
+    append_line(AUDIT_FILE, json.dumps(event, separators=(",", ":"), ensure_ascii=False))
+
+def flush(timeout: Optional[float] = 5.0) -> None:
     with _LOCK:
-        with AUDIT_FILE.open("a", encoding="utf-8") as f:
-            f.write(line)
-
-def tail(limit: int = 1000) -> List[Dict[str, Any]]:
-    if not AUDIT_FILE.exists():
-        return []
-    with AUDIT_FILE.open("r", encoding="utf-8") as f:
-        lines = [ln for ln in f if ln.strip()]
-    return [json.loads(ln) for ln in lines[-limit:]]
+        writers = list(_WRITERS.values()) if _WRITERS_PID == os.getpid() else []
+    for w in writers:
+        w.flush(timeout)
+
+def close(timeout: Optional[float] = 5.0) -> None:
+    with _LOCK:
+        writers = list(_WRITERS.values()) if _WRITERS_PID == os.getpid() else []
+        _WRITERS.clear()
+    for w in writers:
+        w.close(timeout)
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    with _LOCK:
+        writers = dict(_WRITERS) if _WRITERS_PID == os.getpid() else {}
+    return {str(p): w.stats() for p, w in writers.items()}
+
+atexit.register(close)
+
+def tail(limit: int = 1000, since: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Last `limit` events (oldest first) across segments, optionally only those at/after epoch `since`."""
+    flush()  # read-your-writes for events still queued
+    return store().tail(limit, since=since)
+
+def lookup(field: str, value: Any, limit: int = 1000) -> List[Dict[str, Any]]:
+    """Last `limit` events whose request_id/subject equals value, via the segment and sparse indexes."""
+    flush()
+    return store().lookup(field, value, limit=limit)
@@ -0,0 +1,114 @@
+# core/provenance/audit_span.py — one audit record per job instead of one line per event
+"""
+Inside `with job_span(job_id, subject):` every audit() call is buffered on
+the span (a contextvar, so it follows asyncio tasks and board threads
+started through api.board_executor) and nothing is written per event. On
+exit a single record is appended:
+
+    {"who": "job", "action": "job.span", "subject": <case id>, "job_id": ...,
+     "started_at": ..., "duration_ms": 812, "verbosity": "summary",
+     "events": [[0, "project_stack", "ingest_start"], [3, "project_stack", "ingest_done"], ...],
+     "summary": {"validator.start": {"count": 12, "first_ms": 40, "last_ms": 95}, ...}}
+
+An event is [ms since span start, who, action, subject, details]. Trailing
+nulls are dropped, and subject is null when it equals the span's subject.
+Events are listed in the order they happened. Summarized keys keep only a
+count and first/last times. Other subjects and request ids seen in the span,
+summarized events included, are listed in "subjects"/"request_ids"; the
+audit indexes and /v0/audit/query match those like the record's own fields.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import AUDIT_SPAN_MAX_EVENTS, AUDIT_SPANS, AUDIT_SUMMARIZE, AUDIT_VERBOSITY
+from core.provenance.audit_sink import now_iso, write_line
+
+VERBOSITY = ("full", "summary", "minimal")
+
+
+class AuditSpan:
+    def __init__(self, job_id: str, subject: Optional[str] = None, verbosity: str = AUDIT_VERBOSITY,
+                 summarize: Optional[str] = AUDIT_SUMMARIZE, max_events: int = AUDIT_SPAN_MAX_EVENTS) -> None:
+        self.job_id = job_id
+        self.subject = subject or job_id
+        self.verbosity = verbosity if verbosity in VERBOSITY else "summary"
+        self.summarize = {k.strip() for k in (summarize or "").split(",") if k.strip()}
+        self.max_events = max_events
+        self.started_at = now_iso()
+        self.attrs: Dict[str, Any] = {}
+        self.events: List[List[Any]] = []
+        self.summary: Dict[str, Dict[str, int]] = {}
+        self.subjects: Dict[str, None] = {}      # insertion-ordered sets
+        self.request_ids: Dict[str, None] = {}
+        self._t0 = perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, who: str, action: str, subject: Optional[str] = None, details: Optional[Dict[str, Any]] = None) -> None:
+        rel = int((perf_counter() - self._t0) * 1000)
+        key = f"{who}.{action}"
+        rid = (details or {}).get("request_id")
+        with self._lock:
+            if subject is not None and subject != self.subject:
+                self.subjects[subject] = None
+            if isinstance(rid, str):
+                self.request_ids[rid] = None
+            if (self.verbosity == "minimal" or (self.verbosity == "summary" and key in self.summarize)
+                    or len(self.events) >= self.max_events):
+                s = self.summary.setdefault(key, {"count": 0, "first_ms": rel, "last_ms": rel})
+                s["count"] += 1
+                s["last_ms"] = rel
+                return
+            ev = [rel, who, action, None if subject == self.subject else subject, details or None]
+            while ev[-1] is None:
+                ev.pop()
+            self.events.append(ev)
+
+    def annotate(self, **attrs: Any) -> None:
+        """Extra top-level fields for the span record (e.g. the job's final state)."""
+        self.attrs.update(attrs)
+
+    def record(self) -> Dict[str, Any]:
+        with self._lock:
+            rec: Dict[str, Any] = {
+                "who": "job", "action": "job.span", "subject": self.subject, "job_id": self.job_id,
+                "started_at": self.started_at, "duration_ms": int((perf_counter() - self._t0) * 1000),
+                "verbosity": self.verbosity, "events": list(self.events),
+            }
+            if self.summary:
+                rec["summary"] = {k: dict(v) for k, v in self.summary.items()}
+            if self.subjects:
+                rec["subjects"] = list(self.subjects)
+            if self.request_ids:
+                rec["request_ids"] = list(self.request_ids)
+        rec.update(self.attrs)
+        return rec
+
+
+_current: ContextVar[Optional[AuditSpan]] = ContextVar("audit_span", default=None)
+
+
+def current_span() -> Optional[AuditSpan]:
+    return _current.get()
+
+
+@contextmanager
+def job_span(job_id: str, subject: Optional[str] = None, **kw: Any) -> Iterator[Optional[AuditSpan]]:
+    """Buffer audit events for one job and write them as one record on exit (no-op if ALZ_AUDIT_SPANS=0)."""
+    if not AUDIT_SPANS:
+        yield None
+        return
+    span = AuditSpan(job_id, subject, **kw)
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.annotate(error=repr(e)[:500])
+        raise
+    finally:
+        _current.reset(token)
+        write_line(span.record())
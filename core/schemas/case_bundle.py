@@ -1,5 +1,5 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Literal, Any
 
 Modality = Literal["clinical", "imaging", "omics", "pharma", "environment"]
@@ -36,3 +36,60 @@ class CaseBundle(BaseModel):
     tags: list[dict] = Field(default_factory=list)
     provenance: dict = Field(default_factory=dict)
     qa_flags: list[QAFlag] = Field(default_factory=list)
+
+
+def _read_only(self, *_a: Any, **_k: Any) -> Any:
+    raise TypeError("FrozenCaseBundle is read-only; copy it (e.g. model_dump()) to modify")
+
+class _FrozenList(list):
+    """A list that refuses mutation; equal to, and printed like, the plain list."""
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):  # copies and pickles come back as plain, mutable lists
+        return list, (list(self),)
+
+class _FrozenDict(dict):
+    """A dict that refuses mutation; equal to, and printed like, the plain dict."""
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+_FROZEN_MODELS: dict[type, type] = {}
+
+def _frozen_model(cls: type[BaseModel]) -> type[BaseModel]:
+    """Frozen subclass of a nested model (same name, so reprs and prompts don't change)."""
+    if cls not in _FROZEN_MODELS:
+        _FROZEN_MODELS[cls] = type(cls.__name__, (cls,), {"model_config": ConfigDict(frozen=True),
+                                                          "__module__": cls.__module__})
+    return _FROZEN_MODELS[cls]
+
+def _deep_freeze(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return _frozen_model(type(value)).model_construct(
+            _fields_set=value.model_fields_set, **{k: _deep_freeze(v) for k, v in value})
+    if isinstance(value, dict):
+        return _FrozenDict((k, _deep_freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return _FrozenList(_deep_freeze(v) for v in value)
+    return value
+
+
+class FrozenCaseBundle(CaseBundle):
+    """
+    A normalized CaseBundle shared read-only by every board of a job.
+    Frozen all the way down: nested models reject assignment and the lists
+    and dicts inside (observation content, tags, provenance, ...) reject
+    mutation with TypeError, while still comparing and printing like the
+    plain containers. model_dump() returns ordinary mutable copies.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    @classmethod
+    def freeze(cls, cb: CaseBundle) -> "FrozenCaseBundle":
+        if isinstance(cb, cls):
+            return cb
+        # Already validated by ingest/normalize; no need to validate again.
+        return cls.model_construct(_fields_set=cb.model_fields_set, **{k: _deep_freeze(v) for k, v in cb})
@@ -0,0 +1,61 @@
+# core/store/archive.py — append-only, date-partitioned segments of archived jobs
+"""
+Each archived job is one gzip member appended to <JOB_ARCHIVE_DIR>/<YYYY-MM-DD>.ndjson.gz,
+partitioned by the job's created_at date. Concatenated members are still a valid
+gzip stream (zcat/gunzip read a whole segment), and each member decompresses on
+its own, so a tombstone only needs "<segment>:<offset>:<length>" to fetch one job.
+"""
+from __future__ import annotations
+
+import gzip, json, os, re, threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+from config import JOB_ARCHIVE_DIR
+
+ARCHIVE_DIR = JOB_ARCHIVE_DIR
+_SEGMENT = re.compile(r"^(\d{4}-\d{2}-\d{2}|undated)\.ndjson\.gz$")
+_LOCK = threading.Lock()
+
+
+def segment_for(created_at: str | None) -> str:
+    day = (created_at or "")[:10]
+    return f"{day}.ndjson.gz" if re.fullmatch(r"\d{4}-\d{2}-\d{2}", day) else "undated.ndjson.gz"
+
+
+def append(items: Sequence[Tuple[str, bytes]]) -> List[str]:
+    """
+    Append (created_at, JSON bytes) items and return one archive ref per item,
+    in order. Each touched segment is fsynced once before returning, so refs
+    are only handed out for data that is on disk.
+    """
+    refs: List[str] = [""] * len(items)
+    by_segment: Dict[str, List[int]] = {}
+    for i, (created_at, _) in enumerate(items):
+        by_segment.setdefault(segment_for(created_at), []).append(i)
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    with _LOCK:
+        for seg, idxs in by_segment.items():
+            with open(ARCHIVE_DIR / seg, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                for i in idxs:
+                    member = gzip.compress(items[i][1] + b"\n", compresslevel=6, mtime=0)
+                    f.write(member)
+                    refs[i] = f"{seg}:{offset}:{len(member)}"
+                    offset += len(member)
+                f.flush()
+                os.fsync(f.fileno())
+    return refs
+
+
+def read_raw(ref: str) -> bytes:
+    """JSON bytes of one archived job."""
+    seg, offset, length = ref.rsplit(":", 2)
+    if not _SEGMENT.match(seg):
+        raise ValueError(f"invalid archive ref {ref!r}")
+    with open(ARCHIVE_DIR / seg, "rb") as f:
+        f.seek(int(offset))
+        return gzip.decompress(f.read(int(length))).rstrip(b"\n")
+
+
+def read(ref: str) -> Dict[str, Any]:
+    return json.loads(read_raw(ref))
@@ -0,0 +1,83 @@
+# core/store/codec.py — compact encoding for the jobs table's JSON columns
+"""
+Stored values are either legacy JSON text (TEXT) or a BLOB whose first byte
+is a version tag:
+
+    0x00  plain UTF-8 JSON (small values, not worth compressing)
+    0x01  zlib-compressed UTF-8 JSON
+    0x02  zstd-compressed UTF-8 JSON (needs the optional `zstandard` package)
+
+The payload is always JSON so decode_raw() can hand stored bytes straight to
+an HTTP response without a parse/serialize round trip. orjson is used for
+serializing and parsing when installed.
+"""
+from __future__ import annotations
+
+import json, zlib
+from typing import Any, Optional
+
+from config import JOB_CODEC
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+TAG_PLAIN, TAG_ZLIB, TAG_ZSTD = 0x00, 0x01, 0x02
+MIN_COMPRESS = 256  # bytes of JSON below which compression rarely pays off
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. non-str dict keys; fall back to the stdlib
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data: bytes | str) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def encode(obj: Any, codec: str = JOB_CODEC) -> bytes | str:
+    """Serialize obj for storage with the configured codec ('json' keeps legacy text)."""
+    data = _dumps(obj)
+    if codec == "json":
+        return data.decode("utf-8")
+    if len(data) < MIN_COMPRESS:
+        return bytes([TAG_PLAIN]) + data
+    if codec == "zstd" and zstandard is not None:
+        return bytes([TAG_ZSTD]) + zstandard.ZstdCompressor(level=3).compress(data)
+    return bytes([TAG_ZLIB]) + zlib.compress(data, 6)
+
+
+def decode_raw(value: Optional[bytes | str]) -> Optional[bytes]:
+    """Stored value -> UTF-8 JSON bytes, without parsing."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.encode("utf-8") if value else None
+    tag, body = value[0], value[1:]
+    if tag == TAG_PLAIN:
+        return bytes(body)
+    if tag == TAG_ZLIB:
+        return zlib.decompress(body)
+    if tag == TAG_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("row is zstd-encoded but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError(f"unknown column codec tag {tag:#x}")
+
+
+def decode(value: Optional[bytes | str]) -> Any:
+    raw = decode_raw(value)
+    return _loads(raw) if raw else None
+
+
+def is_legacy(value: Any) -> bool:
+    return isinstance(value, str)
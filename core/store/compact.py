@@ -0,0 +1,53 @@
+# core/store/compact.py — one-shot re-encoding of legacy JSON text columns
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict
+
+from core.store import codec
+from core.store.db import write
+
+JSON_COLUMNS = ("input_json", "protocol_card_json", "boards_json", "validators_json")
+
+
+def compact_jobs(batch_size: int = 500, vacuum: bool = True) -> Dict[str, int]:
+    """
+    Rewrite legacy TEXT JSON cells with the configured codec (ALZ_JOB_CODEC),
+    batch_size rows per transaction, then optionally VACUUM to return the
+    freed pages to the filesystem. Safe to re-run; already-encoded cells are skipped.
+    """
+    stats = {"rows": 0, "cells": 0, "bytes_before": 0, "bytes_after": 0}
+    legacy = " OR ".join(f"typeof({c})='text'" for c in JSON_COLUMNS)
+    last_rowid = 0
+
+    def _batch(conn: sqlite3.Connection) -> int:
+        rows = conn.execute(
+            f"SELECT rowid, {', '.join(JSON_COLUMNS)} FROM jobs WHERE rowid > ? AND ({legacy}) ORDER BY rowid LIMIT ?",
+            (last_rowid, batch_size),
+        ).fetchall()
+        for r in rows:
+            sets, vals = [], []
+            for c in JSON_COLUMNS:
+                v = r[c]
+                if not codec.is_legacy(v) or not v:
+                    continue
+                new = codec.encode(codec.decode(v))
+                stats["cells"] += 1
+                stats["bytes_before"] += len(v.encode("utf-8"))
+                stats["bytes_after"] += len(new)
+                sets.append(f"{c}=?"); vals.append(new)
+            if sets:
+                conn.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE rowid=?", (*vals, r["rowid"]))
+                stats["rows"] += 1
+        return rows[-1]["rowid"] if rows else 0
+
+    if codec.JOB_CODEC == "json":
+        return stats  # nothing to convert to
+    while True:
+        last = write(_batch)
+        if not last:
+            break
+        last_rowid = last
+    if vacuum:
+        write(lambda conn: conn.execute("VACUUM"))
+    return stats
@@ -0,0 +1,102 @@
+# core/store/db.py — SQLite access for the job store: WAL, per-thread readers, one writer thread
+from __future__ import annotations
+
+import logging, os, queue, sqlite3, threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
+from config import DB_PATH, SQLITE_BUSY_TIMEOUT_MS, SQLITE_SYNCHRONOUS, SQLITE_WRITE_QUEUE
+
+log = logging.getLogger(__name__)
+T = TypeVar("T")
+
+_SYNC_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def connect(path: Path | str | None = None) -> sqlite3.Connection:
+    path = DB_PATH if path is None else path
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")  # takes effect on new files; see retention.enable_incremental_vacuum
+    conn.execute("PRAGMA journal_mode=WAL")  # readers never block the writer (and vice versa)
+    conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS if SQLITE_SYNCHRONOUS in _SYNC_MODES else 'NORMAL'}")
+    conn.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+    return conn
+
+
+# ---------------- Readers: one connection per thread ----------------
+_local = threading.local()
+
+
+def reader() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid():
+        conn = _local.conn = connect()
+        _local.pid = os.getpid()
+    return conn
+
+
+# ---------------- Writer: all mutations serialized on one thread ----------------
+_STOP = object()
+
+
+class _Writer(threading.Thread):
+    def __init__(self) -> None:
+        super().__init__(daemon=True, name="jobs-db-writer")
+        self.q: "queue.Queue[Any]" = queue.Queue(maxsize=SQLITE_WRITE_QUEUE)
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def run(self) -> None:
+        self.conn = connect()
+        while True:
+            item = self.q.get()
+            if item is _STOP:
+                self.conn.close()
+                return
+            fn, fut = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                with self.conn:  # one transaction per submitted operation
+                    result = fn(self.conn)
+                fut.set_result(result)
+            except BaseException as e:
+                fut.set_exception(e)
+
+
+_WRITER: Optional[_Writer] = None
+_WRITER_PID: Optional[int] = None
+_WRITER_LOCK = threading.Lock()
+
+
+def _writer() -> _Writer:
+    global _WRITER, _WRITER_PID
+    with _WRITER_LOCK:
+        # Threads do not survive fork(); a child process starts its own writer.
+        if _WRITER is None or _WRITER_PID != os.getpid() or not _WRITER.is_alive():
+            _WRITER, _WRITER_PID = _Writer(), os.getpid()
+            _WRITER.start()
+        return _WRITER
+
+
+def write(fn: Callable[[sqlite3.Connection], T]) -> T:
+    """Run fn(conn) in its own transaction on the writer thread and return its result."""
+    w = _writer()
+    if threading.current_thread() is w:
+        assert w.conn is not None
+        return fn(w.conn)
+    fut: "Future[T]" = Future()
+    w.q.put((fn, fut))
+    return fut.result()
+
+
+def close() -> None:
+    """Stop the writer thread after it drains queued writes."""
+    global _WRITER
+    with _WRITER_LOCK:
+        w, _WRITER = _WRITER, None
+    if w is not None and w.is_alive() and _WRITER_PID == os.getpid():
+        w.q.put(_STOP)
+        w.join(timeout=10)
@@ -2,20 +2,22 @@
 # core/store/jobs_sqlite.py
 from __future__ import annotations
 
-import json, sqlite3
+import atexit, base64, json, sqlite3, threading, time
 from datetime import datetime, UTC
-from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
-from config import DB_PATH
+from config import JOB_FLUSH_MAX, JOB_FLUSH_MS, JOB_LEASE_S, JOB_MAX_ATTEMPTS, JOB_WRITE_BEHIND
+from core.store import archive, codec
+from core.store.db import reader, write
+from core.store.notify import hub
 
-Path(DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+TERMINAL_STATES = ("done", "error")
 
-_CONN = sqlite3.connect(DB_PATH, check_same_thread=False)
-_CONN.row_factory = sqlite3.Row
+# Reads use a per-thread connection; every mutation goes through db.write(),
+# which runs it as one transaction on the store's single writer thread.
 
-def _init():
-    _CONN.execute("""
+def _init(conn: sqlite3.Connection) -> None:
+    conn.execute("""
     CREATE TABLE IF NOT EXISTS jobs (
       id TEXT PRIMARY KEY,
       state TEXT,
@@ -28,73 +30,407 @@ def _init():
       error TEXT
     )
     """)
-    _CONN.commit()
-_init()
+    _migrate(conn)
+    for ddl in _INDEXES:
+        conn.execute(ddl)
+
+# Columns added after the original schema; ALTERed into existing var/jobs.db files.
+_MIGRATIONS = {
+    "lease_owner": "TEXT",
+    "lease_expires_at": "REAL",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "input_hash": "TEXT",
+    "idempotency_key": "TEXT",
+    "archived_ref": "TEXT",  # set on tombstones; see core.store.retention
+    "timings_json": "TEXT",
+}
+
+# Secondary indexes; CREATE IF NOT EXISTS also adds them to existing databases.
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_jobs_state_created ON jobs(state, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_created ON jobs(created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_input_hash ON jobs(input_hash, created_at)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_idempotency_key ON jobs(idempotency_key)"
+    " WHERE idempotency_key IS NOT NULL",
+)
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    have = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+    for col, decl in _MIGRATIONS.items():
+        if col not in have:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {col} {decl}")
+write(_init)
 
 def upsert_job(rec: Dict[str, Any]) -> None:
-    _CONN.execute(
-        """INSERT OR IGNORE INTO jobs
-              (id, state, created_at, audit_ref, input_json)
-              VALUES (?, ?, ?, ?, ?)""",
-        (
-            rec["id"],
-            rec.get("state") or "queued",
-            rec.get("created_at") or datetime.now(UTC).isoformat(),
-            rec.get("audit_ref"),
-            json.dumps(rec.get("input", {})),
-        ),
-    )
-    update_job(
-        rec["id"],
+    # Always synchronous: an accepted job must be durable before we return its id.
+    write(lambda conn: _upsert(conn, rec["id"], rec, dict(
         state=rec.get("state"),
         audit_ref=rec.get("audit_ref"),
         protocol_card=rec.get("protocol_card"),
         boards=rec.get("boards"),
         validators=rec.get("validators"),
         error=rec.get("error"),
-    )
+    )))
+
+class IdempotencyConflict(ValueError):
+    """An Idempotency-Key was reused with a different payload."""
+
+def _dedup_insert(conn: sqlite3.Connection, rec: Dict[str, Any], ttl_s: Optional[float]) -> Tuple[str, bool]:
+    key, h = rec.get("idempotency_key"), rec.get("input_hash")
+    if key:
+        r = conn.execute("SELECT id, input_hash FROM jobs WHERE idempotency_key=?", (key,)).fetchone()
+        if r:
+            if h and r["input_hash"] and r["input_hash"] != h:
+                raise IdempotencyConflict(f"Idempotency-Key {key!r} was used with a different payload")
+            return r["id"], False
+    if h and ttl_s is not None:
+        cutoff = datetime.fromtimestamp(time.time() - ttl_s, UTC).isoformat()
+        r = conn.execute(
+            "SELECT id FROM jobs WHERE input_hash=? AND created_at>=?"
+            " AND state!='error' ORDER BY created_at DESC LIMIT 1",
+            (h, cutoff),
+        ).fetchone()
+        if r:
+            return r["id"], False
+    _upsert(conn, rec["id"], rec, dict(state=rec.get("state"), audit_ref=rec.get("audit_ref")))
+    return rec["id"], True
+
+def create_job_dedup(rec: Dict[str, Any], ttl_s: Optional[float] = None) -> Tuple[str, bool]:
+    """
+    Insert rec unless an equivalent job exists; returns (job_id, created).
+
+    A job with the same rec["idempotency_key"] always wins. Otherwise, when
+    ttl_s is given, a non-failed job with the same rec["input_hash"] created
+    within the last ttl_s seconds is returned. Lookup and insert run in one
+    writer transaction, so concurrent duplicates cannot both be inserted.
+    Raises IdempotencyConflict if the key was used with a different payload.
+    """
+    return write(lambda conn: _dedup_insert(conn, rec, ttl_s))
+
+def create_jobs_dedup(recs: Sequence[Dict[str, Any]],
+                      ttl_s: Optional[float] = None) -> List[Union[Tuple[str, bool], IdempotencyConflict]]:
+    """
+    create_job_dedup for many records in one writer transaction. Results are
+    aligned with recs; an item whose key conflicts gets its IdempotencyConflict
+    instead of failing the batch. Later items see earlier ones, so duplicates
+    within the batch collapse too.
+    """
+    def _txn(conn: sqlite3.Connection) -> List[Union[Tuple[str, bool], IdempotencyConflict]]:
+        out: List[Union[Tuple[str, bool], IdempotencyConflict]] = []
+        for rec in recs:
+            try:
+                out.append(_dedup_insert(conn, rec, ttl_s))
+            except IdempotencyConflict as e:
+                out.append(e)
+        return out
+    return write(_txn) if recs else []
 
 def update_job(job_id: str, **kw: Any) -> None:
-    cur = _CONN.execute("SELECT 1 FROM jobs WHERE id=?", (job_id,)).fetchone()
-    if not cur:
-        _CONN.execute(
-            "INSERT INTO jobs (id, state, created_at) VALUES (?, ?, ?)",
-            (job_id, kw.get("state") or "queued", datetime.now(UTC).isoformat()),
-        )
-    sets, vals = [], []
-    if "state" in kw and kw["state"] is not None:
-        sets.append("state=?"); vals.append(kw["state"])
-    if "audit_ref" in kw and kw["audit_ref"] is not None:
-        sets.append("audit_ref=?"); vals.append(kw["audit_ref"])
-    if "protocol_card" in kw and kw["protocol_card"] is not None:
-        sets.append("protocol_card_json=?"); vals.append(json.dumps(kw["protocol_card"])) 
-    if "boards" in kw and kw["boards"] is not None:
-        sets.append("boards_json=?"); vals.append(json.dumps(kw["boards"])) 
-    if "validators" in kw and kw["validators"] is not None:
-        sets.append("validators_json=?"); vals.append(json.dumps(kw["validators"])) 
-    if "error" in kw and kw["error"] is not None:
-        sets.append("error=?"); vals.append(kw["error"]) 
-    if sets:
-        sql = f"UPDATE jobs SET {', '.join(sets)} WHERE id=?"
-        vals.append(job_id)
-        _CONN.execute(sql, tuple(vals))
-        _CONN.commit()
-
-def get_job(job_id: str) -> Optional[Dict[str, Any]]:
-    r = _CONN.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
-    if not r:
-        return None
-    def _load(col: str):
-        v = r[col]
-        return json.loads(v) if v else None
+    if JOB_WRITE_BEHIND:
+        _write_behind.add(job_id, kw)  # readers settle pending updates, so waking them now is safe
+    else:
+        write(lambda conn: _upsert(conn, job_id, None, kw))
+    hub.publish(job_id)
+
+_JSON_COLS = {"protocol_card": "protocol_card_json", "boards": "boards_json", "validators": "validators_json",
+              "timings": "timings_json"}
+_UPDATABLE = ("state", "audit_ref", "protocol_card", "boards", "validators", "error", "timings")
+
+_UPSERT_SQL = """INSERT INTO jobs
+      (id, state, created_at, audit_ref, input_json, protocol_card_json, boards_json, validators_json, error,
+       input_hash, idempotency_key, timings_json)
+      VALUES (:id, COALESCE(:state, 'queued'), :created_at, :audit_ref, :input_json,
+              :protocol_card, :boards, :validators, :error, :input_hash, :idempotency_key, :timings)
+   ON CONFLICT(id) DO UPDATE SET
+      state=COALESCE(:state, state),
+      audit_ref=COALESCE(:audit_ref, audit_ref),
+      protocol_card_json=COALESCE(:protocol_card, protocol_card_json),
+      boards_json=COALESCE(:boards, boards_json),
+      validators_json=COALESCE(:validators, validators_json),
+      error=COALESCE(:error, error),
+      timings_json=COALESCE(:timings, timings_json)"""
+
+def _upsert_params(job_id: str, rec: Optional[Dict[str, Any]], kw: Dict[str, Any]) -> Dict[str, Any]:
+    rec = rec or {}
+    vals = {}
+    for k in _UPDATABLE:
+        v = kw.get(k)
+        vals[k] = codec.encode(v) if (k in _JSON_COLS and v is not None) else v
     return {
-        "id": r["id"],
-        "state": r["state"],
-        "created_at": r["created_at"],
-        "audit_ref": r["audit_ref"],
-        "input": _load("input_json") or {},
-        "protocol_card": _load("protocol_card_json"),
-        "boards": _load("boards_json"),
-        "validators": _load("validators_json") or [],
-        "error": r["error"],
+        "id": job_id,
+        "created_at": rec.get("created_at") or datetime.now(UTC).isoformat(),
+        "input_json": codec.encode(rec["input"]) if "input" in rec else None,
+        "input_hash": rec.get("input_hash"),
+        "idempotency_key": rec.get("idempotency_key"),
+        **vals,
     }
+
+def _upsert(conn: sqlite3.Connection, job_id: str, rec: Optional[Dict[str, Any]], kw: Dict[str, Any]) -> None:
+    """
+    One INSERT ... ON CONFLICT DO UPDATE per job. created_at/input_json are only
+    written on insert; other columns are overwritten when a non-None value is given.
+    """
+    conn.execute(_UPSERT_SQL, _upsert_params(job_id, rec, kw))
+
+# ---------------- Write-behind (ALZ_JOB_WRITE_BEHIND) ----------------
+class _WriteBehind:
+    """
+    Coalesces update_job() calls per job id and commits them in one transaction
+    every JOB_FLUSH_MS or JOB_FLUSH_MAX pending jobs, whichever comes first.
+    Reads of a job with pending updates flush first, so get_job is never stale.
+    Updates not yet flushed are lost if the process dies; the job lease then
+    expires and the job is re-run.
+    """
+
+    def __init__(self, interval_s: float, max_pending: int) -> None:
+        self.interval_s = interval_s
+        self.max_pending = max(1, max_pending)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._cv = threading.Condition()
+        self._flush_lock = threading.Lock()  # held from swap until commit
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+
+    def add(self, job_id: str, kw: Dict[str, Any]) -> None:
+        with self._cv:
+            merged = self._pending.setdefault(job_id, {})
+            merged.update({k: v for k, v in kw.items() if v is not None})
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="jobs-write-behind")
+                self._thread.start()
+            if len(self._pending) >= self.max_pending:
+                self._cv.notify()
+
+    def settle(self, job_id: Optional[str] = None) -> None:
+        """Make pending updates (for job_id, or all) visible to readers."""
+        with self._cv:
+            pending = bool(self._pending) if job_id is None else job_id in self._pending
+        if pending:
+            self.flush()
+        else:
+            with self._flush_lock:  # wait out an in-flight batch that may hold this job
+                pass
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._cv:
+                batch, self._pending = self._pending, {}
+            if batch:
+                write(lambda conn: conn.executemany(_UPSERT_SQL, [_upsert_params(jid, None, kw) for jid, kw in batch.items()]))
+                self.batches += 1
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while not self._pending:
+                    self._cv.wait()
+                if len(self._pending) < self.max_pending:
+                    self._cv.wait(self.interval_s)
+            self.flush()
+
+_write_behind = _WriteBehind(JOB_FLUSH_MS / 1000, JOB_FLUSH_MAX)
+atexit.register(_write_behind.flush)
+
+def flush_jobs() -> None:
+    """Commit any write-behind updates now (shutdown, tests, tooling)."""
+    _write_behind.flush()
+
+# ---------------- Queue: claim / lease ----------------
+def claim_job(worker_id: str, lease_s: float = JOB_LEASE_S, job_id: Optional[str] = None,
+              created_before: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Atomically move one job to 'running' under a lease owned by worker_id.
+    Picks the oldest 'queued' job, or a 'running' job whose lease expired
+    (its worker died). Pass job_id to claim that job only, created_before
+    (stored isoformat) to skip newer jobs. Returns the job record, or None
+    when nothing is claimable.
+    """
+    if JOB_WRITE_BEHIND:
+        _write_behind.settle()
+    now = time.time()
+    where = "(state='queued' OR (state='running' AND lease_expires_at < ?)) AND attempts < ?"
+    args: list[Any] = [now, JOB_MAX_ATTEMPTS]
+    if job_id is not None:
+        where += " AND id=?"
+        args.append(job_id)
+    if created_before is not None:
+        where += " AND created_at<?"
+        args.append(created_before)
+
+    def _op(conn: sqlite3.Connection) -> Optional[str]:
+        _fail_exhausted(conn, now)
+        row = conn.execute(
+            f"""UPDATE jobs
+                  SET state='running', lease_owner=?, lease_expires_at=?, attempts=attempts+1
+                WHERE id = (SELECT id FROM jobs WHERE {where} ORDER BY created_at LIMIT 1)
+            RETURNING id""",
+            (worker_id, now + lease_s, *args),
+        ).fetchone()
+        return row["id"] if row else None
+
+    claimed = write(_op)
+    if not claimed:
+        return None
+    hub.publish(claimed)
+    return get_job(claimed)
+
+def renew_lease(job_id: str, worker_id: str, lease_s: float = JOB_LEASE_S) -> bool:
+    """Extend a held lease. False means the lease was lost to another worker."""
+    return write(lambda conn: conn.execute(
+        "UPDATE jobs SET lease_expires_at=? WHERE id=? AND state='running' AND lease_owner=?",
+        (time.time() + lease_s, job_id, worker_id),
+    ).rowcount == 1)
+
+def _fail_exhausted(conn: sqlite3.Connection, now: float) -> None:
+    """Jobs whose lease expired after the last allowed attempt are marked as errors."""
+    conn.execute(
+        """UPDATE jobs SET state='error', error='lease expired after max attempts'
+            WHERE state='running' AND lease_expires_at < ? AND attempts >= ?""",
+        (now, JOB_MAX_ATTEMPTS),
+    )
+
+# Public field name -> (column, is JSON, default when NULL)
+_FIELDS: Dict[str, Tuple[str, bool, Any]] = {
+    "id": ("id", False, None),
+    "state": ("state", False, None),
+    "created_at": ("created_at", False, None),
+    "audit_ref": ("audit_ref", False, None),
+    "input": ("input_json", True, {}),
+    "protocol_card": ("protocol_card_json", True, None),
+    "boards": ("boards_json", True, None),
+    "validators": ("validators_json", True, []),
+    "error": ("error", False, None),
+    "attempts": ("attempts", False, None),
+    "timings": ("timings_json", True, None),
+}
+
+def _row_to_dict(r: sqlite3.Row, fields: Sequence[str]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for f in fields:
+        col, is_json, default = _FIELDS[f]
+        v = r[col]
+        if is_json:
+            v = codec.decode(v)  # BLOB (tagged, see core.store.codec) or legacy JSON text
+        out[f] = default if v is None and default is not None else v
+    return out
+
+def row_to_record(r: sqlite3.Row) -> Dict[str, Any]:
+    """Every public field of a full (SELECT *) jobs row, decoded; the shape the archive stores."""
+    return _row_to_dict(r, list(_FIELDS))
+
+def _check_fields(fields: Optional[Sequence[str]]) -> List[str]:
+    fields = list(fields or _FIELDS)
+    unknown = [f for f in fields if f not in _FIELDS]
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+    return fields
+
+def _select_one(job_id: str, fields: List[str]) -> Optional[sqlite3.Row]:
+    if JOB_WRITE_BEHIND:
+        _write_behind.settle(job_id)
+    cols = sorted({_FIELDS[f][0] for f in fields} | {"archived_ref"})
+    return reader().execute(f"SELECT {', '.join(cols)} FROM jobs WHERE id=?", (job_id,)).fetchone()
+
+def _archived(r: sqlite3.Row, fields: List[str]) -> Optional[Dict[str, Any]]:
+    """The archived record behind a tombstone, if any requested field lives only in the archive."""
+    if not r["archived_ref"] or not any(_FIELDS[f][1] for f in fields):
+        return None
+    rec = archive.read(r["archived_ref"])
+    return {f: rec.get(f, _FIELDS[f][2]) for f in fields}
+
+def get_job(job_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    """The job record, or only `fields` of it (only those columns are read and decoded)."""
+    fields = _check_fields(fields)
+    r = _select_one(job_id, fields)
+    if not r:
+        return None
+    return _archived(r, fields) or _row_to_dict(r, fields)
+
+def get_job_raw(job_id: str, fields: Optional[Sequence[str]] = None) -> Optional[bytes]:
+    """
+    Like get_job, but returns the JSON document as bytes. Stored JSON columns
+    are spliced in as-is (decompressed, never parsed), so the cost does not
+    depend on how large the protocol card or board outputs are.
+    """
+    fields = _check_fields(fields)
+    r = _select_one(job_id, fields)
+    if not r:
+        return None
+    rec = _archived(r, fields)
+    if rec is not None:
+        return json.dumps(rec, separators=(",", ":")).encode()
+    parts = []
+    for f in fields:
+        col, is_json, default = _FIELDS[f]
+        if is_json:
+            v = codec.decode_raw(r[col]) or json.dumps(default).encode()
+        else:
+            v = json.dumps(r[col]).encode()
+        parts.append(json.dumps(f).encode() + b":" + v)
+    return b"{" + b",".join(parts) + b"}"
+
+# ---------------- Listing (keyset pagination) ----------------
+LIST_FIELDS = ("id", "state", "created_at", "error")
+
+def _encode_cursor(created_at: str, job_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, job_id]).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(created_at), str(job_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+def _utc_bound(value: str, name: str) -> str:
+    """ISO date/datetime (Z, offsets or naive-as-UTC) -> the stored UTC isoformat."""
+    v = value.strip()
+    if v[-1:] in ("z", "Z"):
+        v = v[:-1] + "+00:00"
+    try:
+        ts = datetime.fromisoformat(v)
+    except ValueError:
+        raise ValueError(f"invalid {name}: expected an ISO date or datetime")
+    return (ts.replace(tzinfo=UTC) if ts.tzinfo is None else ts.astimezone(UTC)).isoformat()
+
+def list_jobs(
+    state: Optional[str] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Newest-first page of jobs plus the cursor for the next page (None at the end).
+    Filters: exact state, created_at >= created_after, created_at < created_before
+    (ISO dates/datetimes, normalised to UTC; ValueError if unparseable).
+    Keyset pagination on (created_at, id) keeps every page O(limit) via the
+    ix_jobs_* indexes. `fields` projects the returned (and read) columns;
+    JSON fields of archived jobs are read back from the archive, as in get_job.
+    """
+    fields = _check_fields(fields or LIST_FIELDS)
+    cols = {_FIELDS[f][0] for f in fields} | {"id", "created_at", "archived_ref"}
+
+    where, args = [], []  # type: List[str], List[Any]
+    if state:
+        where.append("state=?"); args.append(state)
+    if created_after:
+        where.append("created_at>=?"); args.append(_utc_bound(created_after, "created_after"))
+    if created_before:
+        where.append("created_at<?"); args.append(_utc_bound(created_before, "created_before"))
+    if cursor:
+        where.append("(created_at, id) < (?, ?)"); args.extend(_decode_cursor(cursor))
+
+    if JOB_WRITE_BEHIND:
+        _write_behind.settle()
+    sql = f"SELECT {', '.join(sorted(cols))} FROM jobs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    rows = reader().execute(sql, (*args, limit + 1)).fetchall()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if more else None
+    return [_archived(r, fields) or _row_to_dict(r, fields) for r in rows], next_cursor
@@ -0,0 +1,85 @@
+# core/store/notify.py — in-process notifications for job updates
+"""
+update_job/claim_job publish the job id; SSE and long-poll handlers subscribe
+and wake immediately instead of polling the database. Only writes made in
+this process are seen, so waiters still re-read the job every
+JOB_EVENTS_POLL_S to pick up updates from api.worker processes.
+"""
+from __future__ import annotations
+
+import asyncio, threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
+from config import JOB_EVENTS_MAX_SUBSCRIBERS
+
+
+class TooManySubscribers(RuntimeError):
+    pass
+
+
+class Subscription:
+    """One waiter on the event loop that created it; publish() may come from any thread."""
+
+    def __init__(self, job_id: str) -> None:
+        self.job_id = job_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def _notify(self) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # loop already closed; the subscriber is going away
+
+    async def wait(self, timeout: float) -> bool:
+        """True if the job was updated since the last wait, False on timeout."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+class JobHub:
+    def __init__(self, max_subscribers: int = JOB_EVENTS_MAX_SUBSCRIBERS) -> None:
+        self.max_subscribers = max_subscribers
+        self._subs: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return self._count
+
+    def full(self) -> bool:
+        return self._count >= self.max_subscribers
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[Subscription]:
+        sub = Subscription(job_id)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers(f"{self._count} job subscribers already open")
+            self._subs.setdefault(job_id, set()).add(sub)
+            self._count += 1
+        try:
+            yield sub
+        finally:
+            with self._lock:
+                subs = self._subs.get(job_id)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subs[job_id]
+                self._count -= 1
+
+    def publish(self, job_id: str) -> None:
+        with self._lock:
+            subs = list(self._subs.get(job_id, ()))
+        for sub in subs:
+            sub._notify()
+
+
+hub = JobHub()
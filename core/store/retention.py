@@ -0,0 +1,139 @@
+# core/store/retention.py — move old terminal jobs out of the hot table
+"""
+Policy (ALZ_JOB_RETENTION): "done=30,error=7" archives done jobs older than 30
+days and failed ones older than 7. Archived jobs are written to
+core.store.archive segments. Each one's row then becomes a tombstone: id,
+state, timestamps, error, hashes and archived_ref stay, and the JSON columns
+are cleared. get_job resolves tombstones from the archive transparently.
+
+Freed pages go back to the filesystem through PRAGMA incremental_vacuum in
+small steps. A full VACUUM is only needed once, to switch an existing
+database to auto_vacuum=INCREMENTAL.
+"""
+from __future__ import annotations
+
+import json, logging, threading
+from datetime import datetime, timedelta, UTC
+from typing import Dict, Optional
+
+from config import JOB_RETENTION, JOB_RETENTION_INTERVAL_S, JOB_VACUUM_PAGES
+from core.store import archive
+from core.store.db import reader, write
+from core.store.jobs import TERMINAL_STATES, flush_jobs, row_to_record
+
+log = logging.getLogger(__name__)
+
+
+def parse_policy(spec: str) -> Dict[str, float]:
+    """'done=30,error=7' -> {'done': 30.0, 'error': 7.0} (days)."""
+    policy: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        state, _, days = part.partition("=")
+        state = state.strip()
+        if state not in TERMINAL_STATES:
+            raise ValueError(f"retention only applies to terminal states {TERMINAL_STATES}, got {state!r}")
+        policy[state] = float(days)
+    return policy
+
+
+def archive_jobs(
+    policy: Optional[Dict[str, float]] = None,
+    now: Optional[datetime] = None,
+    batch_size: int = 200,
+) -> Dict[str, int]:
+    """Archive every job matching the policy, batch_size rows per transaction."""
+    policy = parse_policy(JOB_RETENTION) if policy is None else policy
+    now = now or datetime.now(UTC)
+    stats = {"archived": 0, "bytes": 0}
+    flush_jobs()  # terminal updates still in the write-behind buffer must land first
+    for state, days in policy.items():
+        cutoff = (now - timedelta(days=days)).isoformat()
+        while True:
+            rows = reader().execute(
+                "SELECT * FROM jobs WHERE state=? AND created_at<? AND archived_ref IS NULL"
+                " ORDER BY created_at, id LIMIT ?",
+                (state, cutoff, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            items = [(r["created_at"], json.dumps(row_to_record(r), separators=(",", ":")).encode())
+                     for r in rows]
+            refs = archive.append(items)
+
+            def _tombstone(conn, rows=rows, refs=refs) -> int:
+                n = 0
+                for r, ref in zip(rows, refs):
+                    # state guard: a job re-run since we read it keeps its row
+                    n += conn.execute(
+                        """UPDATE jobs SET archived_ref=?, input_json=NULL, protocol_card_json=NULL,
+                                  boards_json=NULL, validators_json=NULL
+                            WHERE id=? AND state=? AND archived_ref IS NULL""",
+                        (ref, r["id"], state),
+                    ).rowcount
+                return n
+
+            stats["archived"] += write(_tombstone)
+            stats["bytes"] += sum(len(b) for _, b in items)
+    return stats
+
+
+def vacuum_step(pages: int = JOB_VACUUM_PAGES) -> int:
+    """Return up to `pages` free pages to the filesystem; returns how many remain free."""
+    def _step(conn) -> int:
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return write(_step)
+
+
+def enable_incremental_vacuum() -> bool:
+    """Switch an existing database to auto_vacuum=INCREMENTAL (one full VACUUM). True if converted."""
+    if reader().execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    def _convert(conn) -> None:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    write(_convert)
+    return True
+
+
+def sweep() -> Dict[str, int]:
+    stats = archive_jobs()
+    stats["free_pages"] = vacuum_step()
+    return stats
+
+
+class _Sweeper(threading.Thread):
+    def __init__(self, interval_s: float) -> None:
+        super().__init__(daemon=True, name="jobs-retention")
+        self.interval_s = interval_s
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.interval_s):
+            try:
+                stats = sweep()
+                if stats["archived"]:
+                    log.info("retention sweep: %s", stats)
+            except Exception:
+                log.exception("retention sweep failed")
+
+
+_SWEEPER: Optional[_Sweeper] = None
+
+
+def start(interval_s: float = JOB_RETENTION_INTERVAL_S) -> bool:
+    """Start the background sweeper if a retention policy is configured."""
+    global _SWEEPER
+    if not parse_policy(JOB_RETENTION) or interval_s <= 0 or _SWEEPER is not None:
+        return False
+    _SWEEPER = _Sweeper(interval_s)
+    _SWEEPER.start()
+    return True
+
+
+def stop() -> None:
+    global _SWEEPER
+    if _SWEEPER is not None:
+        _SWEEPER.stop_event.set()
+        _SWEEPER.join(timeout=10)
+        _SWEEPER = None
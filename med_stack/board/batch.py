@@ -0,0 +1,57 @@
+# med_stack/board/batch.py — one model call for several LLM roles of a case
+from __future__ import annotations
+
+from types import ModuleType
+from typing import Any, Dict, Sequence
+
+from core.models.provider import get_runner
+from core.schemas.case_bundle import CaseBundle
+from med_stack.board.roles import env_ai, genomics_ai, imaging_ai, pharmaco_ai
+from med_stack.schemas.role_output import RoleOutput
+
+# Board target name -> role module. Each module exposes ROLE, MODALITY,
+# observations(case), wrap(out) and analyze(case).
+BATCHABLE: Dict[str, ModuleType] = {
+    "imaging": imaging_ai,
+    "genomics": genomics_ai,
+    "pharmaco": pharmaco_ai,
+    "env": env_ai,
+}
+
+SYSTEM = (
+    "You are a panel of specialist AIs. Respond in strict JSON: one top-level key per role "
+    "named in the prompt, each mapping to an object with keys: findings, notes."
+)
+
+
+def build_prompt(case: CaseBundle, roles: Sequence[ModuleType]) -> str:
+    sections = [f"### Role: {m.ROLE}\nObservations: {m.observations(case)}" for m in roles]
+    return f"Modalities: {case.modalities}\nRoles: {[m.ROLE for m in roles]}\n\n" + "\n\n".join(sections)
+
+
+def analyze_batch(case: CaseBundle, targets: Sequence[str], fallback: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Ask every selected role in a single prompt and return {target: role output}
+    in the same shape as each role's analyze(). Sections that are missing or
+    fail RoleOutput validation are re-asked through that role's own analyze(),
+    one after another; with fallback=False they are left out instead, so the
+    caller can re-run them concurrently (see api.board_runners.run_selected).
+    """
+    roles = [(t, BATCHABLE[t]) for t in targets if t in BATCHABLE]
+    if not roles:
+        return {}
+    out = get_runner().chat_json(SYSTEM, build_prompt(case, [m for _, m in roles]))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for target, mod in roles:
+        section = out.get(mod.ROLE) if isinstance(out, dict) else None
+        try:
+            if not isinstance(section, dict) or not ({"findings", "notes"} & section.keys()):
+                raise ValueError(f"no usable section for {mod.ROLE}")
+            RoleOutput.model_validate(section)
+        except Exception:
+            if fallback:
+                results[target] = mod.analyze(case)  # per-role fallback for this section only
+            continue
+        results[target] = mod.wrap(section)
+    return results
@@ -1,14 +1,19 @@
-from core.models.provider import ModelRunner
+from core.models.provider import get_runner
 from core.schemas.case_bundle import CaseBundle
 from med_stack.schemas.role_output import RoleOutput
-def analyze(case: CaseBundle) -> dict:
-    runner = ModelRunner()
-    system = "You are a specialist AI. Respond in strict JSON with keys: findings, notes."
-    relevant = [o.content for o in case.observations if o.modality == "imaging"]
-    prompt = f"Role: imaging_ai\nModalities: {case.modalities}\nObservations: {relevant}"
-    out = runner.chat_json(system, prompt)
+ROLE = "imaging_ai"
+MODALITY = "imaging"
+SYSTEM = "You are a specialist AI. Respond in strict JSON with keys: findings, notes."
+def observations(case: CaseBundle) -> list:
+    return [o.content for o in case.observations if o.modality == MODALITY]
+def wrap(out) -> dict:
+    """Validate a model reply into this role's output shape."""
     try:
         ro = RoleOutput.model_validate(out)
-        return {"role": "imaging_ai", "raw": ro.model_dump()}
+        return {"role": ROLE, "raw": ro.model_dump()}
     except Exception:
-        return {"role": "imaging_ai", "raw": out}
+        return {"role": ROLE, "raw": out}
+def analyze(case: CaseBundle) -> dict:
+    runner = get_runner()
+    prompt = f"Role: {ROLE}\nModalities: {case.modalities}\nObservations: {observations(case)}"
+    return wrap(runner.chat_json(SYSTEM, prompt))
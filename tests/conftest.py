@@ -0,0 +1,7 @@
+# Keep test runs off the checked-in var/ and the real audit trail: config reads these at import.
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="alz-tests-")
+os.environ.setdefault("ALZ_VAR_DIR", os.path.join(_TMP, "var"))
+os.environ.setdefault("ALZ_AUDIT_FILE", os.path.join(_TMP, "logs", "audit.ndjson"))
@@ -0,0 +1,49 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from core.provenance import audit_index
+from core.provenance.audit_index import SparseIndex, parse_ts, tail_events
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _write(path, start, n, **extra):
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(start, start + n):
+            ev = {"ts": (T0 + timedelta(seconds=10 * i)).isoformat(), "action": "a", "i": i,
+                  "subject": f"case-{i % 3}", **extra}
+            if i % 50 == 0:
+                ev["request_id"] = f"req-{i}"
+            f.write(json.dumps(ev) + "\n")
+
+
+def test_tail_reads_backwards_and_stops_at_since(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_index, "BLOCK", 256)
+    path = tmp_path / "audit.ndjson"
+    _write(path, 0, 500)
+    with open(path, "a") as f:
+        f.write('{"ts": "torn')  # a write in progress is never returned
+    assert [e["i"] for e in tail_events(path, 3)] == [497, 498, 499]
+    since = parse_ts((T0 + timedelta(seconds=10 * 495)).isoformat())
+    assert [e["i"] for e in tail_events(path, 100, since=since)] == [495, 496, 497, 498, 499]
+
+
+def test_sparse_index_lookups_refresh_and_reload(tmp_path):
+    path = tmp_path / "audit.ndjson"
+    _write(path, 0, 300)
+    idx = SparseIndex(path, bucket_s=60)
+    idx.refresh()
+    assert len(idx.bucket_keys) == 50  # 6 events per 60s bucket
+    assert [e["i"] for e in idx.lookup("request_id", "req-250")] == [250]
+    assert len(list(idx.lookup("subject", "case-1"))) == 100
+
+    ts = parse_ts((T0 + timedelta(seconds=10 * 123)).isoformat())
+    off = idx.offset_for_time(ts)
+    first = json.loads(path.read_bytes()[off:].split(b"\n", 1)[0])
+    assert first["i"] <= 123 and 123 - first["i"] < 6
+
+    _write(path, 300, 60)  # only the appended bytes get scanned
+    assert [e["i"] for e in idx.lookup("request_id", "req-350")] == [350]
+
+    reloaded = SparseIndex(path, bucket_s=60)
+    assert reloaded.end == idx.end and reloaded.keys == idx.keys
@@ -0,0 +1,111 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.provenance.audit_segments import SegmentStore
+from core.provenance.audit_sink import AuditWriter
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _event(i):
+    ev = {"ts": (T0 + timedelta(seconds=i)).isoformat(), "action": "a", "i": i, "subject": f"s-{i % 4}"}
+    if i % 97 == 0:
+        ev["request_id"] = f"req-{i}"
+    return json.dumps(ev) + "\n"
+
+
+def test_rotates_into_block_compressed_segments_and_reads_across_them(tmp_path):
+    active = tmp_path / "audit.ndjson"
+    store = SegmentStore(active, max_bytes=4000, max_age_s=0, block_bytes=1000)
+    w = AuditWriter(active, batch_max=20, fsync="none", segments=store)
+    for i in range(600):
+        w.submit(_event(i))
+    w.close()
+
+    segs = store.segments()
+    assert len(segs) >= 5 and all(store.verify(s) for s in segs)
+    seg = segs[1]
+    assert seg["first_ts"] <= seg["last_ts"] and len(seg["blocks"]) > 1
+    off, length = seg["blocks"][-1][:2]  # any block decompresses on its own
+    raw = (store.dir / seg["name"]).read_bytes()[off:off + length]
+    assert json.loads(gzip.decompress(raw).splitlines()[0])["i"] > 0
+
+    assert [e["i"] for e in store.tail(600)] == list(range(600))
+    assert [e["i"] for e in store.tail(3)] == [597, 598, 599]
+    since = (T0 + timedelta(seconds=250)).timestamp()
+    assert [e["i"] for e in store.tail(1000, since=since)] == list(range(250, 600))
+    lines = [json.loads(ln)["i"] for ln in store.iter_lines(since=since)]
+    assert lines[0] <= 250 and lines[-1] == 599 and len(lines) < 600  # older blocks are skipped
+    assert [e["i"] for e in store.lookup("request_id", "req-194")] == [194]
+    assert len(store.lookup("subject", "s-1")) == 150
+
+
+def test_interrupted_rotation_is_readable_and_sealed_later(tmp_path):
+    active = tmp_path / "audit.ndjson"
+    store = SegmentStore(active, max_bytes=0, max_age_s=0)
+    store.dir.mkdir()
+    (store.dir / "000001.ndjson").write_text("".join(_event(i) for i in range(10)))
+    active.write_text("".join(_event(i) for i in range(10, 15)))
+    assert [e["i"] for e in store.tail(100)] == list(range(15))
+    store.rotate()
+    assert [s["events"] for s in store.segments()] == [10, 5]
+    assert [e["i"] for e in store.tail(100)] == list(range(15))
+
+
+def test_legacy_log_is_imported_once_as_oldest_segment(tmp_path):
+    legacy = tmp_path / "old.ndjson"
+    legacy.write_text("".join(_event(i) for i in range(10)))
+    active = tmp_path / "audit.ndjson"
+    store = SegmentStore(active, max_bytes=500, max_age_s=0)
+    w = AuditWriter(active, batch_max=5, fsync="none", segments=store)
+    for i in range(10, 40):
+        w.submit(_event(i))
+    w.close()
+    assert store.segments()  # rotated before the import
+
+    assert store.import_legacy(legacy)["events"] == 10
+    assert store.import_legacy(legacy) is None
+    assert store.segments()[0]["name"] == "000000.ndjson.gz" and legacy.exists()
+    assert [json.loads(ln)["i"] for ln in store.iter_lines()] == list(range(40))
+
+
+def test_scan_raises_when_a_sealed_segment_is_missing(tmp_path):
+    active = tmp_path / "audit.ndjson"
+    store = SegmentStore(active, max_bytes=500, max_age_s=0)
+    w = AuditWriter(active, batch_max=5, fsync="none", segments=store)
+    for i in range(30):
+        w.submit(_event(i))
+    w.close()
+    (store.dir / store.segments()[0]["name"]).unlink()
+    with pytest.raises(FileNotFoundError):
+        list(store.scan())
+
+
+def test_lookup_reads_newest_first_and_stops_at_limit(tmp_path, monkeypatch):
+    active = tmp_path / "audit.ndjson"
+    store = SegmentStore(active, max_bytes=4000, max_age_s=0, block_bytes=1000)
+    w = AuditWriter(active, batch_max=20, fsync="none", segments=store)
+    for i in range(600):
+        w.submit(_event(i))
+    w.close()
+    reads = []
+    real = store.read_block
+    monkeypatch.setattr(store, "read_block", lambda seg, i: reads.append((seg["name"], i)) or real(seg, i))
+
+    assert [e["i"] for e in store.lookup("subject", "s-1", limit=5)] == [581, 585, 589, 593, 597]
+    total = sum(len(seg["blocks"]) for seg in store.segments())
+    assert 0 < len(reads) <= 3 < total  # only the newest blocks, never the whole history
+    assert [e["i"] for e in store.lookup("subject", "s-1")][:2] == [1, 5]
+
+
+def test_pre_segment_active_file_is_sealed_first(tmp_path):
+    active = tmp_path / "audit.ndjson"
+    active.write_text("".join(_event(i) for i in range(5)))
+    store = SegmentStore(active, max_bytes=0, max_age_s=0)
+    assert store.seal_existing()["events"] == 5 and not active.exists()
+    active.write_text(_event(5))
+    assert store.seal_existing() is None  # only ever before the first segment
+    assert [json.loads(ln)["i"] for ln in store.iter_lines()] == list(range(6))
@@ -0,0 +1,72 @@
+import json
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from api.app import app
+from core.provenance import audit_sink
+from core.provenance.audit import audit
+from core.provenance.audit_span import AuditSpan, current_span, job_span
+
+client = TestClient(app)
+
+
+def _query(**params):
+    audit_sink.flush()
+    lines = [json.loads(ln) for ln in client.get("/v0/audit/query", params=params).text.splitlines()]
+    return lines[:-1]
+
+
+def test_job_writes_one_span_record():
+    case_id = f"span-{uuid4().hex[:8]}"
+    job_id = client.post("/v0/jobs", json={"case_id": case_id, "notes": "memory loss"}).json()["job_id"]
+    assert client.get(f"/v0/jobs/{job_id}", params={"fields": "state"}).json()["state"] == "done"
+
+    events = _query(subject=case_id)
+    assert [e["action"] for e in events] == ["job.span"]  # nothing written per event
+    span = events[0]
+    assert span["job_id"] == job_id and span["state"] == "done"
+    actions = [ev[2] for ev in span["events"]]
+    assert actions[:3] == ["ingest_start", "ingest_done", "normalize"]
+    times = [ev[0] for ev in span["events"]]
+    assert times == sorted(times) and times[-1] <= span["duration_ms"]
+
+
+def test_span_verbosity_and_outside_events():
+    s = AuditSpan("j1", "case", verbosity="summary", summarize="validator.start", max_events=3)
+    s.add("validator", "start", "V1")
+    s.add("validator", "start", "V2")
+    s.add("validator", "done", "V1", {"found": 2})
+    s.add("project_stack", "export", "case")
+    s.add("project_stack", "export", "case")
+    s.add("project_stack", "export", "case")  # past max_events: counted only
+    rec = s.record()
+    assert [ev[1:] for ev in rec["events"]] == [
+        ["validator", "done", "V1", {"found": 2}], ["project_stack", "export"], ["project_stack", "export"]]
+    assert rec["summary"]["validator.start"]["count"] == 2
+    assert rec["summary"]["project_stack.export"]["count"] == 1
+
+    m = AuditSpan("j2", verbosity="minimal")
+    m.add("validator", "done", "V1")
+    assert m.record()["events"] == [] and m.record()["summary"]["validator.done"]["count"] == 1
+
+    subject = f"free-{uuid4().hex[:8]}"
+    with job_span("j3", subject) as span:
+        audit("tester", "inside", subject=subject)
+        assert current_span() is span
+    assert current_span() is None
+    audit("tester", "outside", subject=subject)
+    assert [e["action"] for e in _query(subject=subject)] == ["job.span", "outside"]
+
+
+def test_inner_subjects_and_request_ids_stay_searchable():
+    tag = uuid4().hex[:8]
+    with job_span(f"job-{tag}", f"case-{tag}", verbosity="minimal"):
+        audit("validator", "done", subject=f"V-{tag}", found=1)
+        audit("api", "step", subject=f"case-{tag}", request_id=f"req-{tag}")
+
+    rec = _query(subject=f"V-{tag}")
+    assert [e["action"] for e in rec] == ["job.span"] and rec[0]["subjects"] == [f"V-{tag}"]
+    assert [e["job_id"] for e in _query(request_id=f"req-{tag}")] == [f"job-{tag}"]
+    tail = client.get("/v0/audit/tail", params={"subject": f"V-{tag}"}).json()
+    assert [e["job_id"] for e in tail] == [f"job-{tag}"]
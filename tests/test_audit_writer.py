@@ -0,0 +1,32 @@
+import json
+import queue
+
+from core.provenance.audit_sink import AuditWriter
+
+
+def test_writer_batches_and_flushes(tmp_path):
+    w = AuditWriter(tmp_path / "a.ndjson", fsync="every-batch")
+    for i in range(1000):
+        assert w.submit(json.dumps({"i": i}) + "\n")
+    assert w.flush()
+    lines = (tmp_path / "a.ndjson").read_text().splitlines()
+    assert [json.loads(ln)["i"] for ln in lines] == list(range(1000))
+    stats = w.stats()
+    assert stats["written"] == 1000 and stats["dropped"] == 0 and stats["batches"] <= 1000
+    w.close()
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    w = AuditWriter(tmp_path / "b.ndjson", fsync="none")
+    w._q = queue.Queue(maxsize=1)  # a queue the writer thread isn't draining
+    assert w.submit("x\n") is True
+    assert w.submit("y\n") is False
+    assert w.stats()["dropped"] == 1
+
+
+def test_close_writes_everything(tmp_path):
+    w = AuditWriter(tmp_path / "c.ndjson", fsync="interval", fsync_interval_s=10)
+    for i in range(10):
+        w.submit(f"{i}\n")
+    w.close()
+    assert (tmp_path / "c.ndjson").read_text().splitlines() == [str(i) for i in range(10)]
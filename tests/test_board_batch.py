@@ -0,0 +1,68 @@
+import json
+
+from api.board_runners import build_casebundle, run_selected
+from med_stack.board import batch
+
+PAYLOAD = {"case_id": "batch-1", "imaging": {"mri": "atrophy"}, "omics": {"apoe": "e4/e4"}, "pharma": {"rx": "donepezil"}}
+
+
+class _Runner:
+    def __init__(self, batched_reply):
+        self.reply, self.calls = batched_reply, []
+
+    def chat_json(self, system, prompt):
+        self.calls.append(prompt)
+        if system == batch.SYSTEM:
+            return self.reply
+        return {"findings": ["per-role"], "notes": "fallback"}
+
+
+def _patch(monkeypatch, runner):
+    monkeypatch.setattr(batch, "get_runner", lambda: runner)
+    for mod in batch.BATCHABLE.values():
+        monkeypatch.setattr(mod, "get_runner", lambda: runner)
+
+
+def test_one_call_for_all_roles(monkeypatch):
+    runner = _Runner({
+        "imaging_ai": {"findings": ["atrophy"], "notes": "img"},
+        "genomics_ai": {"findings": ["apoe4"], "notes": "gen"},
+        "pharmaco_ai": {"findings": [], "notes": "rx"},
+    })
+    _patch(monkeypatch, runner)
+    out = run_selected(["imaging", "genomics", "pharmaco"], PAYLOAD, batch=True)
+    assert list(out) == ["imaging", "genomics", "pharmaco"]
+    assert out["genomics"]["findings"] == ["apoe4"] and out["imaging"]["board"] == "imaging"
+    assert len(runner.calls) == 1
+    assert "apoe" in runner.calls[0] and "donepezil" in runner.calls[0]
+
+
+def test_bad_section_falls_back_per_role(monkeypatch):
+    runner = _Runner({"imaging_ai": {"findings": ["ok"], "notes": ""}, "genomics_ai": "not json"})
+    _patch(monkeypatch, runner)
+    out = batch.analyze_batch(build_casebundle(PAYLOAD), ["imaging", "genomics"])
+    assert out["imaging"]["raw"]["findings"] == ["ok"]
+    assert out["genomics"]["raw"]["notes"] == "fallback"
+    assert len(runner.calls) == 2 and json.dumps(runner.calls[1]).startswith('"Role: genomics_ai')
+
+
+def test_unanswered_roles_run_concurrently_after_the_batch(monkeypatch):
+    import threading
+
+    runner = _Runner("plain text, no sections")
+    barrier = threading.Barrier(3, timeout=5)
+
+    def chat_json(system, prompt):
+        runner.calls.append(prompt)
+        if system == batch.SYSTEM:
+            return runner.reply
+        barrier.wait()  # only passes if all three fallbacks are in flight together
+        return {"findings": ["per-role"], "notes": "fallback"}
+
+    runner.chat_json = chat_json
+    _patch(monkeypatch, runner)
+    timings = {}
+    out = run_selected(["imaging", "genomics", "pharmaco"], PAYLOAD, batch=True, timings=timings)
+    assert list(out) == ["imaging", "genomics", "pharmaco"]
+    assert all(b["notes"] == "fallback" for b in out.values())
+    assert len(runner.calls) == 4 and {"batch", "imaging", "genomics", "pharmaco"} <= set(timings)
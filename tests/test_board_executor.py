@@ -0,0 +1,53 @@
+import time
+
+from api.board_executor import run_concurrently
+
+
+def _sleep_then(value, delay):
+    def fn():
+        time.sleep(delay)
+        return value
+    return fn
+
+
+def _boom():
+    raise RuntimeError("board exploded")
+
+
+def test_results_keep_call_order_and_overlap():
+    t0 = time.perf_counter()
+    out = run_concurrently([("a", _sleep_then("A", 0.3)), ("b", _sleep_then("B", 0.1)), ("c", _sleep_then("C", 0.2))])
+    elapsed = time.perf_counter() - t0
+    assert [o.name for o in out] == ["a", "b", "c"]
+    assert [o.value for o in out] == ["A", "B", "C"]
+    assert elapsed < 0.55  # roughly the slowest board, not the sum
+
+
+def test_failure_is_isolated():
+    out = run_concurrently([("ok", lambda: 1), ("bad", _boom), ("ok2", lambda: 2)])
+    assert [o.ok for o in out] == [True, False, True]
+    assert isinstance(out[1].error, RuntimeError)
+
+
+def test_timeout_reported_as_error():
+    out = run_concurrently([("slow", _sleep_then("x", 0.5)), ("fast", lambda: 1)], timeout_s=0.1)
+    assert not out[0].ok and isinstance(out[0].error, TimeoutError)
+
+
+def test_timeout_counts_from_board_start_not_queue(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from api import board_executor
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(board_executor, "_POOL", pool)
+    out = run_concurrently([("a", _sleep_then("A", 0.2)), ("b", _sleep_then("B", 0.2))], timeout_s=0.3)
+    pool.shutdown()
+    assert [o.value for o in out] == ["A", "B"]  # b waited 0.2s in the queue but ran well within 0.3s
+
+
+def test_single_board_is_also_timed_out():
+    t0 = time.perf_counter()
+    out = run_concurrently([("only", _sleep_then("x", 0.5))], timeout_s=0.1)
+    assert not out[0].ok and isinstance(out[0].error, TimeoutError)
+    assert time.perf_counter() - t0 < 0.4
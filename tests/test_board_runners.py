@@ -0,0 +1,47 @@
+import pytest
+from pydantic import ValidationError
+
+from api import board_runners
+from api.board_runners import BOARD_RUNNERS, build_casebundle, payload_runner, run_selected
+
+PAYLOAD = {"case_id": "br-1", "clinical_notes": "MCI suspected", "imaging": {"mri": "atrophy"}}
+
+
+def test_bundle_is_frozen():
+    cb = build_casebundle(PAYLOAD)
+    assert cb.modalities == ["clinical", "imaging"]
+    with pytest.raises(ValidationError):
+        cb.case_id = "other"
+    # Nested models and containers are read-only too, but still look like plain ones
+    obs = cb.observations[0]
+    with pytest.raises(ValidationError):
+        obs.content = {}
+    for mutate in (lambda: obs.content.update(x=1), lambda: cb.observations.append(obs), lambda: cb.tags.clear()):
+        with pytest.raises(TypeError):
+            mutate()
+    assert isinstance(obs.content, dict) and str(cb.modalities) == "['clinical', 'imaging']"
+    dumped = cb.model_dump()
+    dumped["observations"][0]["content"]["x"] = 1  # dumps are ordinary, mutable copies
+
+
+def test_bundle_built_once_and_shared(monkeypatch):
+    built, seen = [], []
+    real = board_runners.build_casebundle
+
+    def counting(payload):
+        built.append(payload)
+        return real(payload)
+
+    monkeypatch.setattr(board_runners, "build_casebundle", counting)
+    monkeypatch.setitem(BOARD_RUNNERS, "a", lambda cb: seen.append(cb) or {"board": "a"})
+    monkeypatch.setitem(BOARD_RUNNERS, "b", lambda cb: seen.append(cb) or {"board": "b"})
+    out = run_selected(["a", "b"], PAYLOAD)
+    assert list(out) == ["a", "b"]
+    assert len(built) == 1 and seen[0] is seen[1]
+
+
+def test_payload_runner_shim(monkeypatch):
+    monkeypatch.setitem(BOARD_RUNNERS, "old", payload_runner(lambda payload: {"board": "old", "cid": payload["case_id"]}))
+    assert run_selected(["old"], PAYLOAD)["old"]["cid"] == "br-1"
+    # The built-in runners still accept raw payloads from old callers
+    assert board_runners.run_neurology(PAYLOAD)["board"] == "clinical"
@@ -14,3 +14,4 @@ def test_ready_shape():
     body = r.json()
     assert body.get("status") == "ok"
     assert "checks" in body
+    assert isinstance(body.get("limits"), dict)
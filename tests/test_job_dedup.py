@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+import api.app as app_mod
+from core.store.db import reader
+
+client = TestClient(app_mod.app)
+
+
+def test_idempotency_key_returns_same_job_and_rejects_other_payloads():
+    key = uuid4().hex
+    first = client.post("/v0/jobs", json={"case_id": "idem"}, headers={"Idempotency-Key": key}).json()
+    again = client.post("/v0/jobs", json={"case_id": "idem"}, headers={"Idempotency-Key": key}).json()
+    assert again == {"job_id": first["job_id"], "deduplicated": True}
+
+    r = client.post("/v0/jobs", json={"case_id": "other"}, headers={"Idempotency-Key": key})
+    assert r.status_code == 409
+
+
+def test_input_hash_dedup_is_opt_in(monkeypatch):
+    body = {"case_id": f"dedup-{uuid4().hex[:8]}", "notes": "same"}
+    a = client.post("/v0/jobs", json=body).json()["job_id"]
+    b = client.post("/v0/jobs", json=body).json()["job_id"]
+    assert a != b  # off by default
+
+    monkeypatch.setattr(app_mod, "JOB_DEDUP", True)
+    r = client.post("/v0/jobs", json={"notes": "same", "case_id": body["case_id"], "clinical_notes": None}).json()
+    assert r["deduplicated"] is True and r["job_id"] in (a, b)
+
+
+def test_input_hash_lookup_uses_index():
+    plan = reader().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM jobs WHERE input_hash=? AND created_at>=? AND state!='error'"
+        " ORDER BY created_at DESC LIMIT 1", ("x", "y")).fetchall()
+    assert any("ix_jobs_input_hash" in row[-1] for row in plan)
@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from api.app import app
+from core.store.jobs import update_job, upsert_job
+from core.store.notify import hub
+
+client = TestClient(app)
+
+
+def _queued_job() -> str:
+    job_id = f"events-{uuid4().hex[:8]}"
+    upsert_job({"id": job_id, "state": "queued", "input": {}})
+    return job_id
+
+
+def _finish_later(job_id: str, delay: float = 0.2) -> None:
+    def _run():
+        time.sleep(delay)
+        update_job(job_id, state="running")
+        update_job(job_id, state="done", protocol_card={"ok": True})
+    threading.Thread(target=_run, daemon=True).start()
+
+
+def test_long_poll_wakes_on_update():
+    job_id = _queued_job()
+    _finish_later(job_id)
+    t0 = time.monotonic()
+    r = client.get(f"/v0/jobs/{job_id}", params={"wait": 10, "fields": "state,protocol_card"})
+    assert r.status_code == 200
+    assert r.json() == {"state": "done", "protocol_card": {"ok": True}}
+    assert time.monotonic() - t0 < 5
+    assert hub.subscribers == 0
+
+
+def test_long_poll_times_out_with_current_state():
+    job_id = _queued_job()
+    r = client.get(f"/v0/jobs/{job_id}", params={"wait": 0.3, "fields": "state"})
+    assert r.json() == {"state": "queued"}
+
+
+def test_long_poll_404s_when_job_vanishes_between_reads(monkeypatch):
+    import api.app as app_mod
+    job_id = _queued_job()
+    monkeypatch.setattr(app_mod, "get_job", lambda *_a, **_k: None)  # deleted after the first read
+    assert client.get(f"/v0/jobs/{job_id}", params={"wait": 1}).status_code == 404
+
+
+def test_sse_streams_state_changes_until_terminal():
+    job_id = _queued_job()
+    _finish_later(job_id)
+    states = []
+    with client.stream("GET", f"/v0/jobs/{job_id}/events", params={"wait": 10}) as r:
+        assert r.headers["content-type"].startswith("text/event-stream")
+        for line in r.iter_lines():
+            if line.startswith("data: "):
+                states.append(json.loads(line[6:])["state"])
+    assert states[0] == "queued" and states[-1] == "done"
+    assert hub.subscribers == 0
+    assert client.get("/v0/jobs/nope/events").status_code == 404
+
+
+def test_sse_with_full_hub_is_503(monkeypatch):
+    job_id = _queued_job()
+    monkeypatch.setattr(hub, "max_subscribers", 0)
+    assert client.get(f"/v0/jobs/{job_id}/events", params={"wait": 1}).status_code == 503
+    assert client.get(f"/v0/jobs/{job_id}", params={"wait": 1}).status_code == 503
+    assert hub.subscribers == 0
@@ -0,0 +1,55 @@
+import time
+from datetime import datetime, UTC
+from uuid import uuid4
+
+from core.store.jobs import upsert_job, get_job, claim_job, renew_lease
+
+
+def _queued(created_at: str = "") -> str:
+    jid = str(uuid4())
+    upsert_job({"id": jid, "state": "queued", "created_at": created_at or datetime.now(UTC).isoformat(),
+                "input": {"notes": "queue test"}})
+    return jid
+
+
+def test_claim_is_exclusive_and_returns_input():
+    jid = _queued()
+    job = claim_job("w1", job_id=jid)
+    assert job and job["state"] == "running" and job["input"] == {"notes": "queue test"}
+    assert claim_job("w2", job_id=jid) is None
+    assert renew_lease(jid, "w1")
+    assert not renew_lease(jid, "w2")
+
+
+def test_expired_lease_is_reclaimed():
+    jid = _queued()
+    assert claim_job("w1", lease_s=-1, job_id=jid)
+    job = claim_job("w2", job_id=jid)
+    assert job and job["attempts"] == 2
+    assert not renew_lease(jid, "w1")
+    assert get_job(jid)["state"] == "running"
+
+
+def test_inline_run_keeps_its_lease_alive(monkeypatch):
+    import api.app as app_mod
+    jid, stolen = _queued(), []
+
+    def slow(job_id, _input):
+        time.sleep(0.6)  # outlives the 0.3s lease; the heartbeat must renew it
+        stolen.append(claim_job("w2", job_id=job_id))
+
+    monkeypatch.setattr(app_mod, "JOB_LEASE_S", 0.3)
+    monkeypatch.setattr(app_mod, "_process_job", slow)
+    app_mod._run_inline(jid)
+    assert stolen == [None]
+
+
+def test_inline_recovery_runs_leftover_jobs(monkeypatch):
+    import api.app as app_mod
+    queued, orphaned = _queued("1999-01-01T00:00:00+00:00"), _queued("1999-01-02T00:00:00+00:00")
+    assert claim_job("dead-worker", lease_s=-1, job_id=orphaned)
+    newer, ran = _queued(), []
+    monkeypatch.setattr(app_mod, "_process_job", lambda job_id, _input: ran.append(job_id))
+    assert app_mod._recover_inline("2000-01-01T00:00:00+00:00") == 2
+    assert ran == [queued, orphaned]
+    assert get_job(newer)["state"] == "queued"
@@ -0,0 +1,27 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from api.app import app
+from core.store.jobs import get_job, get_job_raw, upsert_job
+
+client = TestClient(app)
+
+
+def test_read_job_projects_fields_and_passes_json_through():
+    job_id = f"fields-{uuid4().hex[:8]}"
+    card = {"summary": "x" * 2000, "items": [1, 2, 3]}
+    upsert_job({"id": job_id, "state": "done", "created_at": "2026-03-01T00:00:00+00:00",
+                "input": {"a": 1}, "protocol_card": card})
+
+    r = client.get(f"/v0/jobs/{job_id}", params={"fields": "state,error"})
+    assert r.status_code == 200, r.text
+    assert r.json() == {"state": "done", "error": None}
+
+    full = client.get(f"/v0/jobs/{job_id}").json()
+    assert full == get_job(job_id)
+    assert full["protocol_card"] == card and full["validators"] == []
+
+    assert get_job(job_id, fields=["protocol_card"]) == {"protocol_card": card}
+    assert get_job_raw("missing-" + job_id) is None
+    assert client.get(f"/v0/jobs/{job_id}", params={"fields": "nope"}).status_code == 400
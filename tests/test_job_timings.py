@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+
+from api.app import app
+from core.metrics.timings import LatencyStats, StageTimer
+
+client = TestClient(app)
+
+
+def test_job_records_stage_and_board_timings():
+    job_id = client.post("/v0/jobs", json={"case_id": "timing", "notes": "memory loss"}).json()["job_id"]
+    timings = client.get(f"/v0/jobs/{job_id}", params={"fields": "state,timings"}).json()["timings"]
+    assert {"ingest", "boards", "consensus", "synthesis"} <= set(timings["stages"])
+    assert timings["boards"] and all(isinstance(ms, int) for ms in timings["boards"].values())
+
+    stats = client.get("/v0/stats/timings").json()["stages"]
+    assert {"boards", "store", "job"} <= set(stats)
+    assert stats["job"]["count"] >= 1 and stats["job"]["p50"] <= stats["job"]["p99"]
+
+
+def test_latency_stats_window_and_percentiles():
+    s = LatencyStats(window=100)
+    for ms in range(1, 201):
+        s.observe("x", ms)
+    snap = s.snapshot()["x"]
+    assert snap == {"count": 200, "window": 100, "p50": 150, "p95": 195, "p99": 199, "max": 200}
+
+    t = StageTimer()
+    with t.span("a"):
+        pass
+    t.boards["imaging"] = 3
+    t.observe(s)
+    assert {"a", "board.imaging", "job"} <= set(s.snapshot())
+
+
+def test_casebundle_build_is_timed_as_ingest(monkeypatch):
+    import time
+
+    import api.app as app_mod
+
+    real = app_mod.build_casebundle
+    monkeypatch.setattr(app_mod, "build_casebundle", lambda payload: time.sleep(0.05) or real(payload))
+    job_id = client.post("/v0/jobs", json={"case_id": "timing-ingest", "notes": "memory loss"}).json()["job_id"]
+    stages = client.get(f"/v0/jobs/{job_id}", params={"fields": "timings"}).json()["timings"]["stages"]
+    assert stages["ingest"] >= 50  # the bundle is not rebuilt (and timed) under "boards"
@@ -0,0 +1,54 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from api.app import app
+from core.store.jobs import get_job
+
+client = TestClient(app)
+
+
+def test_batch_array_inserts_in_order_and_reports_bad_items():
+    items = [{"case_id": "b-1"}, {"case_id": ["not", "a", "string"]}, {"case_id": "b-3", "notes": "n"}]
+    r = client.post("/v0/jobs:batch", json=items)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    ids = body["job_ids"]
+    assert len(ids) == 3 and ids[1] is None and ids[0] and ids[2]
+    assert [e["index"] for e in body["errors"]] == [1]
+
+    first, third = get_job(ids[0]), get_job(ids[2])
+    assert first["input"]["case_id"] == "b-1" and third["input"]["case_id"] == "b-3"
+    assert first["created_at"] < third["created_at"]
+    assert third["state"] == "done"  # inline executor ran the batch after responding
+
+
+def test_batch_ndjson():
+    lines = [json.dumps({"case_id": "nd-1"}), "{broken", "", json.dumps({"case_id": "nd-2"})]
+    r = client.post("/v0/jobs:batch", content="\n".join(lines), headers={"content-type": "application/x-ndjson"})
+    body = r.json()
+    assert body["job_ids"][1] is None and len(body["job_ids"]) == 3
+    assert body["errors"][0]["index"] == 1
+    assert client.post("/v0/jobs:batch", content="[{", headers={"content-type": "application/json"}).status_code == 400
+
+
+def test_batch_idempotency_key_applies_per_item():
+    items = [{"case_id": "idem-1"}, {"case_id": "idem-2"}]
+    first = client.post("/v0/jobs:batch", json=items, headers={"Idempotency-Key": "batch-k"}).json()
+    again = client.post("/v0/jobs:batch", json=items, headers={"Idempotency-Key": "batch-k"}).json()
+    assert again["job_ids"] == first["job_ids"] and again["deduplicated"] == [0, 1]
+    assert first["deduplicated"] == []
+
+    changed = client.post("/v0/jobs:batch", json=[{"case_id": "idem-1"}, {"case_id": "other"}],
+                          headers={"Idempotency-Key": "batch-k"}).json()
+    assert changed["job_ids"] == [first["job_ids"][0], None]
+    assert [e["index"] for e in changed["errors"]] == [1]
+
+
+def test_batch_jobs_run_concurrently(monkeypatch):
+    import threading
+    import api.app as app_mod
+    barrier = threading.Barrier(3, timeout=5)  # only passes if all three jobs are in flight at once
+    monkeypatch.setattr(app_mod, "_process_job", lambda job_id, _input: barrier.wait())
+    r = client.post("/v0/jobs:batch", json=[{"case_id": f"par-{i}"} for i in range(3)])
+    assert r.status_code == 200 and not barrier.broken
@@ -0,0 +1,46 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from api.app import app
+from core.store.jobs import upsert_job
+
+client = TestClient(app)
+
+
+def test_list_paginates_with_cursor_and_projects_fields():
+    tag = uuid4().hex[:8]
+    state = f"listtest-{tag}"
+    for i in range(5):
+        upsert_job({"id": f"{tag}-{i}", "state": state, "created_at": f"2026-02-01T00:00:0{i}+00:00",
+                    "input": {"i": i}})
+
+    seen, cursor = [], None
+    while True:
+        params = {"state": state, "limit": 2, "fields": "id,input"}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/v0/jobs", params=params)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert all(set(item) == {"id", "input"} for item in body["items"])
+        seen += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [f"{tag}-{i}" for i in (4, 3, 2, 1, 0)]
+
+    r = client.get("/v0/jobs", params={"state": state, "created_after": "2026-02-01T00:00:03+00:00"})
+    assert [i["id"] for i in r.json()["items"]] == [f"{tag}-4", f"{tag}-3"]
+    # Z suffix, other offsets and bare dates are normalised to the stored UTC form
+    for after in ("2026-02-01T00:00:03Z", "2026-02-01T01:00:03+01:00"):
+        r = client.get("/v0/jobs", params={"state": state, "created_after": after})
+        assert [i["id"] for i in r.json()["items"]] == [f"{tag}-4", f"{tag}-3"]
+    r = client.get("/v0/jobs", params={"state": state, "created_after": "2026-02-01", "created_before": "2026-02-02"})
+    assert len(r.json()["items"]) == 5
+
+
+def test_list_rejects_bad_input():
+    assert client.get("/v0/jobs", params={"fields": "nope"}).status_code == 400
+    assert client.get("/v0/jobs", params={"cursor": "!!!"}).status_code == 400
+    assert client.get("/v0/jobs", params={"created_after": "yesterday"}).status_code == 400
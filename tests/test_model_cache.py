@@ -0,0 +1,64 @@
+from core.models.cache import ResponseCache
+from core.models.health import ProviderHealthRegistry
+from core.models.provider import BaseProvider, ModelRunner
+
+
+class _Counting(BaseProvider):
+    name, model, temperature = "counting", "m1", 0.2
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, system, prompt):
+        self.calls += 1
+        return '{"findings": [], "notes": "call %d"}' % self.calls
+
+
+def test_repeated_prompt_served_from_cache(tmp_path):
+    cache = ResponseCache(path=tmp_path / "c.db")
+    p = _Counting()
+    runner = ModelRunner([p], registry=ProviderHealthRegistry(), cache=cache)
+    assert runner.chat_json("s", "same")["notes"] == "call 1"
+    assert runner.chat_json("s", "same")["notes"] == "call 1"
+    assert runner.chat_json("s", "same", use_cache=False)["notes"] == "call 2"
+    assert p.calls == 2
+    assert cache.stats()["hits_memory"] == 1
+
+
+def test_disk_tier_survives_new_instance_and_ttl_expires(tmp_path):
+    ResponseCache(path=tmp_path / "c.db").put("k", "v")
+    warm = ResponseCache(path=tmp_path / "c.db")
+    assert warm.get("k") == "v" and warm.stats()["hits_disk"] == 1
+    expired = ResponseCache(path=tmp_path / "c.db", ttl_s=0)
+    assert expired.get("k") is None
+
+
+def test_memory_lru_eviction():
+    cache = ResponseCache(max_memory=2)
+    cache.put("a", "1"); cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    assert cache.get("b") is None and cache.get("a") == "1"
+
+
+def test_one_miss_per_request_and_unparseable_replies_not_cached():
+    class _Down(_Counting):
+        name = "down"
+
+        def chat(self, system, prompt):
+            raise ValueError("bad request")
+
+    class _Prose(_Counting):
+        name = "prose"
+
+        def chat(self, system, prompt):
+            self.calls += 1
+            return "I could not produce JSON for this case."
+
+    cache = ResponseCache()
+    prose = _Prose()
+    runner = ModelRunner([_Down(), prose], registry=ProviderHealthRegistry(), cache=cache)
+    assert runner.chat_json("s", "p")["notes"].startswith("I could not")
+    assert cache.stats()["misses"] == 1 and cache.stats()["writes"] == 0
+    runner.chat_json("s", "p")
+    assert prose.calls == 2  # the unparseable reply was not served from cache
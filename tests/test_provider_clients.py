@@ -0,0 +1,18 @@
+from core.models.clients import ProviderClients
+from core.models.provider import get_runner
+
+
+def test_http_pool_is_reused_and_reopened_after_close():
+    clients = ProviderClients(max_connections=4, max_keepalive=2)
+    a = clients.http("x")
+    assert clients.http("x") is a
+    assert clients.http("y") is not a
+    clients.close()
+    assert a.is_closed
+    b = clients.http("x")
+    assert b is not a and not b.is_closed
+    clients.close()
+
+
+def test_runner_is_process_wide():
+    assert get_runner() is get_runner()
@@ -0,0 +1,45 @@
+import time
+
+from core.models.health import CLOSED, DISABLED, HALF_OPEN, OPEN, ProviderHealthRegistry, ProviderMisconfigured
+from core.models.provider import BaseProvider, LocalFallbackProvider, ModelRunner
+
+
+class _Flaky(BaseProvider):
+    name = "flaky"
+
+    def __init__(self, err):
+        self.err, self.calls = err, 0
+
+    def chat(self, system, prompt):
+        self.calls += 1
+        if self.err:
+            raise self.err
+        return '{"findings": ["ok"], "notes": "up"}'
+
+
+def test_misconfigured_provider_is_disabled_after_one_call():
+    reg = ProviderHealthRegistry()
+    bad = _Flaky(ProviderMisconfigured("no key"))
+    runner = ModelRunner([bad, LocalFallbackProvider()], registry=reg)
+    for _ in range(3):
+        out = runner.chat_json("sys", "p")
+        assert out["notes"].startswith("local-fallback")
+    assert bad.calls == 1 and reg.state("flaky") == DISABLED
+
+
+def test_transient_failures_open_then_half_open_probe():
+    reg = ProviderHealthRegistry(failure_threshold=2, cooldown_s=0.05)
+    p = _Flaky(TimeoutError("slow upstream"))
+    runner = ModelRunner([p, LocalFallbackProvider()], registry=reg)
+    runner.chat_json("s", "p"); runner.chat_json("s", "p")
+    assert reg.state("flaky") == OPEN
+    runner.chat_json("s", "p")
+    assert p.calls == 2  # skipped while open
+
+    time.sleep(0.06)
+    p.err = None
+    assert reg.allow("flaky") and reg.state("flaky") == HALF_OPEN
+    assert not reg.allow("flaky")  # only one probe in flight
+    reg.record_success("flaky")
+    assert reg.state("flaky") == CLOSED
+    assert runner.chat_json("s", "p")["notes"] == "up"
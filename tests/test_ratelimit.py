@@ -0,0 +1,119 @@
+import asyncio, time
+
+from core.models.health import ProviderHealthRegistry
+from core.models.provider import BaseProvider, LocalFallbackProvider, ModelRunner
+from core.models.ratelimit import ProviderLimiter, TokenBucket
+
+
+def test_token_bucket_paces_after_burst():
+    b = TokenBucket(rate_per_s=10, capacity=2)
+    assert b.reserve() == 0.0 and b.reserve() == 0.0
+    assert 0.05 < b.reserve() <= 0.1
+
+
+def test_async_concurrency_cap_and_wait_metrics():
+    lim = ProviderLimiter("t", max_concurrency=2)
+    peak = {"now": 0, "max": 0}
+
+    async def call():
+        async with lim.ahold():
+            peak["now"] += 1
+            peak["max"] = max(peak["max"], peak["now"])
+            await asyncio.sleep(0.05)
+            peak["now"] -= 1
+
+    async def main():
+        await asyncio.gather(*[call() for _ in range(6)])
+
+    asyncio.run(main())
+    stats = lim.stats()
+    assert peak["max"] == 2
+    assert stats["calls"] == 6 and stats["in_flight"] == 0 and stats["waiting"] == 0
+    assert stats["wait_max_s"] >= 0.09
+
+
+class _Async(BaseProvider):
+    name = "async-test"
+
+    async def achat(self, system, prompt):
+        await asyncio.sleep(0)
+        return '{"findings": [], "notes": "async"}'
+
+
+def test_achat_json_uses_native_async_and_falls_back():
+    runner = ModelRunner([_Async()], registry=ProviderHealthRegistry())
+    assert asyncio.run(runner.achat_json("s", "p"))["notes"] == "async"
+
+    class _Down(BaseProvider):
+        name = "down"
+
+        async def achat(self, system, prompt):
+            raise ConnectionError("upstream down")
+
+    runner = ModelRunner([_Down(), LocalFallbackProvider()], registry=ProviderHealthRegistry())
+    t0 = time.perf_counter()
+    assert asyncio.run(runner.achat_json("s", "p"))["notes"].startswith("local-fallback")
+    assert time.perf_counter() - t0 < 1
+
+
+def test_each_retry_attempt_is_admitted_by_the_limiter(monkeypatch):
+    from tenacity import wait_none
+
+    from core.models import provider
+    from core.models.ratelimit import get_limiter
+
+    monkeypatch.setattr(provider, "_RETRY_WAIT", wait_none())
+
+    class _Flaky(BaseProvider):
+        name = "flaky-test"
+        cacheable = False
+        max_attempts = 3
+        calls = 0
+
+        def chat(self, system, prompt):
+            _Flaky.calls += 1
+            if _Flaky.calls < 3:
+                raise ConnectionError("blip")
+            return '{"notes": "ok"}'
+
+    runner = ModelRunner([_Flaky()], registry=ProviderHealthRegistry())
+    assert runner.chat_json("s", "p", use_cache=False)["notes"] == "ok"
+    stats = get_limiter("flaky-test").stats()
+    assert stats["calls"] == 3 and stats["in_flight"] == 0
+
+
+def test_threads_and_coroutines_share_one_concurrency_cap():
+    import threading
+
+    lim = ProviderLimiter("shared", max_concurrency=2)
+    peak = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def enter():
+        with lock:
+            peak["now"] += 1
+            peak["max"] = max(peak["max"], peak["now"])
+
+    def leave():
+        with lock:
+            peak["now"] -= 1
+
+    def sync_call():
+        with lim.hold():
+            enter(); time.sleep(0.05); leave()
+
+    async def async_call():
+        async with lim.ahold():
+            enter(); await asyncio.sleep(0.05); leave()
+
+    threads = [threading.Thread(target=sync_call) for _ in range(3)]
+    for t in threads:
+        t.start()
+
+    async def main():
+        await asyncio.gather(*[async_call() for _ in range(3)])
+
+    asyncio.run(main())
+    for t in threads:
+        t.join()
+    assert peak["max"] == 2 and lim.stats()["calls"] == 6 and lim.stats()["waiting"] == 0
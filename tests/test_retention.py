@@ -0,0 +1,56 @@
+import gzip
+from datetime import datetime, UTC
+from uuid import uuid4
+
+import pytest
+
+from core.store import archive, db, jobs, retention
+from core.store.db import reader
+from core.store.jobs import get_job, get_job_raw, list_jobs, upsert_job
+
+
+@pytest.fixture
+def tmp_store(tmp_path, monkeypatch):
+    """A throwaway jobs DB and archive, so no tombstone outlives its segment files."""
+    db.close()
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "jobs.db")
+    monkeypatch.setattr(db._local, "conn", None, raising=False)
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path / "archive")
+    db.write(jobs._init)
+    yield tmp_path / "archive"
+    db.close()
+    db.reader().close()
+
+
+def test_archives_old_terminal_jobs_behind_tombstones(tmp_store):
+    tag = uuid4().hex[:8]
+    old = {"id": f"old-{tag}", "state": "done", "created_at": "2000-01-02T03:04:05+00:00",
+           "input": {"case_id": tag}, "protocol_card": {"summary": "s" * 500}, "boards": {"imaging": {}}}
+    recent = {"id": f"recent-{tag}", "state": "done", "created_at": "2000-06-30T00:00:00+00:00", "input": {}}
+    failed = {"id": f"failed-{tag}", "state": "error", "created_at": "2000-01-03T00:00:00+00:00",
+              "error": "boom", "input": {}}
+    for rec in (old, recent, failed):
+        upsert_job(rec)
+    before = get_job(old["id"])
+
+    stats = retention.archive_jobs({"done": 30}, now=datetime(2000, 7, 1, tzinfo=UTC))
+    assert stats["archived"] >= 1
+
+    row = reader().execute("SELECT archived_ref, protocol_card_json FROM jobs WHERE id=?", (old["id"],)).fetchone()
+    assert row["archived_ref"].startswith("2000-01-02.ndjson.gz:") and row["protocol_card_json"] is None
+    assert get_job(old["id"]) == before
+    assert get_job(old["id"], fields=["state"]) == {"state": "done"}  # served from the tombstone
+    assert get_job_raw(old["id"], fields=["protocol_card"]) is not None
+    # segments are plain concatenated gzip members
+    assert tag.encode() in gzip.decompress((tmp_store / "2000-01-02.ndjson.gz").read_bytes())
+    items, _ = list_jobs(created_before="2000-01-03", fields=["id", "protocol_card"])
+    assert items == [{"id": old["id"], "protocol_card": old["protocol_card"]}]
+
+    for rec in (recent, failed):
+        assert reader().execute("SELECT archived_ref FROM jobs WHERE id=?", (rec["id"],)).fetchone()[0] is None
+
+
+def test_policy_rejects_non_terminal_states():
+    assert retention.parse_policy("done=30, error=7") == {"done": 30.0, "error": 7.0}
+    with pytest.raises(ValueError):
+        retention.parse_policy("queued=1")
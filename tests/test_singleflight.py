@@ -0,0 +1,39 @@
+import threading, time
+
+from core.models.health import ProviderHealthRegistry
+from core.models.provider import BaseProvider, ModelRunner
+from core.models.singleflight import SingleFlight
+
+
+class _Slow(BaseProvider):
+    name = "slow"
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, system, prompt):
+        self.calls += 1
+        time.sleep(0.2)
+        return '{"findings": ["x"], "notes": "shared"}'
+
+
+def test_identical_concurrent_calls_share_one_upstream_call():
+    p = _Slow()
+    runner = ModelRunner([p], registry=ProviderHealthRegistry())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(runner.chat_json("s", "same"))) for _ in range(5)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert p.calls == 1
+    assert all(r == {"findings": ["x"], "notes": "shared"} for r in results)
+    assert len({id(r) for r in results}) == 5  # each caller gets its own copy
+    assert runner.coalesce_stats()["coalesced"] == 4
+
+
+def test_follower_runs_own_call_after_wait_timeout():
+    sf, gate = SingleFlight(), threading.Event()
+    leader = threading.Thread(target=lambda: sf.do("k", lambda: gate.wait(1) and "leader"))
+    leader.start(); time.sleep(0.05)
+    assert sf.do("k", lambda: "own", timeout=0.05) == "own"
+    gate.set(); leader.join()
+    assert sf.stats()["wait_timeouts"] == 1
@@ -0,0 +1,37 @@
+import json
+from uuid import uuid4
+
+from core.store import codec
+from core.store.compact import compact_jobs
+from core.store.db import reader, write
+from core.store.jobs import get_job, update_job
+
+BIG = {"notes": "hippocampal atrophy " * 100, "findings": list(range(50))}
+
+
+def test_codec_roundtrip_and_tags():
+    small = codec.encode({"a": 1}, codec="zlib")
+    big = codec.encode(BIG, codec="zlib")
+    assert small[0] == codec.TAG_PLAIN and big[0] == codec.TAG_ZLIB
+    assert len(big) < len(json.dumps(BIG)) / 4
+    assert codec.decode(big) == BIG and codec.decode(small) == {"a": 1}
+    assert json.loads(codec.decode_raw(big)) == BIG
+    assert codec.decode(json.dumps(BIG)) == BIG  # legacy text rows
+    assert codec.decode(None) is None
+
+
+def test_compaction_rewrites_legacy_rows():
+    jid = str(uuid4())
+    write(lambda conn: conn.execute(
+        "INSERT INTO jobs (id, state, created_at, input_json, boards_json) VALUES (?, 'done', '2026-01-01', ?, ?)",
+        (jid, json.dumps({"x": 1}), json.dumps(BIG)),
+    ))
+    before = get_job(jid)
+    stats = compact_jobs(vacuum=False)
+    assert stats["cells"] >= 2
+    row = reader().execute("SELECT typeof(boards_json) t FROM jobs WHERE id=?", (jid,)).fetchone()
+    assert row["t"] == "blob"
+    assert get_job(jid) == before
+
+    update_job(jid, boards={"y": 2})  # new writes are encoded too
+    assert reader().execute("SELECT typeof(boards_json) t FROM jobs WHERE id=?", (jid,)).fetchone()["t"] == "blob"
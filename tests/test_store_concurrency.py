@@ -0,0 +1,31 @@
+import threading
+from uuid import uuid4
+
+from core.store import db
+from core.store.jobs import get_job, update_job, upsert_job
+
+
+def test_wal_mode_and_pragmas():
+    conn = db.reader()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+
+
+def test_concurrent_writers_and_readers():
+    errors = []
+
+    def worker():
+        try:
+            for i in range(20):
+                jid = str(uuid4())
+                upsert_job({"id": jid, "state": "queued", "input": {"i": i}})
+                update_job(jid, state="done", boards={"n": i})
+                rec = get_job(jid)
+                assert rec["state"] == "done" and rec["boards"] == {"n": i}
+        except Exception as e:  # surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert not errors
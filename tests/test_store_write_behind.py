@@ -0,0 +1,31 @@
+from uuid import uuid4
+
+from core.store import jobs
+from core.store.db import reader
+
+
+def test_upsert_is_single_statement_and_keeps_insert_only_columns():
+    jid = str(uuid4())
+    jobs.upsert_job({"id": jid, "state": "queued", "created_at": "2026-01-01T00:00:00+00:00", "input": {"a": 1}})
+    jobs.update_job(jid, state="done", boards={"b": 2})
+    rec = jobs.get_job(jid)
+    assert rec["created_at"] == "2026-01-01T00:00:00+00:00" and rec["input"] == {"a": 1}
+    assert rec["state"] == "done" and rec["boards"] == {"b": 2}
+
+
+def test_write_behind_coalesces_and_flushes_on_read(monkeypatch):
+    wb = jobs._WriteBehind(interval_s=60, max_pending=1000)  # never flushes on its own here
+    monkeypatch.setattr(jobs, "JOB_WRITE_BEHIND", True)
+    monkeypatch.setattr(jobs, "_write_behind", wb)
+
+    ids = [str(uuid4()) for _ in range(20)]
+    for jid in ids:
+        jobs.upsert_job({"id": jid, "state": "queued", "input": {}})
+        jobs.update_job(jid, state="running")
+        jobs.update_job(jid, state="done", error=None, boards={"ok": True})
+
+    raw = reader().execute("SELECT state FROM jobs WHERE id=?", (ids[0],)).fetchone()
+    assert raw["state"] == "queued"  # not yet committed
+    assert jobs.get_job(ids[0])["state"] == "done"  # read forces the flush
+    assert wb.batches == 1
+    assert all(jobs.get_job(j)["boards"] == {"ok": True} for j in ids)
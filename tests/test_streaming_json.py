@@ -0,0 +1,46 @@
+import json
+
+import httpx
+
+from core.models.incremental_json import IncrementalJSONParser
+from core.models.providers.meta_llama import MetaLlamaProvider
+
+
+def test_parser_skips_preamble_and_stops_at_close():
+    p = IncrementalJSONParser()
+    chunks = ["Sure! ```json\n{\"findings\": [\"a}\", ", "{\"x\": [1]}], \"notes\": \"q\\\"\"", "}\n``` hope", " this helps"]
+    fed = 0
+    for c in chunks:
+        fed += 1
+        if p.feed(c):
+            break
+    assert fed == 3
+    assert p.result == {"findings": ["a}", {"x": [1]}], "notes": 'q"'}
+    assert p.tail.startswith("\n```")
+
+
+def _sse(tokens):
+    body = "".join(f"data: {json.dumps({'choices': [{'delta': {'content': t}}]})}\n\n" for t in tokens)
+    return body + "data: [DONE]\n\n"
+
+
+def test_generate_json_streams_and_ignores_trailing_text():
+    seen = {}
+
+    def handler(request):
+        seen["stream"] = json.loads(request.content)["stream"]
+        return httpx.Response(200, text=_sse(['{"findings"', ': [], "notes": "ok"}', " trailing chatter"]),
+                              headers={"content-type": "text/event-stream"})
+
+    p = MetaLlamaProvider(base_url="http://llama", client=httpx.Client(transport=httpx.MockTransport(handler)))
+    assert p.generate_json(messages=[{"role": "user", "content": "hi"}]) == {"findings": [], "notes": "ok"}
+    assert seen["stream"] is True
+    assert list(p.stream(messages=[{"role": "user", "content": "hi"}]))[-1] == " trailing chatter"
+
+
+def test_parser_skips_bracketed_prose_before_the_value():
+    p = IncrementalJSONParser()
+    assert not p.feed("As noted [see refs 1-2] and {curly aside}, ")
+    assert p.feed('here: {"findings": ["[x]"], "notes": "ok"} done')
+    assert p.result == {"findings": ["[x]"], "notes": "ok"}
+    assert p.skipped.endswith("here: ") and p.tail == " done"